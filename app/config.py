@@ -10,6 +10,29 @@ if load_dotenv:
     load_dotenv(".env.development")
 
 DATABASE_URL = os.getenv("DATABASE_URL", "")
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+DATABASE_READ_URLS = [
+    url.strip() for url in os.getenv("DATABASE_READ_URLS", DATABASE_READ_URL).split(",") if url.strip()
+]
+DB_REPLICA_CHECK_SEC = float(os.getenv("DB_REPLICA_CHECK_SEC", "10"))
+DB_REPLICA_MAX_LAG_SEC = float(os.getenv("DB_REPLICA_MAX_LAG_SEC", "30"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_SEC = float(os.getenv("DB_POOL_TIMEOUT_SEC", "10"))
+DB_POOL_RECYCLE_SEC = int(os.getenv("DB_POOL_RECYCLE_SEC", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "idle").lower()
+if DB_POOL_PRE_PING not in {"always", "idle", "never"}:
+    raise RuntimeError("DB_POOL_PRE_PING must be one of: always, idle, never")
+DB_PRE_PING_IDLE_SEC = float(os.getenv("DB_PRE_PING_IDLE_SEC", "60"))
+DB_PREPARE_THRESHOLD = os.getenv("DB_PREPARE_THRESHOLD", "").lower()
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_LOCK_TIMEOUT_MS = int(os.getenv("DB_LOCK_TIMEOUT_MS", "0"))
+DB_ROUTE_TIMEOUTS: dict[str, tuple[int, int]] = {}
+for _item in os.getenv("DB_ROUTE_TIMEOUTS", "").split(","):
+    _path, _, _timeouts = _item.strip().partition("=")
+    if _path and _timeouts:
+        _statement, _, _lock = _timeouts.partition(":")
+        DB_ROUTE_TIMEOUTS[_path] = (int(_statement or 0), int(_lock or DB_LOCK_TIMEOUT_MS))
 VECTOR_DIM = int(os.getenv("VECTOR_DIM", "384"))
 IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "100"))
 IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
@@ -31,15 +54,64 @@ EMBED_API_BASE = os.getenv("EMBED_API_BASE", "https://api.openai.com/v1")
 EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-small")
 OLLAMA_BASE = os.getenv("OLLAMA_BASE", "http://localhost:11434")
 
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "2"))
+PROVIDER_BACKOFF_SEC = float(os.getenv("PROVIDER_BACKOFF_SEC", "0.2"))
+PROVIDER_MAX_CONNECTIONS = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "20"))
+PROVIDER_HEDGE_ENABLED = os.getenv("PROVIDER_HEDGE_ENABLED", "false").lower() == "true"
+PROVIDER_HEDGE_MIN_SAMPLES = int(os.getenv("PROVIDER_HEDGE_MIN_SAMPLES", "20"))
+PROVIDER_BREAKER_THRESHOLD = int(os.getenv("PROVIDER_BREAKER_THRESHOLD", "5"))
+PROVIDER_BREAKER_RESET_SEC = float(os.getenv("PROVIDER_BREAKER_RESET_SEC", "30"))
+
 INGEST_ENABLED = os.getenv("INGEST_ENABLED", "false").lower() == "true"
 INGEST_INTERVAL_SEC = int(os.getenv("INGEST_INTERVAL_SEC", "300"))
 INGEST_WALLET = os.getenv("INGEST_WALLET", "")
 
+SCORECARD_CACHE_TTL_SEC = float(os.getenv("SCORECARD_CACHE_TTL_SEC", "0"))
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "bnb-ai-trading")
+
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "16"))
+
+DECISION_LOG_MODE = os.getenv("DECISION_LOG_MODE", "async").lower()
+if DECISION_LOG_MODE not in {"sync", "async", "wal"}:
+    raise RuntimeError("DECISION_LOG_MODE must be one of: sync, async, wal")
+DECISION_LOG_BATCH_SIZE = int(os.getenv("DECISION_LOG_BATCH_SIZE", "100"))
+DECISION_LOG_FLUSH_MS = int(os.getenv("DECISION_LOG_FLUSH_MS", "200"))
+DECISION_LOG_QUEUE_SIZE = int(os.getenv("DECISION_LOG_QUEUE_SIZE", "10000"))
+DECISION_LOG_WAL_PATH = os.getenv("DECISION_LOG_WAL_PATH", "decision_log.wal")
+DECISION_LOG_RETRY_SEC = float(os.getenv("DECISION_LOG_RETRY_SEC", "5"))
+
 RESET_VECTOR_DIM_MISMATCH = os.getenv("RESET_VECTOR_DIM_MISMATCH", "false").lower() == "true"
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true"
+MAINTENANCE_ON_MIGRATE = os.getenv("MAINTENANCE_ON_MIGRATE", "true").lower() == "true"
 
 RPC_URL = os.getenv("RPC_URL", "")
 PRIVATE_KEY = os.getenv("PRIVATE_KEY", "")
 EXECUTE_LIVE = os.getenv("EXECUTE_LIVE", "false").lower() == "true"
+GAS_PRICE_REFRESH_SEC = float(os.getenv("GAS_PRICE_REFRESH_SEC", "15"))
+GAS_SAFETY_MARGIN = float(os.getenv("GAS_SAFETY_MARGIN", "0.2"))
+FEE_HISTORY_BLOCKS = int(os.getenv("FEE_HISTORY_BLOCKS", "20"))
+FEE_HISTORY_TTL_SEC = float(os.getenv("FEE_HISTORY_TTL_SEC", "12"))
+SIMULATE_BEFORE_SUBMIT = os.getenv("SIMULATE_BEFORE_SUBMIT", "true").lower() == "true"
+SIMULATION_CACHE_SIZE = int(os.getenv("SIMULATION_CACHE_SIZE", "1024"))
+SIMULATION_FAIL_CLOSED = os.getenv("SIMULATION_FAIL_CLOSED", "true").lower() == "true"
+EXECUTION_QUEUE_WORKERS = int(os.getenv("EXECUTION_QUEUE_WORKERS", "4"))
+EXECUTION_QUEUE_MAX = int(os.getenv("EXECUTION_QUEUE_MAX", "5000"))
+ANCHOR_ENABLED = os.getenv("ANCHOR_ENABLED", "false").lower() == "true"
+ANCHOR_MODE = os.getenv("ANCHOR_MODE", "merkle").lower()
+if ANCHOR_MODE not in {"merkle", "events"}:
+    raise RuntimeError("ANCHOR_MODE must be one of: merkle, events")
+ANCHOR_INTERVAL_SEC = int(os.getenv("ANCHOR_INTERVAL_SEC", "600"))
+ANCHOR_BATCH_SIZE = int(os.getenv("ANCHOR_BATCH_SIZE", "500"))
+DECISION_LOG_ADDRESS = os.getenv("DECISION_LOG_ADDRESS", "")
+CONFIRMATION_DEPTH = int(os.getenv("CONFIRMATION_DEPTH", "3"))
+RECEIPT_POLL_SEC = float(os.getenv("RECEIPT_POLL_SEC", "3"))
+RECEIPT_BATCH_SIZE = int(os.getenv("RECEIPT_BATCH_SIZE", "200"))
+RECEIPT_DROP_AFTER_SEC = int(os.getenv("RECEIPT_DROP_AFTER_SEC", "900"))
 ENVIRONMENT = os.getenv("ENVIRONMENT", "dev").lower()
 POLICY_MODE = os.getenv("POLICY_MODE")
 if not POLICY_MODE:
@@ -48,10 +120,19 @@ if POLICY_MODE not in {"read_only", "paper_trade", "execute_enabled"}:
     raise RuntimeError("POLICY_MODE must be one of: read_only, paper_trade, execute_enabled")
 
 MAX_GAS = int(os.getenv("MAX_GAS", "300000"))
+MAX_BATCH_GAS = int(os.getenv("MAX_BATCH_GAS", "3000000"))
+MAX_BATCH_LEGS = int(os.getenv("MAX_BATCH_LEGS", "200"))
 MAX_POSITION_SIZE = float(os.getenv("MAX_POSITION_SIZE", "25"))
 MAX_SLIPPAGE_BPS = int(os.getenv("MAX_SLIPPAGE_BPS", "100"))
 ALLOWED_ASSETS = [item.strip().upper() for item in os.getenv("ALLOWED_ASSETS", "BNB,BUSD,USDT").split(",") if item.strip()]
 ALLOWED_ACTIONS = [item.strip().lower() for item in os.getenv("ALLOWED_ACTIONS", "swap,transfer").split(",") if item.strip()]
-
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL must be set (see .env.example)")
+# id:max_size pairs that tighten MAX_POSITION_SIZE for a strategy or a user.
+STRATEGY_LIMITS: dict[str, float] = {}
+USER_LIMITS: dict[str, float] = {}
+for _limits, _name in ((STRATEGY_LIMITS, "STRATEGY_LIMITS"), (USER_LIMITS, "USER_LIMITS")):
+    for _item in os.getenv(_name, "").split(","):
+        _key, _, _value = _item.strip().partition(":")
+        if _key and _value:
+            _limits[_key.strip()] = float(_value)
+MAX_ASSET_EXPOSURE_PER_HOUR = float(os.getenv("MAX_ASSET_EXPOSURE_PER_HOUR", "0"))
+EXPOSURE_WINDOW_SEC = int(os.getenv("EXPOSURE_WINDOW_SEC", "3600"))
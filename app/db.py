@@ -1,12 +1,204 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import itertools
+import logging
+import threading
+import time
 
-from app.config import DATABASE_URL
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
+from app.config import (
+    DATABASE_READ_URLS,
+    DATABASE_URL,
+    DB_LOCK_TIMEOUT_MS,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE_SEC,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SEC,
+    DB_PRE_PING_IDLE_SEC,
+    DB_PREPARE_THRESHOLD,
+    DB_REPLICA_CHECK_SEC,
+    DB_REPLICA_MAX_LAG_SEC,
+    DB_ROUTE_TIMEOUTS,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+from app.services.metrics import DB_POOL, DB_POOL_WAIT, DB_REPLICA_HEALTHY, DB_REPLICA_LAG
+from app.services.tracing import instrument_engine
 
-def create_db_engine():
-    return create_engine(DATABASE_URL, pool_pre_ping=True)
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    engine_name = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.labels(engine=self.engine_name).observe(time.perf_counter() - start)
+
+
+def _idle_pre_ping(engine, idle_sec: float) -> None:
+    # Ping only connections that sat idle long enough to have been dropped, instead of every checkout.
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_sec:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as error:
+            raise exc.DisconnectionError() from error
+        finally:
+            cursor.close()
+
+
+def _register_pool_metrics(engine, name: str) -> None:
+    pool = engine.pool
+    DB_POOL.labels(engine=name, state="size").set_function(pool.size)
+    DB_POOL.labels(engine=name, state="max_overflow").set_function(lambda: DB_MAX_OVERFLOW)
+    DB_POOL.labels(engine=name, state="checked_out").set_function(pool.checkedout)
+    DB_POOL.labels(engine=name, state="checked_in").set_function(pool.checkedin)
+    DB_POOL.labels(engine=name, state="overflow").set_function(lambda: max(0, pool.overflow()))
+
+
+def create_db_engine(url: str = DATABASE_URL, name: str = "primary"):
+    # Checked here rather than in app.config so tools that never touch the database can import settings.
+    if not url:
+        raise RuntimeError("DATABASE_URL must be set (see .env.example)")
+    connect_args = {}
+    if DB_PREPARE_THRESHOLD and url.startswith("postgresql+psycopg"):
+        # psycopg3 prepares a statement server-side once it has run this many times on a connection;
+        # "off" disables it for transaction-pooling proxies such as PgBouncer.
+        connect_args["prepare_threshold"] = None if DB_PREPARE_THRESHOLD == "off" else int(DB_PREPARE_THRESHOLD)
+    pool_class = type(f"{name.title()}QueuePool", (TimedQueuePool,), {"engine_name": name})
+    engine = create_engine(
+        url,
+        poolclass=pool_class,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT_SEC,
+        pool_recycle=DB_POOL_RECYCLE_SEC,
+        pool_pre_ping=DB_POOL_PRE_PING == "always",
+        connect_args=connect_args,
+    )
+    if DB_POOL_PRE_PING == "idle":
+        _idle_pre_ping(engine, DB_PRE_PING_IDLE_SEC)
+    instrument_engine(engine)
+    _register_pool_metrics(engine, name)
+    return engine
+
+
+def apply_timeouts(db: Session, statement_ms: int, lock_ms: int = 0) -> None:
+    """SET LOCAL the timeouts at the start of every transaction this session opens."""
+    if statement_ms <= 0 and lock_ms <= 0:
+        return
+
+    @event.listens_for(db, "after_begin")
+    def _set_timeouts(session, transaction, connection):
+        if statement_ms > 0:
+            connection.execute(text(f"SET LOCAL statement_timeout = {int(statement_ms)}"))
+        if lock_ms > 0:
+            connection.execute(text(f"SET LOCAL lock_timeout = {int(lock_ms)}"))
+
+
+def route_timeouts(route_path: str | None) -> tuple[int, int]:
+    statement_ms, lock_ms = DB_ROUTE_TIMEOUTS.get(route_path or "", (DB_STATEMENT_TIMEOUT_MS, DB_LOCK_TIMEOUT_MS))
+    return statement_ms, lock_ms
+
+
+class ReadRouter:
+    """Round-robins read-only sessions across healthy replicas, falling back to the primary."""
+
+    def __init__(
+        self,
+        primary,
+        urls: list[str],
+        check_interval_sec: float = DB_REPLICA_CHECK_SEC,
+        max_lag_sec: float = DB_REPLICA_MAX_LAG_SEC,
+    ) -> None:
+        self.primary = primary
+        self.replicas = [create_db_engine(url, f"replica-{index}") for index, url in enumerate(urls)]
+        self.check_interval_sec = check_interval_sec
+        self.max_lag_sec = max_lag_sec
+        self._healthy = [True] * len(self.replicas)
+        self._cursor = itertools.count()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        for index in range(len(self.replicas)):
+            DB_REPLICA_HEALTHY.labels(engine=f"replica-{index}").set(1)
+
+    def engine(self, consistent: bool = False):
+        if consistent or not self.replicas:
+            return self.primary
+        count = len(self.replicas)
+        start = next(self._cursor)
+        for offset in range(count):
+            index = (start + offset) % count
+            if self._healthy[index]:
+                return self.replicas[index]
+        return self.primary
+
+    def session(self, consistent: bool = False) -> Session:
+        return Session(bind=self.engine(consistent), autoflush=False)
+
+    def mark_unhealthy(self, engine) -> None:
+        for index, replica in enumerate(self.replicas):
+            if replica is engine and self._healthy[index]:
+                self._healthy[index] = False
+                DB_REPLICA_HEALTHY.labels(engine=f"replica-{index}").set(0)
+                logger.warning("Replica %s marked unhealthy after a query error", index)
+
+    def check(self) -> None:
+        for index, replica in enumerate(self.replicas):
+            name = f"replica-{index}"
+            try:
+                with replica.connect() as conn:
+                    lag = conn.execute(
+                        text(
+                            "SELECT CASE WHEN pg_is_in_recovery() "
+                            "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                            "ELSE 0 END"
+                        )
+                    ).scalar_one()
+                healthy = float(lag) <= self.max_lag_sec
+                DB_REPLICA_LAG.labels(engine=name).set(float(lag))
+            except Exception as error:
+                logger.warning("Replica %s health check failed: %s", index, error)
+                healthy = False
+            if healthy != self._healthy[index]:
+                logger.info("Replica %s is now %s", index, "healthy" if healthy else "unhealthy")
+            self._healthy[index] = healthy
+            DB_REPLICA_HEALTHY.labels(engine=name).set(1 if healthy else 0)
+
+    def start(self) -> None:
+        if not self.replicas or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self.check()
+            self._stop_event.wait(self.check_interval_sec)
 
 
 ENGINE = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=ENGINE)
+read_router = ReadRouter(ENGINE, DATABASE_READ_URLS)
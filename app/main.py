@@ -1,21 +1,49 @@
+import json
+import re
 import time
+from typing import Iterator
 
-from fastapi import Depends, FastAPI, HTTPException
-from sqlalchemy import text
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
-from app.config import INGEST_ENABLED, IVFFLAT_LISTS, IVFFLAT_PROBES, RESET_VECTOR_DIM_MISMATCH, VECTOR_DIM
-from app.db import ENGINE, SessionLocal
-from app.models import Base
+from app.config import (
+    ADMIN_TOKEN,
+    ANCHOR_ENABLED,
+    DECISION_LOG_ADDRESS,
+    INGEST_ENABLED,
+    IVFFLAT_PROBES,
+    MAINTENANCE_ON_MIGRATE,
+    MAX_BATCH_GAS,
+    MAX_BATCH_LEGS,
+    MAX_GAS,
+    MAX_SLIPPAGE_BPS,
+)
+from app.db import ENGINE, SessionLocal, apply_timeouts, read_router, route_timeouts
+from app.migrations import ensure_schema, maintenance, schema_state
+from app.models import Execution
 from app.schemas import (
     AdvisorRequest,
     AdvisorResponse,
+    CallDataBatchRequest,
+    CallDataBatchResponse,
+    ExecutionBatchLeg,
+    ExecutionBatchRequest,
+    ExecutionBatchResponse,
     ExecutionRequest,
     ExecutionResponse,
+    ExecutionStatusResponse,
+    ExecutionTicketResponse,
     IngestRequest,
     IngestResponse,
     MCPRouteRequest,
     MCPRouteResponse,
+    PolicyBatchRequest,
+    PolicyBatchResponse,
+    PolicyDecision,
+    QueueTradeRequest,
     SearchRequest,
     SearchResponse,
     SearchHit,
@@ -27,72 +55,167 @@ from app.schemas import (
     UserTradesResponse,
 )
 from app.services.advisor_agent import AdvisorAgent
+from app.services.calldata import encode_batch
+from app.services.confirmation_tracker import confirmation_tracker
+from app.services.container import get_services
 from app.services.data_agent import DataAgent
-from app.services.execution_agent import ExecutionAgent
+from app.services.decision_anchor import DecisionAnchorService
+from app.services.decision_log import decision_log
+from app.services.execution_queue import ExecutionTicket, QueueFullError, execution_queue
 from app.services.ingest_scheduler import IngestScheduler
-from app.services.mcp_orchestrator import MCPOrchestrator
-from app.services.policy import validate_trade
+from app.services.metrics import HTTP_LATENCY, QUEUE_DEPTH, REGISTRY
+from app.services.provider_client import close_provider_clients
+from app.services.policy import get_policy, validate_trade
+from app.services.profiler import ProfilerBusyError, allocation_tracker, collapsed, sample_stacks
 from app.services.scorecard import Scorecard
+from app.services.tracing import breakdown, should_sample, start_trace
 
 app = FastAPI(title="BNB Chain AI Trading MVP")
 ingest_scheduler: IngestScheduler | None = None
+decision_anchor: DecisionAnchorService | None = None
+
+QUEUE_DEPTH.labels(queue="decision_log").set_function(decision_log.qsize)
+QUEUE_DEPTH.labels(queue="execution").set_function(execution_queue.depth)
+QUEUE_DEPTH.labels(queue="confirmations").set_function(confirmation_tracker.pending_count)
+
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    debug_timing = request.query_params.get("debug_timing") == "1"
+    alloc_start = allocation_tracker.before() if allocation_tracker.matches(request.url.path) else None
+    start = time.perf_counter()
+    with start_trace(f"{request.method} {request.url.path}", sampled=should_sample(debug_timing)) as root:
+        response = await call_next(request)
+        if alloc_start is not None:
+            allocation_tracker.after(alloc_start)
+        route_path = getattr(request.scope.get("route"), "path", "unmatched")
+        if root is not None:
+            root.name = f"{request.method} {route_path}"
+            root.set("http.status_code", response.status_code)
+    HTTP_LATENCY.labels(route=route_path, method=request.method, status=str(response.status_code)).observe(
+        time.perf_counter() - start
+    )
+    if root is None or not debug_timing:
+        return response
+    return await _with_timing(response, root)
+
+
+async def _with_timing(response, root):
+    spans = breakdown(root.trace)
+    timing = {
+        "X-Trace-Id": root.trace.trace_id,
+        "Server-Timing": ", ".join(
+            f'{re.sub(r"[^A-Za-z0-9_.-]", "_", item["name"])};dur={item["duration_ms"]}' for item in spans[:20]
+        ),
+    }
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        response.headers.update(timing)
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    payload = json.loads(body)
+    if isinstance(payload, dict):
+        payload["debug_timing"] = {"trace_id": root.trace.trace_id, "spans": spans}
+    rebuilt = JSONResponse(payload, status_code=response.status_code)
+    # Raw pairs, not a dict, so repeated headers such as Set-Cookie survive; length and type are rebuilt's own.
+    rebuilt.raw_headers.extend(
+        (key, value) for key, value in response.raw_headers if key not in (b"content-length", b"content-type")
+    )
+    rebuilt.headers.update(timing)
+    return rebuilt
 
 
 @app.on_event("startup")
 def startup() -> None:
-    with ENGINE.begin() as conn:
-        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-        current_dim = None
-        try:
-            current_dim = conn.execute(
-                text(
-                    "SELECT atttypmod FROM pg_attribute "
-                    "WHERE attrelid='onchain_events'::regclass AND attname='embedding'"
-                )
-            ).scalar_one_or_none()
-        except Exception:
-            current_dim = None
-        if current_dim is not None and current_dim >= 0:
-            current_dim = current_dim - 4
-        if current_dim and current_dim != VECTOR_DIM and RESET_VECTOR_DIM_MISMATCH:
-            conn.execute(text("DROP TABLE IF EXISTS onchain_events"))
-    Base.metadata.create_all(bind=ENGINE)
-    with ENGINE.begin() as conn:
-        columns = conn.execute(
-            text(
-                "SELECT column_name FROM information_schema.columns "
-                "WHERE table_name='onchain_events'"
-            )
-        ).fetchall()
-        existing = {row[0] for row in columns}
-        if "from_address" not in existing:
-            conn.execute(text("ALTER TABLE onchain_events ADD COLUMN from_address VARCHAR(64)"))
-        if "to_address" not in existing:
-            conn.execute(text("ALTER TABLE onchain_events ADD COLUMN to_address VARCHAR(64)"))
-        if "value" not in existing:
-            conn.execute(text("ALTER TABLE onchain_events ADD COLUMN value DOUBLE PRECISION"))
-        if "block_number" not in existing:
-            conn.execute(text("ALTER TABLE onchain_events ADD COLUMN block_number INTEGER"))
-        if "tags" not in existing:
-            conn.execute(text("ALTER TABLE onchain_events ADD COLUMN tags TEXT"))
-        index_lists = max(1, IVFFLAT_LISTS)
-        conn.execute(
-            text(
-                "CREATE INDEX IF NOT EXISTS onchain_events_embedding_idx "
-                f"ON onchain_events USING ivfflat (embedding vector_cosine_ops) WITH (lists={index_lists})"
-            )
-        )
-        conn.execute(text("ANALYZE onchain_events"))
+    if ensure_schema(ENGINE) and MAINTENANCE_ON_MIGRATE:
+        maintenance.start(ENGINE)
+    read_router.start()
+    decision_log.start(SessionLocal)
+    get_services().warm()
+    confirmation_tracker.start(SessionLocal)
+    execution_queue.start(_run_ticket)
     if INGEST_ENABLED:
         global ingest_scheduler
         ingest_scheduler = IngestScheduler(SessionLocal)
         ingest_scheduler.start()
+    if ANCHOR_ENABLED and DECISION_LOG_ADDRESS:
+        global decision_anchor
+        decision_anchor = DecisionAnchorService(SessionLocal, get_services().exec_client)
+        decision_anchor.start()
 
 
-def get_db():
+def _run_ticket(ticket: ExecutionTicket) -> dict:
     db = SessionLocal()
+    try:
+        return get_services().orchestrator(db).route("execute", None, ticket.trade, ticket.payload, ticket.user_id)
+    finally:
+        db.close()
+
+
+def _ticket_response(ticket: ExecutionTicket) -> ExecutionTicketResponse:
+    queue_ms = None
+    run_ms = None
+    if ticket.started_at is not None:
+        queue_ms = round((ticket.started_at - ticket.enqueued_at) * 1000, 2)
+        if ticket.finished_at is not None:
+            run_ms = round((ticket.finished_at - ticket.started_at) * 1000, 2)
+    return ExecutionTicketResponse(
+        ticket_id=ticket.ticket_id,
+        status=ticket.status,
+        priority=ticket.priority,
+        detail=ticket.detail,
+        result=ticket.result,
+        queue_ms=queue_ms,
+        run_ms=run_ms,
+    )
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="admin-disabled")
+    if x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="admin-token-required")
+
+
+def _session(factory, request: Request) -> Session:
+    db = factory()
+    apply_timeouts(db, *route_timeouts(getattr(request.scope.get("route"), "path", None)))
+    return db
+
+
+def _read_your_writes(request: Request) -> bool:
+    """Clients that just wrote can pin their reads to the primary to avoid replica lag."""
+    value = request.headers.get("x-read-your-writes") or request.query_params.get("read_your_writes") or ""
+    return value.lower() in {"1", "true", "yes"}
+
+
+def _read_session_factory(request: Request):
+    consistent = _read_your_writes(request)
+    return lambda: _session(lambda: read_router.session(consistent), request)
+
+
+def _orchestrator_reads(request: Request):
+    """Replica sessions for the orchestrator's read stages; None when those reads would land on the
+    primary anyway, so the orchestrator reuses the request session instead of opening more."""
+    if not read_router.replicas or _read_your_writes(request):
+        return None
+    return _read_session_factory(request)
+
+
+def get_db(request: Request):
+    db = _session(SessionLocal, request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request):
+    db = _read_session_factory(request)()
     try:
         yield db
+    except OperationalError:
+        read_router.mark_unhealthy(db.get_bind())
+        raise
     finally:
         db.close()
 
@@ -101,6 +224,14 @@ def get_db():
 def shutdown() -> None:
     if ingest_scheduler:
         ingest_scheduler.stop()
+    if decision_anchor:
+        decision_anchor.stop()
+    execution_queue.stop()
+    confirmation_tracker.stop()
+    decision_log.stop()
+    read_router.stop()
+    get_services().close()
+    close_provider_clients()
 
 
 @app.get("/health")
@@ -108,6 +239,41 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/admin/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+def profile(seconds: float = 10, interval_ms: float = 5, include_idle: bool = False) -> PlainTextResponse:
+    try:
+        counts = sample_stacks(seconds, interval_ms / 1000, include_idle=include_idle)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return PlainTextResponse(collapsed(counts))
+
+
+@app.post("/admin/allocations", dependencies=[Depends(require_admin)])
+def allocations(route: str, seconds: float = 30, top: int = 25) -> dict:
+    try:
+        return allocation_tracker.run(route, seconds, top=top)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+@app.post("/admin/maintenance", status_code=202, dependencies=[Depends(require_admin)])
+def start_maintenance(rebuild_index: bool = False, analyze: bool = True) -> dict:
+    if not maintenance.start(ENGINE, rebuild_index=rebuild_index, run_analyze=analyze):
+        raise HTTPException(status_code=409, detail="maintenance-running")
+    return maintenance.status()
+
+
+@app.get("/admin/maintenance", dependencies=[Depends(require_admin)])
+def maintenance_status() -> dict:
+    version, vector_dim = schema_state(ENGINE)
+    return {"schema_version": version, "vector_dim": vector_dim, **maintenance.status()}
+
+
 @app.post("/data/ingest", response_model=IngestResponse)
 def ingest(request: IngestRequest, db: Session = Depends(get_db)) -> IngestResponse:
     agent = DataAgent(db)
@@ -125,7 +291,7 @@ def ingest(request: IngestRequest, db: Session = Depends(get_db)) -> IngestRespo
 
 
 @app.post("/data/search", response_model=SearchResponse)
-def search(request: SearchRequest, db: Session = Depends(get_db)) -> SearchResponse:
+def search(request: SearchRequest, db: Session = Depends(get_read_db)) -> SearchResponse:
     agent = DataAgent(db)
     total_start = time.perf_counter()
     embed_start = time.perf_counter()
@@ -153,14 +319,14 @@ def search(request: SearchRequest, db: Session = Depends(get_db)) -> SearchRespo
 
 
 @app.get("/data/insights", response_model=InsightsResponse)
-def insights(db: Session = Depends(get_db)) -> InsightsResponse:
+def insights(db: Session = Depends(get_read_db)) -> InsightsResponse:
     agent = DataAgent(db)
     data = agent.insights()
     return InsightsResponse(**data)
 
 
 @app.post("/advisor/recommend", response_model=AdvisorResponse)
-def recommend(request: AdvisorRequest, db: Session = Depends(get_db)) -> AdvisorResponse:
+def recommend(request: AdvisorRequest, db: Session = Depends(get_read_db)) -> AdvisorResponse:
     agent = AdvisorAgent(db)
     recommendation, rationale, signals, risk_score, allocation, confidence = agent.recommend(
         request.profile, request.objective, user_id=request.user_id
@@ -176,6 +342,50 @@ def recommend(request: AdvisorRequest, db: Session = Depends(get_db)) -> Advisor
     )
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/advisor/recommend/stream")
+def recommend_stream(request: AdvisorRequest, db: Session = Depends(get_read_db)) -> StreamingResponse:
+    agent = AdvisorAgent(db)
+    recommendation, rationale, signals, risk_score, allocation, confidence = agent.recommend(
+        request.profile, request.objective, user_id=request.user_id
+    )
+    advice = AdvisorResponse(
+        recommendation=recommendation,
+        rationale=rationale,
+        signals=signals,
+        risk_score=risk_score,
+        allocation=allocation,
+        confidence=confidence,
+        personalization=agent.last_personalization,
+    )
+    context = agent.last_personalization or {}
+
+    def events() -> Iterator[str]:
+        yield _sse("advice", advice.model_dump())
+        try:
+            for token in get_services().llm_advisor.stream(
+                request.profile,
+                request.objective,
+                signals,
+                risk_score,
+                allocation,
+                user_context=context.get("summary"),
+            ):
+                yield _sse("token", {"text": token})
+        except Exception as exc:
+            yield _sse("error", {"detail": str(exc)})
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/advisor/users/{user_id}/trades", response_model=UserTradesResponse)
 def record_trades(user_id: str, request: UserTradesRequest, db: Session = Depends(get_db)) -> UserTradesResponse:
     agent = AdvisorAgent(db)
@@ -192,8 +402,8 @@ def record_holdings(user_id: str, request: UserHoldingsRequest, db: Session = De
 
 @app.post("/execute/plan", response_model=ExecutionResponse)
 def plan(request: ExecutionRequest) -> ExecutionResponse:
-    agent = ExecutionAgent()
-    allowed, reason = validate_trade(request.asset, request.action, request.size)
+    agent = get_services().exec_agent
+    allowed, reason = validate_trade(request.asset, request.action, request.size, strategy_id=request.strategy_id)
     if not allowed:
         raise HTTPException(status_code=400, detail=reason)
     try:
@@ -214,9 +424,129 @@ def plan(request: ExecutionRequest) -> ExecutionResponse:
     )
 
 
+@app.post("/execute/plan/batch", response_model=ExecutionBatchResponse)
+def plan_batch(request: ExecutionBatchRequest) -> ExecutionBatchResponse:
+    if len(request.legs) > MAX_BATCH_LEGS:
+        raise HTTPException(status_code=400, detail="too-many-legs")
+    services = get_services()
+    decisions = get_policy().validate_batch(request.legs, user_id=request.user_id)
+    allowed_idx = [index for index, (allowed, _) in enumerate(decisions) if allowed]
+    plans = services.exec_agent.build_plans(
+        [
+            (leg.strategy_id, leg.asset, leg.action, leg.size)
+            for leg in (request.legs[index] for index in allowed_idx)
+        ]
+    )
+    planned = dict(zip(allowed_idx, plans))
+
+    legs = []
+    total_gas = 0
+    for index, (allowed, reason) in enumerate(decisions):
+        plan = planned.get(index)
+        if plan and (plan.estimated_gas > MAX_GAS or plan.slippage_bps > MAX_SLIPPAGE_BPS):
+            allowed, reason = False, "gas-or-slippage-limit"
+        if allowed:
+            total_gas += plan.estimated_gas
+        legs.append(ExecutionBatchLeg(index=index, allowed=allowed, reason=reason, plan=plan.__dict__ if plan else None))
+
+    gas_price = None
+    if services.exec_client.gas_price:
+        try:
+            gas_price = services.exec_client.gas_price.value
+        except Exception:
+            gas_price = None
+    rejected = sum(1 for leg in legs if not leg.allowed)
+    if total_gas > MAX_BATCH_GAS:
+        status, detail = "rejected", "batch-gas-budget-exceeded"
+    elif rejected:
+        status, detail = "rejected", f"{rejected}-legs-rejected"
+    else:
+        status, detail = "ready", "ok"
+    return ExecutionBatchResponse(
+        status=status,
+        detail=detail,
+        legs=legs,
+        total_gas=total_gas,
+        gas_budget=MAX_BATCH_GAS,
+        gas_price_wei=gas_price,
+        total_cost_wei=total_gas * gas_price if gas_price is not None else None,
+    )
+
+
+@app.post("/execute/calldata", response_model=CallDataBatchResponse)
+def calldata_batch(request: CallDataBatchRequest) -> CallDataBatchResponse:
+    try:
+        encoded = encode_batch((call.method, call.args) for call in request.calls)
+    except (ValueError, TypeError, OverflowError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return CallDataBatchResponse(call_data=["0x" + data.hex() for data in encoded])
+
+
+@app.post("/policy/validate", response_model=PolicyBatchResponse)
+def validate_policy_batch(request: PolicyBatchRequest) -> PolicyBatchResponse:
+    start = time.perf_counter()
+    results = get_policy().validate_batch(request.trades, user_id=request.user_id)
+    elapsed_us = (time.perf_counter() - start) * 1_000_000
+    allowed_count = sum(1 for allowed, _ in results if allowed)
+    return PolicyBatchResponse(
+        results=[PolicyDecision(allowed=allowed, reason=reason) for allowed, reason in results],
+        allowed_count=allowed_count,
+        rejected_count=len(results) - allowed_count,
+        elapsed_us=round(elapsed_us, 2),
+    )
+
+
+@app.post("/execute/queue", response_model=ExecutionTicketResponse, status_code=202)
+def enqueue_trade(request: QueueTradeRequest) -> ExecutionTicketResponse:
+    trade = request.trade
+    allowed, reason = validate_trade(
+        trade.asset, trade.action, trade.size, strategy_id=trade.strategy_id, user_id=request.user_id
+    )
+    if not allowed:
+        raise HTTPException(status_code=400, detail=reason)
+    try:
+        ticket = execution_queue.submit(
+            trade,
+            request.user_id,
+            lane=get_services().signer_lane(),
+            payload=request.payload,
+            priority=request.priority,
+            deadline_sec=request.deadline_sec,
+        )
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return _ticket_response(ticket)
+
+
+@app.get("/execute/queue/{ticket_id}", response_model=ExecutionTicketResponse)
+def ticket_status(ticket_id: str) -> ExecutionTicketResponse:
+    ticket = execution_queue.get(ticket_id)
+    if not ticket:
+        raise HTTPException(status_code=404, detail="ticket-not-found")
+    return _ticket_response(ticket)
+
+
+@app.get("/execute/{tx_hash}", response_model=ExecutionStatusResponse)
+def execution_status(tx_hash: str, db: Session = Depends(get_db)) -> ExecutionStatusResponse:
+    row = db.execute(select(Execution).where(Execution.tx_hash == tx_hash)).scalar_one_or_none()
+    if not row:
+        raise HTTPException(status_code=404, detail="execution-not-found")
+    return ExecutionStatusResponse(
+        tx_hash=row.tx_hash,
+        status=row.status,
+        sender=row.sender,
+        nonce=row.nonce,
+        block_number=row.block_number,
+        confirmations=row.confirmations,
+        gas_used=row.gas_used,
+        submitted_at=row.submitted_at,
+        updated_at=row.updated_at,
+    )
+
+
 @app.post("/mcp/route", response_model=MCPRouteResponse)
-def route(request: MCPRouteRequest, db: Session = Depends(get_db)) -> MCPRouteResponse:
-    orchestrator = MCPOrchestrator(db)
+def route(request: MCPRouteRequest, http_request: Request, db: Session = Depends(get_db)) -> MCPRouteResponse:
+    orchestrator = get_services().orchestrator(db, read_session=_orchestrator_reads(http_request))
     result = orchestrator.route(request.route, request.profile, request.trade, request.payload, request.user_id)
     return MCPRouteResponse(
         status=result.get("status", "unknown"),
@@ -227,12 +557,9 @@ def route(request: MCPRouteRequest, db: Session = Depends(get_db)) -> MCPRouteRe
 
 
 @app.get("/scorecard", response_model=ScorecardResponse)
-def scorecard(db: Session = Depends(get_db)) -> ScorecardResponse:
+def scorecard(db: Session = Depends(get_read_db)) -> ScorecardResponse:
     evaluator = Scorecard(db)
-    data = evaluator.data_agent()
-    advisor = evaluator.advisor_agent()
-    execution = evaluator.execution_agent()
-    overall_score, overall_confidence = evaluator.overall()
+    data, advisor, execution, overall_score, overall_confidence = evaluator.report()
     return ScorecardResponse(
         data_agent={"score": data.score, "confidence": data.confidence, "notes": data.notes},
         advisor_agent={"score": advisor.score, "confidence": advisor.confidence, "notes": advisor.notes},
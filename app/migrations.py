@@ -0,0 +1,241 @@
+import argparse
+import logging
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import ProgrammingError
+
+from app.config import IVFFLAT_LISTS, MIGRATE_ON_STARTUP, RESET_VECTOR_DIM_MISMATCH, VECTOR_DIM
+from app.models import Base
+
+logger = logging.getLogger(__name__)
+
+# Any constant works as long as every worker uses the same one; it serialises concurrent migrators.
+MIGRATION_LOCK_ID = 4_121_337
+VECTOR_INDEX = "onchain_events_embedding_idx"
+
+CREATE_VERSION_TABLE = (
+    "CREATE TABLE IF NOT EXISTS schema_version ("
+    "version INTEGER PRIMARY KEY, "
+    "name VARCHAR(128) NOT NULL, "
+    "vector_dim INTEGER NOT NULL, "
+    "applied_at TIMESTAMP NOT NULL DEFAULT now())"
+)
+
+
+def _embedding_dim(conn: Connection) -> int | None:
+    # pgvector stores the declared dimension as the column typmod.
+    typmod = conn.execute(
+        text(
+            "SELECT atttypmod FROM pg_attribute "
+            "WHERE attrelid = to_regclass('onchain_events') AND attname = 'embedding'"
+        )
+    ).scalar_one_or_none()
+    return typmod if typmod is not None and typmod > 0 else None
+
+
+def _baseline(conn: Connection) -> None:
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+    current_dim = _embedding_dim(conn)
+    if current_dim and current_dim != VECTOR_DIM and RESET_VECTOR_DIM_MISMATCH:
+        conn.execute(text("DROP TABLE IF EXISTS onchain_events"))
+    Base.metadata.create_all(bind=conn)
+    # Tables created before these columns were modelled.
+    for column, kind in (
+        ("from_address", "VARCHAR(64)"),
+        ("to_address", "VARCHAR(64)"),
+        ("value", "DOUBLE PRECISION"),
+        ("block_number", "INTEGER"),
+        ("tags", "TEXT"),
+    ):
+        conn.execute(text(f"ALTER TABLE onchain_events ADD COLUMN IF NOT EXISTS {column} {kind}"))
+
+
+def _decision_entry_id(conn: Connection) -> None:
+    # Idempotency key for decision-log WAL replays.
+    conn.execute(text("ALTER TABLE mcp_decisions ADD COLUMN IF NOT EXISTS entry_id VARCHAR(36)"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_mcp_decisions_entry_id ON mcp_decisions (entry_id)"))
+
+
+def _decision_anchor_id(conn: Connection) -> None:
+    # Anchor membership per row replaces the max(to_id) watermark, which skipped ids committed out of order.
+    conn.execute(text("ALTER TABLE mcp_decisions ADD COLUMN IF NOT EXISTS anchor_id INTEGER"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_mcp_decisions_anchor_id ON mcp_decisions (anchor_id)"))
+    conn.execute(
+        text(
+            "UPDATE mcp_decisions AS d SET anchor_id = a.id FROM decision_anchors AS a "
+            "WHERE d.anchor_id IS NULL AND a.status IN ('submitted', 'confirmed') "
+            "AND d.id BETWEEN a.from_id AND a.to_id"
+        )
+    )
+
+
+def _decision_entry_id_width(conn: Connection) -> None:
+    # entry_id is uuid4().hex, always 32 characters.
+    conn.execute(text("ALTER TABLE mcp_decisions ALTER COLUMN entry_id TYPE VARCHAR(32)"))
+
+
+# Append new steps with the next version number; never edit or reorder a released one.
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline", _baseline),
+    (2, "decision_entry_id", _decision_entry_id),
+    (3, "decision_anchor_id", _decision_anchor_id),
+    (4, "decision_entry_id_width", _decision_entry_id_width),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _read_state(conn: Connection) -> tuple[int, int | None]:
+    row = conn.execute(
+        text("SELECT version, vector_dim FROM schema_version ORDER BY version DESC LIMIT 1")
+    ).first()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def schema_state(engine: Engine) -> tuple[int, int | None]:
+    """Recorded (version, vector_dim); (0, None) for a database that was never migrated."""
+    try:
+        with engine.connect() as conn:
+            return _read_state(conn)
+    except ProgrammingError:
+        return 0, None
+
+
+def migrate(engine: Engine) -> list[str]:
+    """Apply pending migrations under an advisory lock and return what changed."""
+    changes: list[str] = []
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_ID})
+        conn.execute(text(CREATE_VERSION_TABLE))
+        version, vector_dim = _read_state(conn)
+        if version and vector_dim != VECTOR_DIM:
+            if RESET_VECTOR_DIM_MISMATCH:
+                conn.execute(text("DROP TABLE IF EXISTS onchain_events"))
+                Base.metadata.create_all(bind=conn)
+                conn.execute(
+                    text("UPDATE schema_version SET vector_dim = :dim WHERE version = :version"),
+                    {"dim": VECTOR_DIM, "version": version},
+                )
+                changes.append(f"reset onchain_events to vector({VECTOR_DIM})")
+            else:
+                logger.warning(
+                    "VECTOR_DIM=%s but onchain_events was created with %s; set RESET_VECTOR_DIM_MISMATCH=true to recreate",
+                    VECTOR_DIM,
+                    vector_dim,
+                )
+        for number, name, step in MIGRATIONS:
+            if number <= version:
+                continue
+            logger.info("Applying schema migration %s (%s)", number, name)
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, name, vector_dim) VALUES (:version, :name, :dim)"),
+                {"version": number, "name": name, "dim": VECTOR_DIM},
+            )
+            changes.append(f"{number} {name}")
+    return changes
+
+
+def ensure_schema(engine: Engine, auto_migrate: bool = MIGRATE_ON_STARTUP) -> bool:
+    """One version check on the hot path; returns True when the schema was changed."""
+    version, vector_dim = schema_state(engine)
+    if version > LATEST_VERSION:
+        logger.warning("Database schema version %s is newer than this build (%s)", version, LATEST_VERSION)
+        return False
+    if version == LATEST_VERSION and vector_dim == VECTOR_DIM:
+        return False
+    if not auto_migrate:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {LATEST_VERSION}; run `python -m app.migrations`"
+        )
+    changes = migrate(engine)
+    if changes:
+        logger.info("Schema migrated: %s", ", ".join(changes))
+    return bool(changes)
+
+
+def build_vector_index(engine: Engine, rebuild: bool = False) -> None:
+    # CONCURRENTLY keeps ingestion writable while the index builds; it cannot run inside a transaction.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if rebuild:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX}"))
+        conn.execute(
+            text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {VECTOR_INDEX} "
+                f"ON onchain_events USING ivfflat (embedding vector_cosine_ops) WITH (lists={max(1, IVFFLAT_LISTS)})"
+            )
+        )
+
+
+def analyze(engine: Engine) -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE onchain_events"))
+
+
+class MaintenanceRunner:
+    """Runs the vector index build and ANALYZE on a background thread, one job at a time."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._status: dict = {"status": "idle"}
+
+    def start(self, engine: Engine, *, rebuild_index: bool = False, run_analyze: bool = True) -> bool:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._status = {"status": "running", "started_at": time.time(), "steps": []}
+            self._thread = threading.Thread(
+                target=self._run, args=(engine, rebuild_index, run_analyze), name="db-maintenance", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def _step(self, name: str, fn: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        fn()
+        with self._lock:
+            self._status["steps"].append({"step": name, "ms": round((time.perf_counter() - start) * 1000, 1)})
+
+    def _run(self, engine: Engine, rebuild_index: bool, run_analyze: bool) -> None:
+        try:
+            self._step("rebuild_index" if rebuild_index else "index", lambda: build_vector_index(engine, rebuild_index))
+            if run_analyze:
+                self._step("analyze", lambda: analyze(engine))
+            result = {"status": "ok"}
+        except Exception as exc:
+            logger.exception("Database maintenance failed")
+            result = {"status": "failed", "error": str(exc)}
+        with self._lock:
+            self._status.update(result, finished_at=time.time())
+
+
+maintenance = MaintenanceRunner()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--maintenance", action="store_true", help="Also build the vector index and run ANALYZE")
+    parser.add_argument("--rebuild-index", action="store_true", help="Drop and rebuild the vector index")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from app.db import ENGINE
+
+    changes = migrate(ENGINE)
+    print(f"Schema at version {schema_state(ENGINE)[0]}" + (f" (applied: {', '.join(changes)})" if changes else ""))
+    if args.maintenance or args.rebuild_index:
+        build_vector_index(ENGINE, rebuild=args.rebuild_index)
+        analyze(ENGINE)
+        print("Vector index built and onchain_events analyzed")
+
+
+if __name__ == "__main__":
+    main()
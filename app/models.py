@@ -31,6 +31,9 @@ class MCPDecision(Base):
     __tablename__ = "mcp_decisions"
 
     id = Column(Integer, primary_key=True)
+    entry_id = Column(String(32), unique=True, index=True, nullable=True)
+    # decision_anchors.id of the batch that carries this row; NULL until anchored or after a failed anchor.
+    anchor_id = Column(Integer, nullable=True, index=True)
     route = Column(String(32), nullable=False)
     status = Column(String(32), nullable=False)
     reason = Column(Text, nullable=False)
@@ -62,3 +65,32 @@ class UserHolding(Base):
     quantity = Column(Float, nullable=False)
     avg_cost = Column(Float, nullable=True)
     updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Execution(Base):
+    __tablename__ = "executions"
+
+    id = Column(Integer, primary_key=True)
+    tx_hash = Column(String(80), unique=True, nullable=False, index=True)
+    sender = Column(String(64), nullable=False)
+    nonce = Column(Integer, nullable=True)
+    status = Column(String(32), nullable=False, default="submitted", index=True)
+    block_number = Column(Integer, nullable=True)
+    confirmations = Column(Integer, nullable=False, default=0)
+    gas_used = Column(Integer, nullable=True)
+    submitted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class DecisionAnchor(Base):
+    __tablename__ = "decision_anchors"
+
+    id = Column(Integer, primary_key=True)
+    mode = Column(String(16), nullable=False)
+    root = Column(String(66), nullable=True)
+    from_id = Column(Integer, nullable=False)
+    to_id = Column(Integer, nullable=False, index=True)
+    count = Column(Integer, nullable=False)
+    tx_hash = Column(String(80), nullable=True)
+    status = Column(String(32), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
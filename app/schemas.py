@@ -133,6 +133,8 @@ class ExecutionPlan(BaseModel):
     deadline_sec: int
     safety_checks: List[str]
     status: str
+    gas_source: str = "table"
+    fees: dict | None = None
 
 
 class ExecutionResponse(BaseModel):
@@ -140,6 +142,54 @@ class ExecutionResponse(BaseModel):
     dry_run: bool
 
 
+class ExecutionStatusResponse(BaseModel):
+    tx_hash: str
+    status: str
+    sender: str
+    nonce: int | None = None
+    block_number: int | None = None
+    confirmations: int
+    gas_used: int | None = None
+    submitted_at: datetime
+    updated_at: datetime
+
+
+class ExecutionBatchRequest(BaseModel):
+    legs: List[ExecutionRequest] = Field(min_length=1)
+    user_id: str | None = None
+
+
+class ExecutionBatchLeg(BaseModel):
+    index: int
+    allowed: bool
+    reason: str
+    plan: ExecutionPlan | None = None
+
+
+class ExecutionBatchResponse(BaseModel):
+    status: str
+    detail: str
+    legs: List[ExecutionBatchLeg]
+    total_gas: int
+    gas_budget: int
+    gas_price_wei: int | None = None
+    total_cost_wei: int | None = None
+    dry_run: bool = True
+
+
+class ContractCall(BaseModel):
+    method: str = Field(min_length=1)
+    args: dict = Field(default_factory=dict)
+
+
+class CallDataBatchRequest(BaseModel):
+    calls: List[ContractCall] = Field(min_length=1)
+
+
+class CallDataBatchResponse(BaseModel):
+    call_data: List[str]
+
+
 class TradeIntent(BaseModel):
     asset: str = Field(min_length=1)
     action: str = Field(min_length=1)
@@ -148,6 +198,46 @@ class TradeIntent(BaseModel):
     to_address: str | None = None
     call_data: str | None = None
     value_wei: int = Field(default=0, ge=0)
+    spender: str | None = None
+    # ERC-20 the trade spends; decoded from transfer/approve/router-swap calldata when omitted.
+    token: str | None = None
+    token_amount: int | None = Field(default=None, ge=0)
+    call: ContractCall | None = None
+
+
+class QueueTradeRequest(BaseModel):
+    user_id: str
+    trade: TradeIntent
+    priority: int = Field(default=0, ge=-100, le=100)
+    deadline_sec: int | None = Field(default=None, ge=1, le=3600)
+    payload: dict = Field(default_factory=dict)
+
+
+class ExecutionTicketResponse(BaseModel):
+    ticket_id: str
+    status: str
+    priority: int
+    detail: str = ""
+    result: dict | None = None
+    queue_ms: float | None = None
+    run_ms: float | None = None
+
+
+class PolicyBatchRequest(BaseModel):
+    user_id: str | None = None
+    trades: List[TradeIntent]
+
+
+class PolicyDecision(BaseModel):
+    allowed: bool
+    reason: str
+
+
+class PolicyBatchResponse(BaseModel):
+    results: List[PolicyDecision]
+    allowed_count: int
+    rejected_count: int
+    elapsed_us: float
 
 
 class MCPRouteRequest(BaseModel):
@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 
 from app.models import OnChainEvent, UserHolding, UserTrade
 from app.schemas import RiskProfile, UserHoldingIn, UserTradeIn
+from app.services.metrics import DB_LATENCY, timed
+from app.services.tracing import traced
 
 
 class AdvisorAgent:
@@ -51,6 +53,8 @@ class AdvisorAgent:
             return {"blue_chip": 45, "yield": 20, "growth": 25, "speculative": 10}
         return {"blue_chip": 25, "yield": 15, "growth": 35, "speculative": 25}
 
+    @timed(DB_LATENCY, method="advisor_agent.record_trades")
+    @traced("advisor_agent.record_trades")
     def record_trades(self, user_id: str, trades: List[UserTradeIn]) -> tuple[int, int]:
         inserted = 0
         skipped = 0
@@ -84,6 +88,8 @@ class AdvisorAgent:
         self.db.commit()
         return inserted, skipped
 
+    @timed(DB_LATENCY, method="advisor_agent.record_holdings")
+    @traced("advisor_agent.record_holdings")
     def record_holdings(self, user_id: str, holdings: List[UserHoldingIn]) -> int:
         upserted = 0
         normalized_user = user_id.strip()
@@ -109,7 +115,9 @@ class AdvisorAgent:
         self.db.commit()
         return upserted
 
-    def _user_context(self, user_id: str | None) -> tuple[dict | None, float, List[str], str | None]:
+    @timed(DB_LATENCY, method="advisor_agent.user_context")
+    @traced("advisor_agent.user_context")
+    def user_context(self, user_id: str | None) -> tuple[dict | None, float, List[str], str | None]:
         if not user_id:
             return None, 0.0, [], None
         normalized_user = user_id.strip()
@@ -187,7 +195,9 @@ class AdvisorAgent:
             context["summary"] = summary
         return context, adjustment, notes, summary
 
-    def recommend(self, profile: RiskProfile, objective: str, *, user_id: str | None = None) -> tuple[str, str, List[str], float, dict, float]:
+    @timed(DB_LATENCY, method="advisor_agent.market_signals")
+    @traced("advisor_agent.market_signals")
+    def market_signals(self) -> tuple[List[str], float]:
         events = (
             self.db.execute(select(OnChainEvent).order_by(OnChainEvent.created_at.desc()).limit(80))
             .scalars()
@@ -195,7 +205,17 @@ class AdvisorAgent:
         )
         signals = self._extract_signals(events) if events else ["low-data"]
         data_confidence = min(1.0, len(events) / 50) if events else 0.2
-
+        return signals, data_confidence
+
+    @traced("advisor_agent.compose")
+    def compose(
+        self,
+        profile: RiskProfile,
+        objective: str,
+        market: tuple[List[str], float],
+        user: tuple[dict | None, float, List[str], str | None],
+    ) -> tuple[str, str, List[str], float, dict, float]:
+        signals, data_confidence = market
         if profile.risk_tolerance < 0.35:
             recommendation = "Focus on high-liquidity blue-chip assets and short-term yield strategies."
         elif profile.risk_tolerance < 0.7:
@@ -204,7 +224,7 @@ class AdvisorAgent:
             recommendation = "Pursue higher beta opportunities with tight risk limits and rapid rebalancing."
 
         risk_score = self._risk_score(profile, data_confidence)
-        context, adjustment, notes, summary = self._user_context(user_id)
+        context, adjustment, notes, summary = user
         if context:
             risk_score = round(min(1.0, max(0.0, risk_score + adjustment)), 2)
         allocation = self._allocation(risk_score)
@@ -218,3 +238,6 @@ class AdvisorAgent:
             signals = signals + [f"user:{note}" for note in notes]
         self.last_personalization = context
         return recommendation, rationale, signals, risk_score, allocation, round(data_confidence, 2)
+
+    def recommend(self, profile: RiskProfile, objective: str, *, user_id: str | None = None) -> tuple[str, str, List[str], float, dict, float]:
+        return self.compose(profile, objective, self.market_signals(), self.user_context(user_id))
@@ -0,0 +1,150 @@
+import re
+from typing import Iterable, Sequence
+
+SELECTORS = {
+    "transfer": bytes.fromhex("a9059cbb"),
+    "approve": bytes.fromhex("095ea7b3"),
+    "transferFrom": bytes.fromhex("23b872dd"),
+    "balanceOf": bytes.fromhex("70a08231"),
+    "allowance": bytes.fromhex("dd62ed3e"),
+    "swapExactTokensForTokens": bytes.fromhex("38ed1739"),
+    "swapExactETHForTokens": bytes.fromhex("7ff36ab5"),
+}
+
+ADDRESS_RE = re.compile(r"^0x[a-fA-F0-9]{40}$")
+UINT256_MAX = 2**256 - 1
+_ZERO_PAD = bytes(12)
+
+
+def _checksum_matches(address: str) -> bool:
+    # EIP-55: a hex letter is upper case iff the matching nibble of keccak(lowercase hex) is >= 8.
+    from eth_utils import keccak
+
+    digest = keccak(text=address[2:].lower()).hex()
+    return all(
+        char.isdigit() or char.isupper() == (int(digest[index], 16) >= 8) for index, char in enumerate(address[2:])
+    )
+
+
+def normalize_address(address: str) -> str:
+    """Lower-cased address; mixed case must carry a valid EIP-55 checksum. Raises ValueError."""
+    if not isinstance(address, str) or not ADDRESS_RE.match(address):
+        raise ValueError(f"invalid address: {address}")
+    body = address[2:]
+    if body != body.lower() and body != body.upper() and not _checksum_matches(address):
+        raise ValueError(f"invalid address checksum: {address}")
+    return "0x" + body.lower()
+
+
+def to_uint(value: int) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"uint256 must be an integer: {value!r}")
+    value = int(value, 0) if isinstance(value, str) else value
+    if value < 0 or value > UINT256_MAX:
+        raise ValueError("uint256 out of range")
+    return value
+
+
+def encode_address(address: str) -> bytes:
+    return _ZERO_PAD + bytes.fromhex(normalize_address(address)[2:])
+
+
+def encode_uint(value: int) -> bytes:
+    return to_uint(value).to_bytes(32, "big")
+
+
+def _abi_encode(types: list[str], values: list) -> bytes:
+    # Arguments are validated above; this only turns anything eth_abi still rejects into a ValueError.
+    from eth_abi import encode
+    from eth_abi.exceptions import EncodingError
+
+    try:
+        return encode(types, values)
+    except EncodingError as exc:
+        raise ValueError(str(exc)) from exc
+
+
+def encode_transfer(to_address: str, amount: int) -> bytes:
+    return SELECTORS["transfer"] + encode_address(to_address) + encode_uint(amount)
+
+
+def encode_approve(spender: str, amount: int) -> bytes:
+    return SELECTORS["approve"] + encode_address(spender) + encode_uint(amount)
+
+
+def encode_transfer_from(from_address: str, to_address: str, amount: int) -> bytes:
+    return SELECTORS["transferFrom"] + encode_address(from_address) + encode_address(to_address) + encode_uint(amount)
+
+
+def _path(path: Sequence[str]) -> list[str]:
+    if isinstance(path, str) or not isinstance(path, Sequence) or len(path) < 2:
+        raise ValueError("path must list at least two token addresses")
+    return [normalize_address(hop) for hop in path]
+
+
+def encode_swap_exact_tokens_for_tokens(
+    amount_in: int, amount_out_min: int, path: Sequence[str], to_address: str, deadline: int
+) -> bytes:
+    args = _abi_encode(
+        ["uint256", "uint256", "address[]", "address", "uint256"],
+        [to_uint(amount_in), to_uint(amount_out_min), _path(path), normalize_address(to_address), to_uint(deadline)],
+    )
+    return SELECTORS["swapExactTokensForTokens"] + args
+
+
+def encode_swap_exact_eth_for_tokens(amount_out_min: int, path: Sequence[str], to_address: str, deadline: int) -> bytes:
+    args = _abi_encode(
+        ["uint256", "address[]", "address", "uint256"],
+        [to_uint(amount_out_min), _path(path), normalize_address(to_address), to_uint(deadline)],
+    )
+    return SELECTORS["swapExactETHForTokens"] + args
+
+
+ENCODERS = {
+    "transfer": lambda args: encode_transfer(args["to"], args["amount"]),
+    "approve": lambda args: encode_approve(args["spender"], args["amount"]),
+    "transferFrom": lambda args: encode_transfer_from(args["from"], args["to"], args["amount"]),
+    "swapExactTokensForTokens": lambda args: encode_swap_exact_tokens_for_tokens(
+        args["amount_in"], args["amount_out_min"], args["path"], args["to"], args["deadline"]
+    ),
+    "swapExactETHForTokens": lambda args: encode_swap_exact_eth_for_tokens(
+        args["amount_out_min"], args["path"], args["to"], args["deadline"]
+    ),
+}
+
+
+def encode_call(method: str, args: dict) -> bytes:
+    encoder = ENCODERS.get(method)
+    if encoder is None:
+        raise ValueError(f"unsupported method: {method}")
+    try:
+        return encoder(args)
+    except KeyError as exc:
+        raise ValueError(f"missing argument for {method}: {exc.args[0]}") from exc
+
+
+def encode_batch(calls: Iterable[tuple[str, dict]]) -> list[bytes]:
+    return [encode_call(method, args) for method, args in calls]
+
+
+def token_spend(data: bytes, to_address: str | None) -> tuple[str | None, int | None, str | None]:
+    """(token, amount, spender) that a call spends from the sender, decoded from its calldata.
+
+    For ERC-20 calls the target is the token. For a router swap the token is path[0] and the router
+    is the spender. Calls that spend no ERC-20 the sender holds, or unknown calls, return Nones
+    rather than guessing that the target is a token."""
+    selector, body = data[:4], data[4:]
+    if selector == SELECTORS["transfer"] and len(body) >= 64:
+        return to_address, int.from_bytes(body[32:64], "big"), None
+    if selector == SELECTORS["approve"] and len(body) >= 64:
+        return to_address, None, None
+    if selector == SELECTORS["swapExactTokensForTokens"]:
+        from eth_abi import decode
+        from eth_abi.exceptions import DecodingError
+
+        try:
+            amount_in, _, path, _, _ = decode(["uint256", "uint256", "address[]", "address", "uint256"], body)
+        except DecodingError:
+            return None, None, None
+        return (path[0].lower() if path else None), amount_in, to_address
+    return None, None, None
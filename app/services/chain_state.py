@@ -0,0 +1,110 @@
+import heapq
+import logging
+import threading
+from typing import TYPE_CHECKING
+
+from app.config import GAS_PRICE_REFRESH_SEC
+
+if TYPE_CHECKING:
+    from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+
+class NonceManager:
+    """Hands out nonces locally. A nonce whose send failed is given back, so later transactions
+    never sit behind a gap. The node's pending count is consulted only when it cannot be wrong
+    about our own in-flight sends."""
+
+    def __init__(self, web3: "Web3", address: str) -> None:
+        self.web3 = web3
+        self.address = address
+        self._next: int | None = None
+        self._released: list[int] = []
+        self._uncertain: set[int] = set()
+        self._lock = threading.Lock()
+
+    def _pending_count(self) -> int:
+        return self.web3.eth.get_transaction_count(self.address, "pending")
+
+    def next(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = self._pending_count()
+            if self._uncertain:
+                # The node counts pending nonces only up to the first gap, so a nonce at or above
+                # its count never arrived and can be reused.
+                pending = self._pending_count()
+                for nonce in self._uncertain:
+                    if nonce >= pending:
+                        self._give_back(nonce)
+                self._uncertain.clear()
+            if self._released:
+                return heapq.heappop(self._released)
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def _give_back(self, nonce: int) -> None:
+        if nonce == self._next - 1:
+            self._next = nonce
+        elif nonce not in self._released:
+            heapq.heappush(self._released, nonce)
+
+    def release(self, nonce: int) -> None:
+        """The transaction with this nonce definitely never reached the node."""
+        with self._lock:
+            if self._next is not None:
+                self._give_back(nonce)
+
+    def mark_uncertain(self, nonce: int) -> None:
+        """The send failed after the request may have reached the node (e.g. a read timeout)."""
+        with self._lock:
+            self._uncertain.add(nonce)
+
+    def resync(self) -> int:
+        """Catch up after the node reported our nonce as used (a send from elsewhere); never moves back."""
+        with self._lock:
+            pending = self._pending_count()
+            self._next = max(self._next or 0, pending)
+            self._released = [nonce for nonce in self._released if nonce >= pending]
+            heapq.heapify(self._released)
+            return self._next
+
+
+class GasPriceCache:
+    def __init__(self, web3: "Web3", refresh_sec: float = GAS_PRICE_REFRESH_SEC) -> None:
+        self.web3 = web3
+        self.refresh_sec = refresh_sec
+        self._value: int | None = None
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def value(self) -> int:
+        if self._value is None:
+            self.refresh()
+        return self._value
+
+    def refresh(self) -> None:
+        self._value = self.web3.eth.gas_price
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="gas-price-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as exc:
+                logger.warning("Gas price refresh failed: %s", exc)
+            self._stop_event.wait(self.refresh_sec)
@@ -0,0 +1,171 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import (
+    CONFIRMATION_DEPTH,
+    RECEIPT_BATCH_SIZE,
+    RECEIPT_DROP_AFTER_SEC,
+    RECEIPT_POLL_SEC,
+    RPC_URL,
+)
+from app.models import Execution
+from app.services.provider_client import get_provider_client, json_rpc_batch
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ("submitted", "mined")
+# Stands in for a result the node failed to give; unlike None (no receipt yet) it says nothing about the tx.
+UNAVAILABLE = object()
+
+
+@dataclass
+class PendingTx:
+    tx_hash: str
+    sender: str
+    nonce: int | None
+    submitted_at: datetime
+
+
+class ConfirmationTracker:
+    def __init__(
+        self,
+        rpc_url: str = RPC_URL,
+        depth: int = CONFIRMATION_DEPTH,
+        interval_sec: float = RECEIPT_POLL_SEC,
+        batch_size: int = RECEIPT_BATCH_SIZE,
+    ) -> None:
+        self.rpc_url = rpc_url
+        self.depth = max(1, depth)
+        self.interval_sec = interval_sec
+        self.batch_size = max(1, batch_size)
+        self.session_factory = None
+        self._pending: dict[str, PendingTx] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, session_factory) -> None:
+        self.session_factory = session_factory
+        if not self.rpc_url or (self._thread and self._thread.is_alive()):
+            return
+        with session_factory() as db:
+            rows = db.execute(select(Execution).where(Execution.status.in_(OPEN_STATUSES))).scalars().all()
+        with self._lock:
+            for row in rows:
+                self._pending[row.tx_hash] = PendingTx(row.tx_hash, row.sender, row.nonce, row.submitted_at)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="confirmation-tracker", daemon=True)
+        self._thread.start()
+        logger.info("Confirmation tracker started (%s pending, depth=%s)", len(rows), self.depth)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        logger.info("Confirmation tracker stopped")
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def track(self, tx_hash: str, sender: str, nonce: int | None, db: Session) -> None:
+        now = datetime.utcnow()
+        db.add(Execution(tx_hash=tx_hash, sender=sender, nonce=nonce, status="submitted", submitted_at=now, updated_at=now))
+        db.commit()
+        with self._lock:
+            self._pending[tx_hash] = PendingTx(tx_hash, sender, nonce, now)
+
+    def _rpc_batch(self, calls: list[tuple[str, list]]) -> list:
+        client = get_provider_client("rpc", self.rpc_url, timeout=10)
+        return [
+            UNAVAILABLE if reply is None or "error" in reply or "result" not in reply else reply["result"]
+            for reply in json_rpc_batch(client, calls)
+        ]
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as exc:
+                logger.warning("Confirmation tracker error: %s", exc)
+            self._stop_event.wait(self.interval_sec)
+
+    def poll(self) -> int:
+        with self._lock:
+            pending = list(self._pending.values())
+        if not pending:
+            return 0
+        senders = sorted({tx.sender for tx in pending})
+        head_results = self._rpc_batch(
+            [("eth_blockNumber", [])] + [("eth_getTransactionCount", [sender, "latest"]) for sender in senders]
+        )
+        if head_results[0] in (UNAVAILABLE, None):
+            raise RuntimeError("eth_blockNumber unavailable")
+        head = int(head_results[0], 16)
+        mined_nonces = {
+            sender: int(count, 16)
+            for sender, count in zip(senders, head_results[1:])
+            if count not in (UNAVAILABLE, None)
+        }
+
+        updates: list[dict] = []
+        now = datetime.utcnow()
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start : start + self.batch_size]
+            receipts = self._rpc_batch([("eth_getTransactionReceipt", [tx.tx_hash]) for tx in chunk])
+            for tx, receipt in zip(chunk, receipts):
+                if receipt is UNAVAILABLE:
+                    # An errored lookup is retried next poll; only a null receipt can age into "dropped".
+                    continue
+                change = self._classify(tx, receipt, head, mined_nonces, now)
+                if change:
+                    updates.append(change)
+
+        if updates:
+            with self.session_factory() as db:
+                for change in updates:
+                    db.execute(
+                        update(Execution)
+                        .where(Execution.tx_hash == change["tx_hash"])
+                        .values(**{key: value for key, value in change.items() if key != "tx_hash"})
+                    )
+                db.commit()
+            with self._lock:
+                for change in updates:
+                    if change["status"] not in OPEN_STATUSES:
+                        self._pending.pop(change["tx_hash"], None)
+        return len(updates)
+
+    def _classify(
+        self, tx: PendingTx, receipt: dict | None, head: int, mined_nonces: dict[str, int], now: datetime
+    ) -> dict | None:
+        if receipt:
+            block_number = int(receipt["blockNumber"], 16)
+            confirmations = head - block_number + 1
+            if receipt.get("status") == "0x0":
+                status = "failed"
+            elif confirmations >= self.depth:
+                status = "confirmed"
+            else:
+                status = "mined"
+            return {
+                "tx_hash": tx.tx_hash,
+                "status": status,
+                "block_number": block_number,
+                "confirmations": confirmations,
+                "gas_used": int(receipt.get("gasUsed", "0x0"), 16),
+                "updated_at": now,
+            }
+        if tx.nonce is not None and mined_nonces.get(tx.sender, 0) > tx.nonce:
+            return {"tx_hash": tx.tx_hash, "status": "replaced", "updated_at": now}
+        if now - tx.submitted_at > timedelta(seconds=RECEIPT_DROP_AFTER_SEC):
+            return {"tx_hash": tx.tx_hash, "status": "dropped", "updated_at": now}
+        return None
+
+
+confirmation_tracker = ConfirmationTracker()
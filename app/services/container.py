@@ -0,0 +1,74 @@
+import logging
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.services.execution_agent import ExecutionAgent
+from app.services.execution_client import ExecutionClient
+from app.services.llm_advisor import LLMAdvisor
+from app.services.mcp_orchestrator import MCPOrchestrator
+from app.services.metrics import SERVICE_CONSTRUCTION
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    def __init__(self) -> None:
+        self.construction_ms: dict[str, float] = {}
+        self.llm_advisor = self._build("llm_advisor", LLMAdvisor)
+        self.exec_agent = self._build("exec_agent", ExecutionAgent)
+        self.exec_client = self._build("exec_client", ExecutionClient)
+
+    def _build(self, name: str, factory):
+        start = time.perf_counter()
+        instance = factory()
+        self._record(name, start)
+        return instance
+
+    def _record(self, name: str, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        self.construction_ms[name] = round(elapsed * 1000, 3)
+        SERVICE_CONSTRUCTION.labels(service=name).set(elapsed)
+
+    def warm(self) -> None:
+        start = time.perf_counter()
+        try:
+            self.exec_client.warm()
+        except Exception as exc:
+            logger.warning("Execution client warm-up failed: %s", exc)
+        self._record("warm", start)
+        logger.info("Service container ready: %s", self.construction_ms)
+
+    def signer_lane(self) -> str:
+        account = self.exec_client.account
+        return account.address if account else "default"
+
+    def close(self) -> None:
+        self.exec_client.close()
+
+    def orchestrator(self, db: Session, read_session: Callable[[], Session] | None = None) -> MCPOrchestrator:
+        start = time.perf_counter()
+        orchestrator = MCPOrchestrator(
+            db,
+            llm_advisor=self.llm_advisor,
+            exec_agent=self.exec_agent,
+            exec_client=self.exec_client,
+            read_session=read_session,
+        )
+        self._record("orchestrator", start)
+        return orchestrator
+
+
+_services: ServiceContainer | None = None
+_services_lock = threading.Lock()
+
+
+def get_services() -> ServiceContainer:
+    global _services
+    if _services is None:
+        with _services_lock:
+            if _services is None:
+                _services = ServiceContainer()
+    return _services
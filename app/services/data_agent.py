@@ -3,7 +3,6 @@ import re
 from typing import List, Optional
 
 import httpx
-import numpy as np
 from sqlalchemy import select, text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
@@ -17,6 +16,9 @@ from app.config import (
     VECTOR_DIM,
 )
 from app.models import OnChainEvent
+from app.services.metrics import DB_LATENCY, EMBED_LATENCY, timed
+from app.services.provider_client import get_provider_client
+from app.services.tracing import traced
 
 
 class DataAgent:
@@ -62,6 +64,8 @@ class DataAgent:
 
 
     def _local_embed(self, text: str) -> List[float]:
+        import numpy as np
+
         digest = hashlib.sha256(text.encode("utf-8")).digest()
         seed = int.from_bytes(digest[:8], "big")
         rng = np.random.default_rng(seed)
@@ -69,18 +73,19 @@ class DataAgent:
         norm = np.linalg.norm(vec) or 1.0
         return (vec / norm).tolist()
 
+    @traced("data_agent.embed")
     def embed(self, text: str) -> List[float]:
+        with EMBED_LATENCY.labels(provider=EMBED_PROVIDER).time():
+            return self._embed(text)
+
+    def _embed(self, text: str) -> List[float]:
         if EMBED_PROVIDER == "openai":
             if not EMBED_API_KEY:
                 raise RuntimeError("EMBED_API_KEY must be set for openai embeddings")
             payload = {"model": EMBED_MODEL, "input": text}
             headers = {"Authorization": f"Bearer {EMBED_API_KEY}"}
-            response = httpx.post(
-                f"{EMBED_API_BASE}/embeddings",
-                json=payload,
-                headers=headers,
-                timeout=20,
-            )
+            client = get_provider_client("embed-openai", EMBED_API_BASE, timeout=20)
+            response = client.post("/embeddings", json=payload, headers=headers, retry=True)
             response.raise_for_status()
             embedding = response.json()["data"][0]["embedding"]
             if len(embedding) != VECTOR_DIM:
@@ -91,7 +96,8 @@ class DataAgent:
         if EMBED_PROVIDER == "ollama":
             payload = {"model": EMBED_MODEL, "prompt": text}
             try:
-                response = httpx.post(f"{OLLAMA_BASE}/api/embeddings", json=payload, timeout=30)
+                client = get_provider_client("ollama", OLLAMA_BASE, timeout=30)
+                response = client.post("/api/embeddings", json=payload, retry=True)
                 response.raise_for_status()
                 embedding = response.json()["embedding"]
                 if len(embedding) != VECTOR_DIM:
@@ -104,6 +110,7 @@ class DataAgent:
 
         return self._local_embed(text)
 
+    @traced("data_agent.ingest")
     def ingest(
         self,
         tx_hash: str,
@@ -161,6 +168,8 @@ class DataAgent:
         query_vec = self.embed(query)
         return self.search_by_vector(query_vec, top_k, chain, probes=probes)
 
+    @timed(DB_LATENCY, method="data_agent.search_by_vector")
+    @traced("data_agent.search_by_vector")
     def search_by_vector(
         self,
         query_vec: List[float],
@@ -184,6 +193,8 @@ class DataAgent:
             hits.append((event, score))
         return hits
 
+    @timed(DB_LATENCY, method="data_agent.insights")
+    @traced("data_agent.insights")
     def insights(self, limit: int = 50) -> dict:
         events = (
             self.db.execute(select(OnChainEvent).order_by(OnChainEvent.created_at.desc()).limit(limit))
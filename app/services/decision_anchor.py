@@ -0,0 +1,269 @@
+import functools
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import ANCHOR_BATCH_SIZE, ANCHOR_INTERVAL_SEC, ANCHOR_MODE, DECISION_LOG_ADDRESS
+from app.models import DecisionAnchor, Execution, MCPDecision
+from app.services.confirmation_tracker import ConfirmationTracker, confirmation_tracker
+from app.services.execution_client import ExecutionClient
+
+logger = logging.getLogger(__name__)
+
+ANCHOR_BATCH_SIGNATURE = "anchorBatch(bytes32,uint256,uint256,uint256)"
+LOG_DECISIONS_SIGNATURE = "logDecisions(string[],string[])"
+# Confirmation-tracker outcomes that mean the batch never landed; its rows go back into the pool.
+RELEASE_STATUSES = ("failed", "replaced", "dropped")
+# An anchor is "sending" from the moment it claims rows until the send returns. One still sending
+# after this long belongs to a worker that died mid-send.
+STALE_CLAIM_SEC = 300
+
+
+def _keccak(primitive: bytes | None = None, text: str | None = None) -> bytes:
+    # web3 is imported on first use so processes that never anchor do not pay for it.
+    from web3 import Web3
+
+    return bytes(Web3.keccak(primitive, text=text))
+
+
+@functools.cache
+def _selector(signature: str) -> bytes:
+    return _keccak(text=signature)[:4]
+
+
+def decision_leaf(row: MCPDecision) -> bytes:
+    body = json.dumps(
+        {
+            "id": row.id,
+            "route": row.route,
+            "status": row.status,
+            "reason": row.reason,
+            "payload": row.payload,
+            "created_at": row.created_at.isoformat(),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return _keccak(text=body)
+
+
+def _hash_pair(left: bytes, right: bytes) -> bytes:
+    low, high = sorted((left, right))
+    return _keccak(low + high)
+
+
+def merkle_root(leaves: list[bytes]) -> bytes:
+    if not leaves:
+        raise ValueError("no leaves")
+    level = leaves
+    while len(level) > 1:
+        level = [
+            _hash_pair(level[index], level[index + 1] if index + 1 < len(level) else level[index])
+            for index in range(0, len(level), 2)
+        ]
+    return level[0]
+
+
+def merkle_proof(leaves: list[bytes], index: int) -> list[bytes]:
+    """Sibling hashes from leaves[index] up to the root, matching merkle_root's odd-leaf duplication."""
+    if not 0 <= index < len(leaves):
+        raise IndexError("leaf index out of range")
+    proof = []
+    level = leaves
+    while len(level) > 1:
+        sibling = index ^ 1
+        proof.append(level[sibling] if sibling < len(level) else level[index])
+        level = [
+            _hash_pair(level[pos], level[pos + 1] if pos + 1 < len(level) else level[pos])
+            for pos in range(0, len(level), 2)
+        ]
+        index //= 2
+    return proof
+
+
+def verify_merkle_proof(leaf: bytes, proof: list[bytes], root: bytes) -> bool:
+    node = leaf
+    for sibling in proof:
+        node = _hash_pair(node, sibling)
+    return node == root
+
+
+class DecisionAnchorService:
+    def __init__(
+        self,
+        db_factory,
+        exec_client: ExecutionClient,
+        *,
+        mode: str = ANCHOR_MODE,
+        contract_address: str = DECISION_LOG_ADDRESS,
+        interval_sec: int = ANCHOR_INTERVAL_SEC,
+        batch_size: int = ANCHOR_BATCH_SIZE,
+        tracker: ConfirmationTracker = confirmation_tracker,
+    ) -> None:
+        self.db_factory = db_factory
+        self.exec_client = exec_client
+        self.tracker = tracker
+        self.mode = mode
+        self.contract_address = contract_address
+        self.interval_sec = interval_sec
+        self.batch_size = max(1, batch_size)
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="decision-anchor", daemon=True)
+        self._thread.start()
+        logger.info("Decision anchor started (mode=%s, interval=%ss)", self.mode, self.interval_sec)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        logger.info("Decision anchor stopped")
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.anchor_pending()
+            except Exception as exc:
+                logger.warning("Decision anchor error: %s", exc)
+            self._stop_event.wait(self.interval_sec)
+
+    def _call_data(self, rows: list[MCPDecision]) -> tuple[bytes, str | None]:
+        from eth_abi import encode
+
+        if self.mode == "events":
+            tags = [f"{row.route}:{row.status}" for row in rows]
+            messages = [f"{row.id}:{row.reason}" for row in rows]
+            return _selector(LOG_DECISIONS_SIGNATURE) + encode(["string[]", "string[]"], [tags, messages]), None
+        root = merkle_root([decision_leaf(row) for row in rows])
+        args = encode(["bytes32", "uint256", "uint256", "uint256"], [root, rows[0].id, rows[-1].id, len(rows)])
+        return _selector(ANCHOR_BATCH_SIGNATURE) + args, "0x" + root.hex()
+
+    @staticmethod
+    def _release(db: Session, anchor: DecisionAnchor) -> None:
+        db.execute(update(MCPDecision).where(MCPDecision.anchor_id == anchor.id).values(anchor_id=None))
+
+    def reconcile(self, db: Session) -> int:
+        """Copy confirmation-tracker outcomes onto sent anchors and release rows whose batch never landed."""
+        settled = db.execute(
+            select(DecisionAnchor, Execution.status)
+            .join(Execution, Execution.tx_hash == DecisionAnchor.tx_hash)
+            .where(
+                DecisionAnchor.status.in_(("submitted", "sending")),
+                Execution.status.in_(("confirmed",) + RELEASE_STATUSES),
+            )
+        ).all()
+        for anchor, status in settled:
+            anchor.status = status
+            if status in RELEASE_STATUSES:
+                self._release(db, anchor)
+                logger.warning("Anchor %s %s; %s decisions released for the next batch", anchor.tx_hash, status, anchor.count)
+        stale = (
+            db.execute(
+                select(DecisionAnchor)
+                .outerjoin(Execution, Execution.tx_hash == DecisionAnchor.tx_hash)
+                .where(
+                    DecisionAnchor.status == "sending",
+                    Execution.id.is_(None),
+                    DecisionAnchor.created_at < datetime.utcnow() - timedelta(seconds=STALE_CLAIM_SEC),
+                )
+            )
+            .scalars()
+            .all()
+        )
+        for anchor in stale:
+            if anchor.tx_hash:
+                # Signed and recorded, maybe sent: let the tracker find out rather than sending again.
+                self.tracker.track(anchor.tx_hash, self.exec_client.account.address, None, db)
+            else:
+                anchor.status = "abandoned"
+                self._release(db, anchor)
+                logger.warning("Anchor %s abandoned before signing; %s decisions released", anchor.id, anchor.count)
+        db.commit()
+        return len(settled) + len(stale)
+
+    def _claim(self) -> tuple[int, bytes] | None:
+        """Stamp the next batch with a new "sending" anchor and commit, so no row lock outlives this."""
+        with self.db_factory() as db:
+            self.reconcile(db)
+            # Membership is per row, so ids that commit after a later id are still picked up.
+            rows = (
+                db.execute(
+                    select(MCPDecision)
+                    .where(MCPDecision.anchor_id.is_(None))
+                    .order_by(MCPDecision.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                .scalars()
+                .all()
+            )
+            if not rows:
+                db.rollback()
+                return None
+            call_data, root = self._call_data(rows)
+            anchor = DecisionAnchor(
+                mode=self.mode,
+                root=root,
+                from_id=rows[0].id,
+                to_id=rows[-1].id,
+                count=len(rows),
+                status="sending",
+            )
+            db.add(anchor)
+            db.flush()
+            for row in rows:
+                row.anchor_id = anchor.id
+            db.commit()
+            return anchor.id, call_data
+
+    def anchor_pending(self) -> DecisionAnchor | None:
+        claim = self._claim()
+        if claim is None:
+            return None
+        anchor_id, call_data = claim
+        db: Session = self.db_factory()
+        try:
+            anchor = db.get(DecisionAnchor, anchor_id)
+            signed_nonce: list[int] = []
+
+            def record(tx_hash: str, nonce: int) -> None:
+                # Committed before the send, so a retry after a crash finds this hash instead of signing again.
+                anchor.tx_hash = tx_hash
+                signed_nonce[:] = [nonce]
+                db.commit()
+
+            result = self.exec_client.transact(self.contract_address, call_data, before_send=record)
+            if result.status == "submitted":
+                anchor.status = "submitted"
+                # track() commits the status together with the Execution row.
+                self.tracker.track(result.tx_hash, result.sender, result.nonce, db)
+                logger.info(
+                    "Anchored %s decisions (%s..%s) in %s", anchor.count, anchor.from_id, anchor.to_id, result.tx_hash
+                )
+            elif anchor.tx_hash:
+                # The send may still have reached the node; reconcile() releases the rows if it never lands.
+                self.tracker.track(anchor.tx_hash, result.sender, signed_nonce[0] if signed_nonce else None, db)
+                logger.warning("Anchor %s send failed after signing; tracking %s", anchor.id, anchor.tx_hash)
+            else:
+                # Nothing was signed or sent: keep the attempt on record and release the rows.
+                anchor.status = result.status
+                self._release(db, anchor)
+                db.commit()
+                logger.warning("Anchor of %s decisions not sent: %s", anchor.count, result.status)
+            # Loaded before close so callers can read the detached anchor.
+            db.refresh(anchor)
+            return anchor
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
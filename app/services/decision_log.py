@@ -0,0 +1,288 @@
+import fcntl
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import (
+    DECISION_LOG_BATCH_SIZE,
+    DECISION_LOG_FLUSH_MS,
+    DECISION_LOG_MODE,
+    DECISION_LOG_QUEUE_SIZE,
+    DECISION_LOG_RETRY_SEC,
+    DECISION_LOG_WAL_PATH,
+)
+from app.models import MCPDecision
+
+logger = logging.getLogger(__name__)
+
+
+class DecisionLogWriter:
+    def __init__(
+        self,
+        mode: str = DECISION_LOG_MODE,
+        batch_size: int = DECISION_LOG_BATCH_SIZE,
+        flush_interval_sec: float = DECISION_LOG_FLUSH_MS / 1000,
+        max_queue: int = DECISION_LOG_QUEUE_SIZE,
+        wal_path: str = DECISION_LOG_WAL_PATH,
+        retry_interval_sec: float = DECISION_LOG_RETRY_SEC,
+    ) -> None:
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_sec = flush_interval_sec
+        self.max_queue = max_queue
+        self.retry_interval_sec = retry_interval_sec
+        # Every process appends to its own segment; wal_prefix is shared so startup can find orphans.
+        self.wal_prefix = wal_path
+        self.wal_path = f"{wal_path}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        self.session_factory = None
+        self._queue: queue.Queue[dict] = queue.Queue(maxsize=max_queue)
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._wal_lock = threading.Lock()
+        self._wal_handle = None
+        # entry_id -> WAL line for rows not yet committed; the file is rewritten from this.
+        self._wal_pending: dict[str, str] = {}
+        self._wal_lines = 0
+        # Rows whose flush failed, retried by the writer thread every retry_interval_sec.
+        self._failed: list[dict] = []
+        self._next_retry = 0.0
+        self._replay_due = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self, session_factory) -> None:
+        self.session_factory = session_factory
+        if self.mode == "sync" or self.running:
+            return
+        if self.mode == "wal":
+            self._open_wal()
+            self._replay_due = True
+            self._retry_replay()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="decision-log-writer", daemon=True)
+        self._thread.start()
+        logger.info("Decision log writer started (mode=%s, batch=%s)", self.mode, self.batch_size)
+
+    def stop(self, timeout: float = 10) -> None:
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning("Decision log writer did not drain in %ss (%s pending)", timeout, self._queue.qsize())
+        self._thread = None
+        if self._wal_handle is not None:
+            with self._wal_lock:
+                pending = len(self._wal_pending)
+                self._wal_handle.close()
+                self._wal_handle = None
+                if not pending:
+                    os.remove(self.wal_path)
+        logger.info("Decision log writer stopped")
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, route: str, status: str, reason: str, payload: dict, db: Session | None = None) -> None:
+        row = {
+            "entry_id": uuid.uuid4().hex,
+            "route": route,
+            "status": status,
+            "reason": reason,
+            "payload": json.dumps(payload),
+            "created_at": datetime.utcnow(),
+        }
+        if self.mode == "sync" or not self.running:
+            self._write_sync(row, db)
+            return
+        if self.mode == "wal":
+            self._append_wal(row)
+        try:
+            self._queue.put(row, timeout=0.05)
+        except queue.Full:
+            logger.warning("Decision log queue full; writing synchronously")
+            self._write_sync(row, db)
+            if self.mode == "wal":
+                self._mark_committed([row])
+
+    def _write_sync(self, row: dict, db: Session | None) -> None:
+        if db is not None:
+            db.add(MCPDecision(**row))
+            db.commit()
+            return
+        self._insert([row])
+
+    def _insert(self, rows: list[dict]) -> None:
+        # entry_id makes replays idempotent: rows that committed before a crash are skipped.
+        with self.session_factory() as db:
+            db.execute(insert(MCPDecision).on_conflict_do_nothing(index_elements=["entry_id"]), rows)
+            db.commit()
+
+    def _next_batch(self) -> list[dict]:
+        batch: list[dict] = []
+        deadline = time.monotonic() + self.flush_interval_sec
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+            if time.monotonic() >= self._next_retry:
+                self._retry_failed()
+                self._retry_replay()
+        # One last attempt on shutdown; in wal mode anything still failing stays in the segment.
+        self._retry_failed()
+        if self._failed and self.mode != "wal":
+            logger.error("Dropping %s decision log rows at shutdown; the database is unreachable", len(self._failed))
+
+    def _flush(self, batch: list[dict], attempts: int = 3) -> bool:
+        for attempt in range(attempts):
+            try:
+                self._insert(batch)
+            except Exception as exc:
+                logger.warning("Decision log flush failed (attempt %s, %s rows): %s", attempt + 1, len(batch), exc)
+                time.sleep(0.1 * (2**attempt))
+                continue
+            if self.mode == "wal":
+                self._mark_committed(batch)
+            return True
+        self._hold(batch)
+        return False
+
+    def _hold(self, rows: list[dict]) -> None:
+        """Keep a failed batch for the periodic retry instead of dropping it."""
+        self._failed.extend(rows)
+        overflow = len(self._failed) - self.max_queue
+        if overflow > 0:
+            # Bounded like the queue. In wal mode the dropped rows are still in the segment and replay later.
+            logger.error("Decision log retry buffer full; dropping %s oldest rows from memory", overflow)
+            del self._failed[:overflow]
+        self._next_retry = time.monotonic() + self.retry_interval_sec
+        if self.mode == "wal":
+            self._compact_wal()
+        logger.error("Decision log flush failed; %s rows held for retry", len(self._failed))
+
+    def _retry_failed(self) -> None:
+        if not self._failed:
+            return
+        rows, self._failed = self._failed, []
+        for start in range(0, len(rows), self.batch_size):
+            if not self._flush(rows[start : start + self.batch_size], attempts=1):
+                # Keep the rest in order behind the batch that just failed again.
+                rest = rows[start + self.batch_size :]
+                if rest:
+                    self._hold(rest)
+                return
+        logger.info("Decision log retry committed %s rows", len(rows))
+
+    def _retry_replay(self) -> None:
+        """Replay orphaned WAL segments; a database outage must not stop startup, so failures retry later."""
+        if not self._replay_due:
+            return
+        try:
+            self._replay_wal()
+        except Exception as exc:
+            logger.error("Decision log WAL replay failed; retrying in %ss: %s", self.retry_interval_sec, exc)
+            self._replay_due = True
+            self._next_retry = time.monotonic() + self.retry_interval_sec
+            return
+        self._replay_due = False
+
+    def _open_wal(self) -> None:
+        handle = open(self.wal_path, "a", encoding="utf-8")
+        # Held for the process lifetime; a segment whose lock can be taken belongs to a dead process.
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._wal_handle = handle
+
+    def _append_wal(self, row: dict) -> None:
+        line = json.dumps({**row, "created_at": row["created_at"].isoformat()})
+        with self._wal_lock:
+            self._wal_handle.write(line + "\n")
+            self._wal_handle.flush()
+            os.fsync(self._wal_handle.fileno())
+            self._wal_pending[row["entry_id"]] = line
+            self._wal_lines += 1
+
+    def _mark_committed(self, rows: list[dict]) -> None:
+        with self._wal_lock:
+            for row in rows:
+                self._wal_pending.pop(row["entry_id"], None)
+        self._compact_wal()
+
+    def _compact_wal(self) -> None:
+        """Rewrite the segment to just the uncommitted rows once it has grown past them."""
+        with self._wal_lock:
+            if self._wal_handle is None:
+                return
+            if self._wal_pending and self._wal_lines < 2 * len(self._wal_pending) + self.batch_size:
+                return
+            self._wal_handle.seek(0)
+            self._wal_handle.truncate()
+            for line in self._wal_pending.values():
+                self._wal_handle.write(line + "\n")
+            self._wal_handle.flush()
+            os.fsync(self._wal_handle.fileno())
+            self._wal_lines = len(self._wal_pending)
+
+    def _claim_orphans(self) -> list:
+        handles = []
+        for path in sorted(glob.glob(f"{glob.escape(self.wal_prefix)}*")):
+            if path == self.wal_path:
+                continue
+            try:
+                handle = open(path, "r+", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Owned by a live worker.
+                handle.close()
+                continue
+            handles.append(handle)
+        return handles
+
+    def _replay_wal(self) -> None:
+        for handle in self._claim_orphans():
+            rows = []
+            with handle:
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        logger.warning("Skipping corrupt decision log WAL line in %s", handle.name)
+                        continue
+                    row["created_at"] = datetime.fromisoformat(row["created_at"])
+                    row.setdefault("entry_id", None)
+                    rows.append(row)
+                for start in range(0, len(rows), self.batch_size):
+                    self._insert(rows[start : start + self.batch_size])
+                os.remove(handle.name)
+            if rows:
+                logger.info("Replayed %s decision log rows from %s", len(rows), handle.name)
+
+
+decision_log = DecisionLogWriter()
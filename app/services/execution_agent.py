@@ -1,5 +1,21 @@
 import hashlib
 from dataclasses import dataclass
+from typing import Sequence
+
+from app.services.pretrade_state import PreTradeState
+
+DEFAULT_DEADLINE_SEC = 120
+BASE_GAS = {"swap": 120_000, "approve": 55_000}
+DEFAULT_BASE_GAS = 80_000
+POLICY_CHECKS = ["slippage-within-bounds", "size-within-policy"]
+# Emitted when no chain state was read, so a plan never claims a check that did not run.
+UNVERIFIED_CHECKS = ["nonce-unverified", "balance-unverified", "allowance-unverified"]
+
+
+def gas_cost_wei(gas_limit: int, fees: dict[str, int] | None) -> int | None:
+    if not fees:
+        return None
+    return gas_limit * int(fees.get("maxFeePerGas") or fees.get("gasPrice") or 0)
 
 
 @dataclass
@@ -11,31 +27,49 @@ class ExecutionPlan:
     deadline_sec: int
     safety_checks: list[str]
     status: str
+    gas_source: str = "table"
+    fees: dict[str, int] | None = None
 
 
 class ExecutionAgent:
-    def build_plan(self, strategy_id: str, asset: str, action: str, size: float) -> ExecutionPlan:
+    def _plan_id(self, strategy_id: str, asset: str, action: str, size: float) -> str:
+        seed = f"{strategy_id}:{asset}:{action}:{size}".encode("utf-8")
+        return hashlib.sha256(seed).hexdigest()[:12]
+
+    def build_plan(
+        self,
+        strategy_id: str,
+        asset: str,
+        action: str,
+        size: float,
+        *,
+        state: PreTradeState | None = None,
+        value_wei: int = 0,
+        token_amount: int | None = None,
+        gas_estimate: int | None = None,
+        fee_strategies: dict[str, dict[str, int]] | None = None,
+        require_state: bool = False,
+    ) -> ExecutionPlan:
+        """require_state blocks the plan when no pre-trade state was read (live execution)."""
         if size <= 0:
             raise ValueError("size must be positive")
-        seed = f"{strategy_id}:{asset}:{action}:{size}".encode("utf-8")
-        plan_id = hashlib.sha256(seed).hexdigest()[:12]
-        action_lower = action.lower()
-        if action_lower == "swap":
-            base_gas = 120_000
-        elif action_lower == "approve":
-            base_gas = 55_000
+        plan_id = self._plan_id(strategy_id, asset, action, size)
+        base_gas = BASE_GAS.get(action.lower(), DEFAULT_BASE_GAS)
+        if gas_estimate is not None:
+            estimated_gas = gas_estimate
         else:
-            base_gas = 80_000
-        estimated_gas = int(base_gas * (1 + min(size, 50) / 100))
+            estimated_gas = int(base_gas * (1 + min(size, 50) / 100))
         slippage_bps = 20 if size < 5 else 35 if size < 20 else 60
         gas_strategy = "economy" if size < 10 else "fast"
-        deadline_sec = 120
-        safety_checks = [
-            "nonce-free",
-            "allowance-verified",
-            "slippage-within-bounds",
-            "size-within-policy",
-        ]
+        fees = fee_strategies.get(gas_strategy) if fee_strategies else None
+        deadline_sec = DEFAULT_DEADLINE_SEC
+        if state is None:
+            safety_checks = UNVERIFIED_CHECKS + POLICY_CHECKS
+        else:
+            gas_cost = gas_cost_wei(estimated_gas, fees)
+            safety_checks = state.safety_checks(value_wei, token_amount, gas_cost) + POLICY_CHECKS
+        blocked = any(check.startswith("insufficient-") for check in safety_checks)
+        status = "blocked" if blocked or (require_state and state is None) else "ready"
         return ExecutionPlan(
             plan_id=plan_id,
             estimated_gas=estimated_gas,
@@ -43,5 +77,36 @@ class ExecutionAgent:
             gas_strategy=gas_strategy,
             deadline_sec=deadline_sec,
             safety_checks=safety_checks,
-            status="ready",
+            status=status,
+            gas_source="estimate" if gas_estimate is not None else "table",
+            fees=fees,
         )
+
+    def build_plans(self, legs: Sequence[tuple[str, str, str, float]]) -> list[ExecutionPlan]:
+        if not legs:
+            return []
+        import numpy as np
+
+        sizes = np.fromiter((leg[3] for leg in legs), dtype=np.float64, count=len(legs))
+        if (sizes <= 0).any():
+            raise ValueError("size must be positive")
+        base_gas = np.fromiter(
+            (BASE_GAS.get(leg[2].lower(), DEFAULT_BASE_GAS) for leg in legs), dtype=np.float64, count=len(legs)
+        )
+        estimated_gas = (base_gas * (1 + np.minimum(sizes, 50) / 100)).astype(np.int64)
+        slippage_bps = np.select([sizes < 5, sizes < 20], [20, 35], default=60)
+        fast = sizes >= 10
+        return [
+            ExecutionPlan(
+                plan_id=self._plan_id(strategy_id, asset, action, size),
+                estimated_gas=int(gas),
+                slippage_bps=int(slippage),
+                gas_strategy="fast" if is_fast else "economy",
+                deadline_sec=DEFAULT_DEADLINE_SEC,
+                safety_checks=UNVERIFIED_CHECKS + POLICY_CHECKS,
+                status="ready",
+            )
+            for (strategy_id, asset, action, size), gas, slippage, is_fast in zip(
+                legs, estimated_gas.tolist(), slippage_bps.tolist(), fast.tolist()
+            )
+        ]
@@ -1,34 +1,191 @@
+import logging
+import time
 from dataclasses import dataclass
+from typing import Callable
 
-from web3 import Web3
+import httpx
 
 from app.config import EXECUTE_LIVE, PRIVATE_KEY, RPC_URL
+from app.services.chain_state import GasPriceCache, NonceManager
+from app.services.gas_engine import GasEngine
+from app.services.metrics import PROVIDER_LATENCY, PROVIDER_REQUESTS
+from app.services.pretrade_state import PreTradeReader, PreTradeState
+from app.services.simulator import SimulationResult, TxSimulator
+from app.services.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 ZERO_ADDRESS = "0x" + "0" * 40
 
 
+def rpc_errors() -> tuple[type[Exception], ...]:
+    """Everything a failed node round trip can raise: httpx for the batched readers, requests and
+    web3 (TimeExhausted, ContractLogicError, ...) for calls made through Web3."""
+    import requests
+    from web3.exceptions import Web3Exception
+
+    return (httpx.HTTPError, requests.RequestException, Web3Exception, RuntimeError, ValueError)
+
+
+def rpc_metrics_middleware(make_request, web3):
+    """Records web3's own calls (nonces, gas, chain id, sends) in the histogram the rpc ProviderClient uses."""
+    latency = PROVIDER_LATENCY.labels(provider="rpc")
+
+    def middleware(method, params):
+        start = time.perf_counter()
+        try:
+            response = make_request(method, params)
+        except Exception:
+            PROVIDER_REQUESTS.labels(provider="rpc", outcome="transport-error").inc()
+            raise
+        finally:
+            latency.observe(time.perf_counter() - start)
+        PROVIDER_REQUESTS.labels(provider="rpc", outcome="rpc-error" if "error" in response else "2xx").inc()
+        return response
+
+    return middleware
+
+
+def _not_delivered(exc: Exception) -> bool:
+    """True when a failed send_raw_transaction certainly left no transaction at the node."""
+    import requests
+
+    if isinstance(exc, ValueError):
+        # web3 raises ValueError for a JSON-RPC error: the node answered and refused the transaction.
+        return True
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.ConnectionError) and not isinstance(exc, requests.ReadTimeout):
+        return "NewConnectionError" in repr(exc.args) or "Failed to establish" in str(exc)
+    return False
+
+
 @dataclass
 class ExecutionResult:
     tx_hash: str
     status: str
+    sender: str = ""
+    nonce: int | None = None
 
 
 class ExecutionClient:
     def __init__(self) -> None:
-        self.web3 = Web3(Web3.HTTPProvider(RPC_URL)) if RPC_URL else None
+        self.web3 = None
+        if RPC_URL:
+            # Imported here so tools and workers without RPC credentials never load web3.
+            from web3 import Web3
+
+            self.web3 = Web3(Web3.HTTPProvider(RPC_URL))
+            # Covers every Web3 call made through this client, including the nonce manager and gas engine.
+            self.web3.middleware_onion.add(rpc_metrics_middleware, "rpc_metrics")
+        self._chain_id: int | None = None
+        self.account = self.web3.eth.account.from_key(PRIVATE_KEY) if self.web3 and PRIVATE_KEY else None
+        self.nonces = NonceManager(self.web3, self.account.address) if self.account else None
+        self.gas_price = GasPriceCache(self.web3) if self.web3 else None
+        self.state_reader = PreTradeReader(RPC_URL) if self.web3 else None
+        self.gas = GasEngine(self.web3) if self.web3 else None
+        self.simulator = TxSimulator(RPC_URL) if self.web3 else None
+
+    @property
+    def chain_id(self) -> int:
+        if self._chain_id is None:
+            self._chain_id = self.web3.eth.chain_id
+        return self._chain_id
+
+    def warm(self) -> None:
+        if self.web3:
+            self.chain_id
+            self.gas_price.start()
+
+    def close(self) -> None:
+        if self.gas_price:
+            self.gas_price.stop()
 
     def _normalize_address(self, to_address: str) -> str | None:
         if not to_address:
             return None
         if to_address.lower() == ZERO_ADDRESS:
             return None
+        from web3 import Web3
+
         if not Web3.is_address(to_address):
             return None
         return Web3.to_checksum_address(to_address)
 
-    def submit(self, to_address: str, data: bytes, value_wei: int = 0) -> ExecutionResult:
+    @traced("execution_client.read_state")
+    def read_state(self, token: str | None = None, spender: str | None = None) -> PreTradeState | None:
+        if not self.account:
+            return None
+        token = self._normalize_address(token) if token else None
+        spender = self._normalize_address(spender) if spender else None
+        return self.state_reader.read(self.account.address, token=token, spender=spender)
+
+    @traced("execution_client.estimate")
+    def estimate(
+        self, to_address: str | None, data: bytes, value_wei: int = 0
+    ) -> tuple[int | None, dict[str, dict[str, int]] | None]:
+        if not self.account:
+            return None, None
+        normalized = self._normalize_address(to_address or "")
+        if not normalized:
+            return None, self.gas.strategies()
+        txn = {"from": self.account.address, "to": normalized, "value": value_wei, "data": data}
+        return self.gas.estimate(txn), self.gas.strategies()
+
+    @traced("execution_client.simulate")
+    def simulate(
+        self,
+        to_address: str,
+        data: bytes,
+        value_wei: int = 0,
+        *,
+        gas: int | None = None,
+        fees: dict[str, int] | None = None,
+        block: int | None = None,
+    ) -> SimulationResult | None:
+        if not self.account:
+            return None
+        normalized = self._normalize_address(to_address)
+        if not normalized:
+            return None
+        txn = {
+            "from": self.account.address,
+            "to": normalized,
+            "value": value_wei,
+            "data": data,
+        }
+        if gas is not None:
+            # Without a limit eth_call runs under the node's gas cap, which is what estimation uses too.
+            txn["gas"] = gas
+        txn.update(fees or {"gasPrice": self.gas_price.value})
+        return self.simulator.simulate(txn, block=block)
+
+    def submit(
+        self,
+        to_address: str,
+        data: bytes,
+        value_wei: int = 0,
+        *,
+        gas: int | None = None,
+        fees: dict[str, int] | None = None,
+    ) -> ExecutionResult:
         if not EXECUTE_LIVE:
             return ExecutionResult(tx_hash="", status="dry-run")
+        return self.transact(to_address, data, value_wei, gas=gas, fees=fees)
+
+    @traced("execution_client.transact")
+    def transact(
+        self,
+        to_address: str,
+        data: bytes,
+        value_wei: int = 0,
+        *,
+        gas: int | None = None,
+        fees: dict[str, int] | None = None,
+        before_send: Callable[[str, int], None] | None = None,
+    ) -> ExecutionResult:
+        """Sign and send. before_send(tx_hash, nonce) runs between signing and sending, so a caller
+        can persist the hash first and recognise the transaction after a crash."""
         if not self.web3 or not PRIVATE_KEY:
             return ExecutionResult(tx_hash="", status="missing-credentials")
         normalized = self._normalize_address(to_address)
@@ -37,17 +194,50 @@ class ExecutionClient:
         if not data and value_wei == 0:
             return ExecutionResult(tx_hash="", status="missing-call-data")
 
-        account = self.web3.eth.account.from_key(PRIVATE_KEY)
-        nonce = self.web3.eth.get_transaction_count(account.address)
+        if gas is None:
+            # No fixed fallback limit: a transaction whose gas cannot be estimated is not sent.
+            try:
+                gas = self.gas.estimate(
+                    {"from": self.account.address, "to": normalized, "value": value_wei, "data": data}
+                )
+            except Exception as exc:
+                logger.warning("Gas estimation failed for %s: %s", normalized, exc)
+                return ExecutionResult(tx_hash="", status="gas-estimate-failed")
         txn = {
             "to": normalized,
             "value": value_wei,
             "data": data,
-            "nonce": nonce,
-            "gas": 200000,
-            "gasPrice": self.web3.eth.gas_price,
-            "chainId": self.web3.eth.chain_id,
+            "gas": gas,
+            "chainId": self.chain_id,
         }
-        signed = account.sign_transaction(txn)
-        tx_hash = self.web3.eth.send_raw_transaction(signed.rawTransaction)
-        return ExecutionResult(tx_hash=tx_hash.hex(), status="submitted")
+        txn.update(fees or {"gasPrice": self.gas_price.value})
+        try:
+            try:
+                tx_hash, nonce = self._sign_and_send(txn, before_send)
+            except ValueError as exc:
+                if "nonce too low" not in str(exc).lower():
+                    raise
+                logger.info("Nonce too low for %s; resyncing", self.account.address)
+                self.nonces.resync()
+                tx_hash, nonce = self._sign_and_send(txn, before_send)
+        except Exception as exc:
+            logger.warning("Sending transaction to %s failed: %s", normalized, exc)
+            return ExecutionResult(tx_hash="", status="send-failed", sender=self.account.address)
+        return ExecutionResult(tx_hash=tx_hash.hex(), status="submitted", sender=self.account.address, nonce=nonce)
+
+    def _sign_and_send(self, txn: dict, before_send: Callable[[str, int], None] | None = None):
+        nonce = self.nonces.next()
+        sending = False
+        try:
+            signed = self.account.sign_transaction({**txn, "nonce": nonce})
+            if before_send is not None:
+                before_send(signed.hash.hex(), nonce)
+            sending = True
+            return self.web3.eth.send_raw_transaction(signed.rawTransaction), nonce
+        except BaseException as exc:
+            # Every failure gives the nonce back or queues it for a check, so no gap outlives it.
+            if not sending or (isinstance(exc, Exception) and _not_delivered(exc)):
+                self.nonces.release(nonce)
+            else:
+                self.nonces.mark_uncertain(nonce)
+            raise
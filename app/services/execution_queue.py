@@ -0,0 +1,206 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.config import EXECUTION_QUEUE_MAX, EXECUTION_QUEUE_WORKERS
+from app.schemas import TradeIntent
+from app.services.execution_agent import DEFAULT_DEADLINE_SEC
+
+logger = logging.getLogger(__name__)
+
+FINISHED_TICKETS_KEPT = 10_000
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+@dataclass
+class ExecutionTicket:
+    trade: TradeIntent
+    user_id: str
+    lane: str
+    payload: dict = field(default_factory=dict)
+    priority: int = 0
+    deadline: float = 0.0
+    ticket_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    status: str = "queued"
+    detail: str = ""
+    result: dict[str, Any] | None = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: float | None = None
+    finished_at: float | None = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+    def finish(self, status: str, detail: str = "") -> None:
+        self.status = status
+        self.detail = detail
+        self.finished_at = time.monotonic()
+        self.done.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the ticket ran, expired or was cancelled."""
+        return self.done.wait(timeout)
+
+
+class ExecutionQueue:
+    def __init__(self, workers: int = EXECUTION_QUEUE_WORKERS, max_size: int = EXECUTION_QUEUE_MAX) -> None:
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        # One heap per lane plus a heap of lanes whose head can run now, so a worker
+        # never has to scan tickets parked behind a busy lane.
+        self._lanes: dict[str, list[tuple[int, float, int, ExecutionTicket]]] = {}
+        self._ready: list[tuple[int, float, int, str]] = []
+        self._size = 0
+        self._seq = itertools.count()
+        self._busy_lanes: set[str] = set()
+        self._tickets: OrderedDict[str, ExecutionTicket] = OrderedDict()
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._handler: Callable[[ExecutionTicket], dict[str, Any]] | None = None
+
+    def start(self, handler: Callable[[ExecutionTicket], dict[str, Any]]) -> None:
+        if self._threads:
+            return
+        self._handler = handler
+        self._stop_event.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"execution-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Execution queue started (workers=%s)", self.workers)
+
+    def stop(self, timeout: float = 5) -> None:
+        """Stop taking tickets, let running ones finish, and cancel everything still queued so no
+        caller waits on a ticket that will never run."""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        with self._cond:
+            cancelled = [item[-1] for heap in self._lanes.values() for item in heap]
+            self._lanes.clear()
+            self._ready.clear()
+            self._size = 0
+        for ticket in cancelled:
+            ticket.finish("cancelled", "queue-stopped")
+        logger.info("Execution queue stopped (%s queued tickets cancelled)", len(cancelled))
+
+    def depth(self) -> int:
+        with self._cond:
+            return self._size
+
+    def submit(
+        self,
+        trade: TradeIntent,
+        user_id: str,
+        *,
+        lane: str,
+        payload: dict | None = None,
+        priority: int = 0,
+        deadline_sec: int | None = None,
+    ) -> ExecutionTicket:
+        deadline = time.monotonic() + (deadline_sec or DEFAULT_DEADLINE_SEC)
+        ticket = ExecutionTicket(
+            trade=trade,
+            user_id=user_id,
+            lane=lane,
+            payload=payload or {},
+            priority=priority,
+            deadline=deadline,
+        )
+        with self._cond:
+            if self._stop_event.is_set():
+                raise QueueFullError("execution-queue-stopped")
+            if self._size >= self.max_size:
+                raise QueueFullError("execution-queue-full")
+            item = (-priority, deadline, next(self._seq), ticket)
+            heap = self._lanes.setdefault(lane, [])
+            heapq.heappush(heap, item)
+            self._size += 1
+            self._remember(ticket)
+            if lane not in self._busy_lanes and heap[0] is item:
+                self._mark_ready(lane)
+        return ticket
+
+    def get(self, ticket_id: str) -> ExecutionTicket | None:
+        with self._cond:
+            return self._tickets.get(ticket_id)
+
+    def _remember(self, ticket: ExecutionTicket) -> None:
+        self._tickets[ticket.ticket_id] = ticket
+        while len(self._tickets) > FINISHED_TICKETS_KEPT:
+            oldest_id, oldest = next(iter(self._tickets.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            del self._tickets[oldest_id]
+
+    def _mark_ready(self, lane: str) -> None:
+        # Caller holds the lock. Entries go stale when a better ticket lands in the lane;
+        # _take skips those instead of searching the heap for them.
+        priority, deadline, seq, _ = self._lanes[lane][0]
+        heapq.heappush(self._ready, (priority, deadline, seq, lane))
+        self._cond.notify()
+
+    def _take(self, now: float) -> ExecutionTicket | None:
+        while self._ready:
+            *key, lane = heapq.heappop(self._ready)
+            heap = self._lanes.get(lane)
+            if lane in self._busy_lanes or not heap or list(heap[0][:3]) != key:
+                continue
+            ticket = heapq.heappop(heap)[-1]
+            self._size -= 1
+            if not heap:
+                del self._lanes[lane]
+            if ticket.deadline < now:
+                ticket.finish("expired", "deadline-passed")
+                if heap:
+                    self._mark_ready(lane)
+                continue
+            return ticket
+        return None
+
+    def _next(self) -> ExecutionTicket | None:
+        with self._cond:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                chosen = self._take(now)
+                if chosen:
+                    self._busy_lanes.add(chosen.lane)
+                    chosen.status = "running"
+                    chosen.started_at = now
+                    return chosen
+                self._cond.wait()
+        return None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            ticket = self._next()
+            if ticket is None:
+                return
+            status, detail = "failed", ""
+            try:
+                result = self._handler(ticket)
+                ticket.result = result
+                status, detail = result.get("status", "unknown"), result.get("detail", "")
+            except Exception as exc:
+                logger.warning("Execution ticket %s failed: %s", ticket.ticket_id, exc)
+                detail = str(exc)
+            finally:
+                ticket.finish(status, detail)
+                with self._cond:
+                    self._busy_lanes.discard(ticket.lane)
+                    if self._lanes.get(ticket.lane):
+                        self._mark_ready(ticket.lane)
+
+
+execution_queue = ExecutionQueue()
@@ -0,0 +1,46 @@
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from app.config import FEE_HISTORY_BLOCKS, FEE_HISTORY_TTL_SEC, GAS_SAFETY_MARGIN
+
+if TYPE_CHECKING:
+    from web3 import Web3
+
+REWARD_PERCENTILES = [25, 75]
+
+
+class GasEngine:
+    def __init__(self, web3: "Web3") -> None:
+        self.web3 = web3
+        self._strategies: dict[str, dict[str, int]] | None = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def estimate(self, txn: dict) -> int:
+        estimate = self.web3.eth.estimate_gas(txn)
+        return int(estimate * (1 + GAS_SAFETY_MARGIN))
+
+    def strategies(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            if self._strategies is None or time.monotonic() - self._fetched_at > FEE_HISTORY_TTL_SEC:
+                self._strategies = self._from_fee_history()
+                self._fetched_at = time.monotonic()
+            return self._strategies
+
+    def _from_fee_history(self) -> dict[str, dict[str, int]]:
+        history = self.web3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", REWARD_PERCENTILES)
+        base_fee = int(history["baseFeePerGas"][-1])
+        rewards = [row for row in history.get("reward") or [] if row]
+        if not base_fee and not any(any(row) for row in rewards):
+            gas_price = int(self.web3.eth.gas_price)
+            return {"economy": {"gasPrice": gas_price}, "fast": {"gasPrice": gas_price}}
+        strategies = {}
+        for index, name in enumerate(("economy", "fast")):
+            tips = sorted(int(row[index]) for row in rewards) or [0]
+            priority = tips[len(tips) // 2]
+            strategies[name] = {
+                "maxPriorityFeePerGas": priority,
+                "maxFeePerGas": 2 * base_fee + priority,
+            }
+        return strategies
@@ -5,7 +5,8 @@ import time
 from sqlalchemy.orm import Session
 
 from app.config import INGEST_INTERVAL_SEC, INGEST_WALLET
-from app.services.mcp_orchestrator import MCPOrchestrator
+from app.services.container import get_services
+from app.services.metrics import SCHEDULER_LAG
 
 logger = logging.getLogger(__name__)
 
@@ -31,9 +32,18 @@ class IngestScheduler:
         logger.info("Ingest scheduler stopped")
 
     def _run(self) -> None:
+        lag = SCHEDULER_LAG.labels(scheduler="ingest")
+        due = time.monotonic()
         while not self._stop_event.is_set():
+            lag.observe(max(0.0, time.monotonic() - due))
             self._tick()
-            self._stop_event.wait(self.interval_sec)
+            # Fixed schedule: a slow tick shows up as lag on the next one instead of shifting the grid.
+            due += self.interval_sec
+            behind = time.monotonic() - due
+            if behind > self.interval_sec:
+                # Whole intervals overrun are skipped rather than fired back to back.
+                due += (behind // self.interval_sec) * self.interval_sec
+            self._stop_event.wait(max(0.0, due - time.monotonic()))
 
     def _tick(self) -> None:
         if not INGEST_WALLET:
@@ -41,7 +51,7 @@ class IngestScheduler:
             return
         db: Session = self.db_factory()
         try:
-            orchestrator = MCPOrchestrator(db)
+            orchestrator = get_services().orchestrator(db)
             result = orchestrator.ingest_wallet(INGEST_WALLET)
             logger.info("Ingested %s events for %s", result.get("count"), INGEST_WALLET)
         except Exception as exc:
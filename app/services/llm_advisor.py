@@ -1,32 +1,67 @@
+import json
+import time
+from typing import Iterator
+
 import httpx
 
 from app.config import LLM_API_BASE, LLM_API_KEY, LLM_MODEL, LLM_PROVIDER, OLLAMA_BASE
 from app.schemas import RiskProfile
+from app.services.metrics import LLM_LATENCY
+from app.services.tracing import traced
+from app.services.provider_client import get_provider_client
+
+HEURISTIC_RECOMMENDATION = "Use a conservative, diversified basket with strict stop-loss rules."
 
 
 class LLMAdvisor:
-    def recommend(
+    _ollama_chat_missing = False
+
+    def _openai(self):
+        return get_provider_client("llm-openai", LLM_API_BASE, timeout=20)
+
+    def _ollama(self):
+        return get_provider_client("ollama", OLLAMA_BASE, timeout=30)
+
+    def _enabled(self) -> bool:
+        return not (LLM_PROVIDER == "none" or (LLM_PROVIDER == "openai" and not LLM_API_KEY))
+
+    def _prompt(
         self,
         profile: RiskProfile,
         objective: str,
         signals: list[str],
         risk_score: float,
         allocation: dict,
-        user_context: str | None = None,
-    ) -> tuple[str, str]:
-        if LLM_PROVIDER == "none" or (LLM_PROVIDER == "openai" and not LLM_API_KEY):
-            recommendation = "Use a conservative, diversified basket with strict stop-loss rules."
-            rationale = f"Heuristic mode; signals: {', '.join(signals[:3])}."
-            return recommendation, rationale
-
+        user_context: str | None,
+    ) -> str:
         context_line = f"User context: {user_context}.\n" if user_context else ""
-        prompt = (
+        return (
             "You are an investment advisor. Return a concise recommendation and rationale.\n"
             f"Risk tolerance: {profile.risk_tolerance}. Horizon: {profile.horizon_days} days. "
             f"Max drawdown: {profile.max_drawdown}. Objective: {objective}.\n"
             f"{context_line}"
             f"Signals: {', '.join(signals)}. Risk score: {risk_score}. Allocation hint: {allocation}."
         )
+
+    @traced("llm_advisor.recommend")
+    def recommend(
+        self,
+        profile: RiskProfile,
+        objective: str,
+        signals: list[str],
+        risk_score: float,
+        allocation: dict,
+        user_context: str | None = None,
+    ) -> tuple[str, str]:
+        if not self._enabled():
+            rationale = f"Heuristic mode; signals: {', '.join(signals[:3])}."
+            return HEURISTIC_RECOMMENDATION, rationale
+
+        prompt = self._prompt(profile, objective, signals, risk_score, allocation, user_context)
+        with LLM_LATENCY.labels(provider=LLM_PROVIDER, mode="complete").time():
+            return self._complete(prompt, signals)
+
+    def _complete(self, prompt: str, signals: list[str]) -> tuple[str, str]:
         if LLM_PROVIDER == "openai":
             payload = {
                 "model": LLM_MODEL,
@@ -34,22 +69,32 @@ class LLMAdvisor:
                 "temperature": 0.2,
             }
             headers = {"Authorization": f"Bearer {LLM_API_KEY}"}
-            response = httpx.post(f"{LLM_API_BASE}/chat/completions", json=payload, headers=headers, timeout=20)
-            response.raise_for_status()
+            try:
+                response = self._openai().post("/chat/completions", json=payload, headers=headers)
+                response.raise_for_status()
+            except httpx.HTTPError:
+                rationale = f"Heuristic fallback; signals: {', '.join(signals[:3])}."
+                return HEURISTIC_RECOMMENDATION, rationale
             message = response.json()["choices"][0]["message"]["content"]
             return message.strip(), "LLM-generated rationale"
 
         if LLM_PROVIDER == "ollama":
             try:
-                payload = {
-                    "model": LLM_MODEL,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "stream": False,
-                }
-                response = httpx.post(f"{OLLAMA_BASE}/api/chat", json=payload, timeout=30)
-                if response.status_code == 404:
+                client = self._ollama()
+                response = None
+                if not LLMAdvisor._ollama_chat_missing:
+                    payload = {
+                        "model": LLM_MODEL,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "stream": False,
+                    }
+                    response = client.post("/api/chat", json=payload)
+                    if response.status_code == 404:
+                        LLMAdvisor._ollama_chat_missing = True
+                        response = None
+                if response is None:
                     payload = {"model": LLM_MODEL, "prompt": prompt, "stream": False}
-                    response = httpx.post(f"{OLLAMA_BASE}/api/generate", json=payload, timeout=30)
+                    response = client.post("/api/generate", json=payload)
                 response.raise_for_status()
                 if "message" in response.json():
                     message = response.json().get("message", {}).get("content", "")
@@ -57,8 +102,87 @@ class LLMAdvisor:
                     message = response.json().get("response", "")
                 return message.strip(), "LLM-generated rationale"
             except httpx.HTTPError:
-                recommendation = "Use a conservative, diversified basket with strict stop-loss rules."
                 rationale = f"Heuristic fallback; signals: {', '.join(signals[:3])}."
-                return recommendation, rationale
+                return HEURISTIC_RECOMMENDATION, rationale
 
         return "LLM provider not supported", ""  # Defensive fallback.
+
+    def stream(
+        self,
+        profile: RiskProfile,
+        objective: str,
+        signals: list[str],
+        risk_score: float,
+        allocation: dict,
+        user_context: str | None = None,
+    ) -> Iterator[str]:
+        if not self._enabled():
+            yield HEURISTIC_RECOMMENDATION
+            return
+
+        prompt = self._prompt(profile, objective, signals, risk_score, allocation, user_context)
+        if LLM_PROVIDER == "openai":
+            payload = {
+                "model": LLM_MODEL,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0.2,
+                "stream": True,
+            }
+            headers = {"Authorization": f"Bearer {LLM_API_KEY}"}
+            tokens = self._openai_stream(payload, headers)
+        elif LLM_PROVIDER == "ollama":
+            tokens = self._ollama_stream(prompt)
+        else:
+            yield "LLM provider not supported"
+            return
+
+        emitted = False
+        start = time.perf_counter()
+        try:
+            for token in tokens:
+                emitted = True
+                yield token
+        except httpx.HTTPError:
+            if not emitted:
+                yield HEURISTIC_RECOMMENDATION
+        finally:
+            LLM_LATENCY.labels(provider=LLM_PROVIDER, mode="stream").observe(time.perf_counter() - start)
+
+    def _openai_stream(self, payload: dict, headers: dict) -> Iterator[str]:
+        with self._openai().stream("POST", "/chat/completions", json=payload, headers=headers) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                token = choices[0].get("delta", {}).get("content")
+                if token:
+                    yield token
+
+    def _ollama_stream(self, prompt: str) -> Iterator[str]:
+        client = self._ollama()
+        if not LLMAdvisor._ollama_chat_missing:
+            payload = {"model": LLM_MODEL, "messages": [{"role": "user", "content": prompt}], "stream": True}
+            with client.stream("POST", "/api/chat", json=payload) as response:
+                if response.status_code != 404:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        token = json.loads(line).get("message", {}).get("content", "")
+                        if token:
+                            yield token
+                    return
+            LLMAdvisor._ollama_chat_missing = True
+        payload = {"model": LLM_MODEL, "prompt": prompt, "stream": True}
+        with client.stream("POST", "/api/generate", json=payload) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                token = json.loads(line).get("response", "")
+                if token:
+                    yield token
@@ -1,42 +1,79 @@
-import json
+import logging
 import re
-from typing import Any
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
 
 from sqlalchemy.orm import Session
 
-from app.config import DATA_PROVIDER, EXECUTE_LIVE, MAX_GAS, MAX_SLIPPAGE_BPS, POLICY_MODE
-from app.models import MCPDecision
-from app.schemas import RiskProfile, TradeIntent
+from app.config import (
+    DATA_PROVIDER,
+    EXECUTE_LIVE,
+    MAX_GAS,
+    MAX_SLIPPAGE_BPS,
+    POLICY_MODE,
+    SIMULATE_BEFORE_SUBMIT,
+    SIMULATION_FAIL_CLOSED,
+)
+from app.schemas import ContractCall, RiskProfile, TradeIntent
 from app.services.advisor_agent import AdvisorAgent
-from app.services.bitquery_client import BitqueryClient
-from app.services.bscscan_client import BscScanClient
+from app.services.confirmation_tracker import confirmation_tracker
+from app.services.calldata import encode_call, token_spend
 from app.services.data_agent import DataAgent
+from app.services.decision_log import decision_log
 from app.services.execution_agent import ExecutionAgent
-from app.services.execution_client import ExecutionClient
+from app.services.execution_client import ExecutionClient, rpc_errors
 from app.services.llm_advisor import LLMAdvisor
-from app.services.policy import validate_profile, validate_trade
+from app.services.metrics import INGEST_EVENTS
+from app.services.pipeline import Pipeline, Stage
+from app.services.policy import get_policy, validate_profile, validate_trade
+from app.services.pretrade_state import PreTradeState
+from app.services.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 ADDRESS_RE = re.compile(r"^0x[a-fA-F0-9]{40}$")
 ZERO_ADDRESS = "0x" + "0" * 40
 
 
 class MCPOrchestrator:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        *,
+        llm_advisor: LLMAdvisor | None = None,
+        exec_agent: ExecutionAgent | None = None,
+        exec_client: ExecutionClient | None = None,
+        read_session: Callable[[], Session] | None = None,
+    ):
         self.db = db
+        # Opens sessions for read-only stages. Without a replica to spread load to, the stages reuse db
+        # rather than each checking out another pooled connection to the same primary.
+        self.read_session = read_session or self._shared_session
+        self._db_lock = threading.Lock()
         self.data_agent = DataAgent(db)
         self.advisor_agent = AdvisorAgent(db)
-        self.llm_advisor = LLMAdvisor()
-        self.exec_agent = ExecutionAgent()
-        self.exec_client = ExecutionClient()
+        self.llm_advisor = llm_advisor or LLMAdvisor()
+        self.exec_agent = exec_agent or ExecutionAgent()
+        self.exec_client = exec_client or ExecutionClient()
+
+    @contextmanager
+    def _shared_session(self) -> Iterator[Session]:
+        # Read stages run on pipeline threads and a Session is not thread-safe, so they take turns.
+        with self._db_lock:
+            yield self.db
 
+    @traced("orchestrator._log_decision")
     def _log_decision(self, route: str, status: str, reason: str, payload: dict) -> None:
-        entry = MCPDecision(route=route, status=status, reason=reason, payload=json.dumps(payload))
-        self.db.add(entry)
-        self.db.commit()
+        decision_log.submit(route, status, reason, payload, db=self.db)
 
-    def _check_policy(self, profile: RiskProfile | None, trade: TradeIntent | None) -> tuple[bool, str]:
+    def _check_policy(
+        self, profile: RiskProfile | None, trade: TradeIntent | None, user_id: str | None = None
+    ) -> tuple[bool, str]:
         if trade:
-            allowed, reason = validate_trade(trade.asset, trade.action, trade.size)
+            allowed, reason = validate_trade(
+                trade.asset, trade.action, trade.size, strategy_id=trade.strategy_id, user_id=user_id
+            )
             if not allowed:
                 return False, reason
         if profile:
@@ -45,7 +82,12 @@ class MCPOrchestrator:
                 return False, reason
         return True, "ok"
 
-    def _decode_call_data(self, call_data: str | None) -> tuple[bytes, str | None]:
+    def _decode_call_data(self, call_data: str | None, call: ContractCall | None = None) -> tuple[bytes, str | None]:
+        if call is not None:
+            try:
+                return encode_call(call.method, call.args), None
+            except (ValueError, TypeError, OverflowError):
+                return b"", "invalid-call"
         if not call_data:
             return b"", None
         data = call_data[2:] if call_data.startswith("0x") else call_data
@@ -63,11 +105,17 @@ class MCPOrchestrator:
             return False
         return bool(ADDRESS_RE.match(address))
 
+    @traced("orchestrator.ingest_wallet")
     def ingest_wallet(self, address: str) -> dict[str, Any]:
+        # Only the configured data provider's client is imported.
         if DATA_PROVIDER == "bitquery":
+            from app.services.bitquery_client import BitqueryClient
+
             client = BitqueryClient()
             events = client.fetch_wallet_activity(address)
         else:
+            from app.services.bscscan_client import BscScanClient
+
             client = BscScanClient()
             events = client.fetch_wallet_activity(address)
 
@@ -86,21 +134,62 @@ class MCPOrchestrator:
                 tags=event.get("tags"),
             )
             stored.append(stored_event.tx_hash)
+        INGEST_EVENTS.labels(source=DATA_PROVIDER).inc(len(stored))
         return {"stored": stored, "count": len(stored)}
 
-    def advise(self, profile: RiskProfile, objective: str, user_id: str | None) -> dict[str, Any]:
-        recommendation, rationale, signals, risk_score, allocation, confidence = self.advisor_agent.recommend(
-            profile, objective, user_id=user_id
-        )
+    @traced("orchestrator.advise")
+    def advise(
+        self,
+        profile: RiskProfile,
+        objective: str,
+        user_id: str | None,
+        *,
+        trade: TradeIntent | None = None,
+    ) -> dict[str, Any]:
+        def policy() -> tuple[bool, str]:
+            return self._check_policy(profile, trade, user_id)
+
+        def market() -> tuple[list[str], float]:
+            with self.read_session() as db:
+                return AdvisorAgent(db).market_signals()
+
+        def user() -> tuple[dict | None, float, list[str], str | None]:
+            with self.read_session() as db:
+                return AdvisorAgent(db).user_context(user_id)
+
+        def compose(market, user) -> tuple:
+            return self.advisor_agent.compose(profile, objective, market, user)
+
+        def llm(policy, compose) -> tuple[str, str] | None:
+            allowed, _ = policy
+            if not allowed:
+                return None
+            _, _, signals, risk_score, allocation, _ = compose
+            context = self.advisor_agent.last_personalization or {}
+            return self.llm_advisor.recommend(
+                profile,
+                objective,
+                signals,
+                risk_score,
+                allocation,
+                user_context=context.get("summary"),
+            )
+
+        result = Pipeline(
+            [
+                Stage("policy", policy),
+                Stage("market", market),
+                Stage("user", user),
+                Stage("compose", compose, deps=("market", "user")),
+                Stage("llm", llm, deps=("policy", "compose")),
+            ]
+        ).run()
+        allowed, reason = result.results["policy"]
+        if not allowed:
+            return {"status": "rejected", "reason": reason, "timings_ms": result.timings_ms}
+        recommendation, rationale, signals, risk_score, allocation, confidence = result.results["compose"]
+        llm_rec, llm_rationale = result.results["llm"]
         context = self.advisor_agent.last_personalization or {}
-        llm_rec, llm_rationale = self.llm_advisor.recommend(
-            profile,
-            objective,
-            signals,
-            risk_score,
-            allocation,
-            user_context=context.get("summary"),
-        )
         return {
             "recommendation": recommendation,
             "rationale": rationale,
@@ -111,16 +200,59 @@ class MCPOrchestrator:
             "llm_recommendation": llm_rec,
             "llm_rationale": llm_rationale,
             "personalization": context or None,
+            "timings_ms": result.timings_ms,
         }
 
+    def _token_spend(self, trade: TradeIntent, call_data: bytes) -> tuple[str | None, int | None, str | None]:
+        token, amount, spender = token_spend(call_data, trade.to_address)
+        token = trade.token or token
+        return (
+            token if self._is_valid_address(token) else None,
+            trade.token_amount if trade.token_amount is not None else amount,
+            trade.spender or spender,
+        )
+
+    def _pretrade_state(self, token: str | None, spender: str | None) -> PreTradeState | None:
+        try:
+            return self.exec_client.read_state(token=token, spender=spender)
+        except rpc_errors() as exc:
+            logger.warning("Pre-trade state read failed: %s", exc)
+            return None
+
+    def _gas_inputs(
+        self, trade: TradeIntent, call_data: bytes
+    ) -> tuple[int | None, dict[str, dict[str, int]] | None]:
+        try:
+            return self.exec_client.estimate(trade.to_address, call_data, trade.value_wei)
+        except rpc_errors() as exc:
+            logger.warning("Gas estimation failed; plan uses the table estimate and submit re-estimates: %s", exc)
+            return None, None
+
+    def _simulate(
+        self,
+        trade: TradeIntent,
+        call_data: bytes,
+        gas_limit: int | None,
+        fees: dict[str, int] | None,
+    ) -> dict[str, Any] | None:
+        if not SIMULATE_BEFORE_SUBMIT or not trade.to_address:
+            return None
+        try:
+            # At "pending", not the block the state was read at: the transaction lands on top of the
+            # mempool, and an older block would miss our own in-flight nonces and approvals.
+            result = self.exec_client.simulate(trade.to_address, call_data, trade.value_wei, gas=gas_limit, fees=fees)
+        except rpc_errors() as exc:
+            logger.warning("Transaction simulation failed: %s", exc)
+            if SIMULATION_FAIL_CLOSED and EXECUTE_LIVE and POLICY_MODE != "paper_trade":
+                return {"success": False, "error": str(exc)}
+            return None
+        return result.to_dict() if result else None
+
+    @traced("orchestrator.execute")
     def execute(self, trade: TradeIntent) -> dict[str, Any]:
         if POLICY_MODE == "read_only":
             return {"status": "rejected", "reason": "read-only"}
-        plan = self.exec_agent.build_plan(trade.strategy_id, trade.asset, trade.action, trade.size)
-        if plan.estimated_gas > MAX_GAS or plan.slippage_bps > MAX_SLIPPAGE_BPS:
-            return {"status": "rejected", "reason": "gas-or-slippage-limit"}
-
-        call_data, error = self._decode_call_data(trade.call_data)
+        call_data, error = self._decode_call_data(trade.call_data, trade.call)
         if error:
             return {"status": "rejected", "reason": error}
         if trade.to_address:
@@ -131,6 +263,32 @@ class MCPOrchestrator:
         if not call_data and trade.value_wei == 0 and EXECUTE_LIVE:
             return {"status": "rejected", "reason": "missing-call-data"}
 
+        token, token_amount, spender = self._token_spend(trade, call_data)
+        state = self._pretrade_state(token, spender)
+        gas_estimate, fee_strategies = self._gas_inputs(trade, call_data)
+        plan = self.exec_agent.build_plan(
+            trade.strategy_id,
+            trade.asset,
+            trade.action,
+            trade.size,
+            state=state,
+            value_wei=trade.value_wei,
+            token_amount=token_amount,
+            gas_estimate=gas_estimate,
+            fee_strategies=fee_strategies,
+            require_state=EXECUTE_LIVE and POLICY_MODE != "paper_trade",
+        )
+        if plan.estimated_gas > MAX_GAS or plan.slippage_bps > MAX_SLIPPAGE_BPS:
+            return {"status": "rejected", "reason": "gas-or-slippage-limit"}
+        if plan.status == "blocked":
+            return {"status": "rejected", "reason": "pre-trade-checks-failed", "safety_checks": plan.safety_checks}
+
+        gas_limit = plan.estimated_gas if plan.gas_source == "estimate" else None
+        simulation = self._simulate(trade, call_data, gas_limit, plan.fees)
+        if simulation is not None and not simulation["success"]:
+            reason = "simulation-unavailable" if simulation.get("error") else "simulation-reverted"
+            return {"status": "rejected", "reason": reason, "simulation": simulation}
+
         if POLICY_MODE == "paper_trade":
             result = None
             status = "paper-trade"
@@ -139,8 +297,12 @@ class MCPOrchestrator:
                 to_address=trade.to_address or "",
                 data=call_data,
                 value_wei=trade.value_wei,
+                gas=gas_limit,
+                fees=plan.fees,
             )
             status = "submitted" if result.status == "submitted" else result.status
+            if status == "submitted":
+                confirmation_tracker.track(result.tx_hash, result.sender, result.nonce, self.db)
         return {
             "status": status,
             "plan": {
@@ -150,10 +312,14 @@ class MCPOrchestrator:
                 "gas_strategy": plan.gas_strategy,
                 "deadline_sec": plan.deadline_sec,
                 "safety_checks": plan.safety_checks,
+                "gas_source": plan.gas_source,
+                "fees": plan.fees,
             },
+            "simulation": simulation,
             "tx_hash": "" if result is None else result.tx_hash,
         }
 
+    @traced("orchestrator.route")
     def route(
         self,
         route: str,
@@ -162,10 +328,11 @@ class MCPOrchestrator:
         payload: dict,
         user_id: str | None,
     ) -> dict[str, Any]:
-        allowed, reason = self._check_policy(profile, trade)
-        if not allowed:
-            self._log_decision(route, "rejected", reason, payload)
-            return {"status": "rejected", "detail": reason}
+        if route != "advise" or not profile:
+            allowed, reason = self._check_policy(profile, trade, user_id)
+            if not allowed:
+                self._log_decision(route, "rejected", reason, payload)
+                return {"status": "rejected", "detail": reason}
 
         if route == "ingest":
             address = payload.get("address", "")
@@ -180,16 +347,31 @@ class MCPOrchestrator:
             if not profile:
                 self._log_decision(route, "rejected", "missing-profile", payload)
                 return {"status": "rejected", "detail": "missing-profile"}
-            data = self.advise(profile, payload.get("objective", "balanced"), user_id)
+            data = self.advise(profile, payload.get("objective", "balanced"), user_id, trade=trade)
+            if data.get("status") == "rejected":
+                self._log_decision(route, "rejected", data["reason"], payload)
+                return {"status": "rejected", "detail": data["reason"], "data": {"timings_ms": data["timings_ms"]}}
             self._log_decision(route, "accepted", "advised", payload)
             return {"status": "accepted", "detail": "advised", "data": data}
         if route == "execute":
             if not trade:
                 self._log_decision(route, "rejected", "missing-trade", payload)
                 return {"status": "rejected", "detail": "missing-trade"}
-            data = self.execute(trade)
+            policy = get_policy()
+            token = policy.try_reserve(trade.asset, trade.size)
+            if token is None:
+                self._log_decision(route, "rejected", "asset-exposure-exceeds-window", payload)
+                return {"status": "rejected", "detail": "asset-exposure-exceeds-window"}
+            try:
+                data = self.execute(trade)
+            except Exception:
+                policy.release(trade.asset, trade.size, token)
+                raise
             status = data.get("status", "unknown")
-            self._log_decision(route, status, "executed", payload)
+            if status not in {"submitted", "paper-trade", "dry-run"}:
+                policy.release(trade.asset, trade.size, token)
+            log_payload = {**payload, "simulation": data["simulation"]} if data.get("simulation") else payload
+            self._log_decision(route, status, data.get("reason", "executed"), log_payload)
             return {"status": status, "detail": "executed", "data": data}
 
         self._log_decision(route, "rejected", "unknown-route", payload)
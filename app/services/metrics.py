@@ -0,0 +1,317 @@
+import functools
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Owner:
+    """Lives only in a thread's local storage; it is collected when the thread exits."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Shards:
+    """Per-thread value arrays; each thread writes only its own shard, so updates take no lock.
+    A finished thread's shard is folded into a shared base so short-lived threads do not leak."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._local = threading.local()
+        self._shards: dict[int, list[float]] = {}
+        self._base = [0.0] * size
+        # Re-entrant: a finalizer can fire from garbage collection while this thread holds the lock.
+        self._lock = threading.RLock()
+
+    def mine(self) -> list[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self.size
+            owner = _Owner()
+            with self._lock:
+                self._shards[id(values)] = values
+            weakref.finalize(owner, self._retire, values)
+            self._local.values = values
+            self._local.owner = owner
+            return values
+
+    def _retire(self, values: list[float]) -> None:
+        with self._lock:
+            self._shards.pop(id(values), None)
+            for index, value in enumerate(values):
+                self._base[index] += value
+
+    def live(self) -> int:
+        with self._lock:
+            return len(self._shards)
+
+    def totals(self) -> list[float]:
+        # Summed under the lock so a shard retiring mid-scrape is not counted twice.
+        with self._lock:
+            totals = list(self._base)
+            for values in self._shards.values():
+                for index, value in enumerate(values):
+                    totals[index] += value
+        return totals
+
+
+class _CounterChild:
+    def __init__(self) -> None:
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.mine()[0] += amount
+
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # One slot per bucket, one for +Inf, then the running sum.
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        values = self._shards.mine()
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> tuple[list[float], float, float]:
+        totals = self._shards.totals()
+        counts = totals[:-1]
+        cumulative = []
+        running = 0.0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+class _GaugeChild:
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._fn: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._fn = fn
+
+    def value(self) -> float:
+        if self._fn is None:
+            return self._value
+        try:
+            return float(self._fn())
+        except Exception:
+            return float("nan")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs: tuple[tuple[str, str], ...]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value != value:
+        return "NaN"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self) -> object:
+        """A fresh child for one label combination."""
+
+    def labels(self, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _items(self) -> list[tuple[tuple[tuple[str, str], ...], object]]:
+        with self._lock:
+            children = list(self._children.items())
+        return [(tuple(zip(self.labelnames, key)), child) for key, child in children]
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for pairs, child in self._items():
+            lines.append(f"{self.name}{_format_labels(pairs)} {_format_value(child.value())}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self.labels().set_function(fn)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        bounds = [*self.buckets, float("inf")]
+        for pairs, child in self._items():
+            cumulative, count, total = child.snapshot()
+            for bound, value in zip(bounds, cumulative):
+                labels = _format_labels(pairs + (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(value)}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {_format_value(count)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric '{metric.name}' already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def timed(metric: Histogram, **labels: str):
+    child = metric.labels(**labels)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+HTTP_LATENCY = histogram("http_request_duration_seconds", "API request latency.", ("route", "method", "status"))
+EMBED_LATENCY = histogram("embed_duration_seconds", "Embedding latency per provider.", ("provider",))
+DB_LATENCY = histogram("db_query_duration_seconds", "Database time per service method.", ("method",))
+LLM_LATENCY = histogram("llm_duration_seconds", "LLM advisor latency per provider.", ("provider", "mode"))
+PROVIDER_LATENCY = histogram(
+    "provider_request_duration_seconds", "Outbound HTTP/RPC latency per provider client.", ("provider",)
+)
+PROVIDER_REQUESTS = counter("provider_requests_total", "Outbound provider requests by outcome.", ("provider", "outcome"))
+PIPELINE_STAGE_LATENCY = histogram("pipeline_stage_duration_seconds", "Orchestrator pipeline stage latency.", ("stage",))
+INGEST_EVENTS = counter("ingest_events_total", "On-chain events stored by wallet ingestion.", ("source",))
+SCHEDULER_LAG = histogram(
+    "scheduler_lag_seconds",
+    "Delay between a scheduled tick and when it actually ran.",
+    ("scheduler",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0),
+)
+DB_POOL = gauge("db_pool", "SQLAlchemy connection pool state.", ("engine", "state"))
+DB_POOL_WAIT = histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", ("engine",))
+DB_REPLICA_HEALTHY = gauge("db_replica_healthy", "1 when a read replica is in rotation.", ("engine",))
+DB_REPLICA_LAG = gauge("db_replica_lag_seconds", "Replication replay lag per read replica.", ("engine",))
+QUEUE_DEPTH = gauge("queue_depth", "Items waiting in background queues.", ("queue",))
+SERVICE_CONSTRUCTION = gauge(
+    "service_construction_seconds", "Time to build each shared service (orchestrator: the latest request).", ("service",)
+)
+CACHE_REQUESTS = counter("cache_requests_total", "Cache lookups by result.", ("cache", "result"))
@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.config import PIPELINE_WORKERS
+from app.services.metrics import PIPELINE_STAGE_LATENCY
+from app.services.tracing import propagate, span
+
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="mcp-stage")
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+
+
+@dataclass
+class PipelineResult:
+    results: dict[str, Any] = field(default_factory=dict)
+    timings_ms: dict[str, float] = field(default_factory=dict)
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage]) -> None:
+        names = {stage.name for stage in stages}
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in names]
+            if missing:
+                raise ValueError(f"stage '{stage.name}' depends on unknown stages: {missing}")
+        self.stages = stages
+
+    def _timed(self, stage: Stage, kwargs: dict[str, Any]) -> tuple[Any, float]:
+        start = time.perf_counter()
+        with span(f"stage.{stage.name}"):
+            value = stage.fn(**kwargs)
+        elapsed = time.perf_counter() - start
+        PIPELINE_STAGE_LATENCY.labels(stage=stage.name).observe(elapsed)
+        return value, elapsed * 1000
+
+    def run(self) -> PipelineResult:
+        result = PipelineResult()
+        pending = {stage.name: stage for stage in self.stages}
+        running: dict[Future, Stage] = {}
+        start = time.perf_counter()
+        while pending or running:
+            ready = [
+                stage for stage in pending.values() if all(dep in result.results for dep in stage.deps)
+            ]
+            for stage in ready:
+                del pending[stage.name]
+                kwargs = {dep: result.results[dep] for dep in stage.deps}
+                running[_executor.submit(propagate(self._timed), stage, kwargs)] = stage
+            if not running:
+                raise RuntimeError(f"pipeline has a dependency cycle: {sorted(pending)}")
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                value, elapsed_ms = future.result()
+                result.results[stage.name] = value
+                result.timings_ms[stage.name] = round(elapsed_ms, 2)
+        result.timings_ms["total"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
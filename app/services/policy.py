@@ -1,19 +1,214 @@
-from app.config import ALLOWED_ACTIONS, ALLOWED_ASSETS, MAX_POSITION_SIZE
-from app.schemas import RiskProfile
-
-
-def validate_trade(asset: str, action: str, size: float) -> tuple[bool, str]:
-    asset = asset.strip()
-    action = action.strip()
-    if size <= 0:
-        return False, "size-must-be-positive"
-    if size > MAX_POSITION_SIZE:
-        return False, "position-size-exceeds-limit"
-    if asset.upper() not in ALLOWED_ASSETS:
-        return False, "asset-not-allowed"
-    if action.lower() not in ALLOWED_ACTIONS:
-        return False, "action-not-allowed"
-    return True, "ok"
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Iterable, Sequence
+
+from app.config import (
+    ALLOWED_ACTIONS,
+    ALLOWED_ASSETS,
+    EXPOSURE_WINDOW_SEC,
+    MAX_ASSET_EXPOSURE_PER_HOUR,
+    MAX_POSITION_SIZE,
+    STRATEGY_LIMITS,
+    USER_LIMITS,
+)
+from app.schemas import RiskProfile, TradeIntent
+
+
+class ExposureWindow:
+    def __init__(self, window_sec: int = 3600, bucket_sec: int = 60) -> None:
+        self.window_sec = window_sec
+        self.bucket_sec = bucket_sec
+        self._buckets: dict[str, deque[list]] = defaultdict(deque)
+        self._totals: dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def _expire(self, asset: str, now: float) -> None:
+        buckets = self._buckets[asset]
+        cutoff = now - self.window_sec
+        while buckets and buckets[0][0] <= cutoff:
+            _, amount = buckets.popleft()
+            self._totals[asset] -= amount
+
+    def total(self, asset: str, now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(asset, now)
+            return max(0.0, self._totals[asset])
+
+    def _add(self, asset: str, amount: float, bucket: float) -> None:
+        buckets = self._buckets[asset]
+        if buckets and buckets[-1][0] == bucket:
+            buckets[-1][1] += amount
+        else:
+            buckets.append([bucket, amount])
+        self._totals[asset] += amount
+
+    def add(self, asset: str, amount: float, now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        bucket = now - now % self.bucket_sec
+        with self._lock:
+            self._expire(asset, now)
+            self._add(asset, amount, bucket)
+        return bucket
+
+    def try_add(self, asset: str, amount: float, cap: float, now: float | None = None) -> float | None:
+        """Check and count in one step; returns the bucket to release from, or None when over cap."""
+        now = time.time() if now is None else now
+        bucket = now - now % self.bucket_sec
+        with self._lock:
+            self._expire(asset, now)
+            if self._totals[asset] + amount > cap:
+                return None
+            self._add(asset, amount, bucket)
+        return bucket
+
+    def release(self, asset: str, amount: float, bucket: float) -> None:
+        with self._lock:
+            for entry in reversed(self._buckets[asset]):
+                if entry[0] == bucket:
+                    entry[1] -= amount
+                    self._totals[asset] -= amount
+                    return
+                if entry[0] < bucket:
+                    return
+
+
+class CompiledPolicy:
+    def __init__(
+        self,
+        allowed_assets: Iterable[str],
+        allowed_actions: Iterable[str],
+        max_position_size: float,
+        *,
+        strategy_limits: dict[str, float] | None = None,
+        user_limits: dict[str, float] | None = None,
+        max_asset_exposure: float = 0.0,
+        exposure_window_sec: int = 3600,
+    ) -> None:
+        self.allowed_assets = frozenset(asset.upper() for asset in allowed_assets)
+        self.allowed_actions = frozenset(action.lower() for action in allowed_actions)
+        self.max_position_size = max_position_size
+        self.strategy_limits = dict(strategy_limits or {})
+        self.user_limits = dict(user_limits or {})
+        self.max_asset_exposure = max_asset_exposure
+        self.exposure = ExposureWindow(exposure_window_sec)
+
+    @classmethod
+    def from_config(cls) -> "CompiledPolicy":
+        return cls(
+            ALLOWED_ASSETS,
+            ALLOWED_ACTIONS,
+            MAX_POSITION_SIZE,
+            strategy_limits=STRATEGY_LIMITS,
+            user_limits=USER_LIMITS,
+            max_asset_exposure=MAX_ASSET_EXPOSURE_PER_HOUR,
+            exposure_window_sec=EXPOSURE_WINDOW_SEC,
+        )
+
+    def _limit_for(self, strategy_id: str | None, user_id: str | None) -> float:
+        limit = self.max_position_size
+        if strategy_id and strategy_id in self.strategy_limits:
+            limit = min(limit, self.strategy_limits[strategy_id])
+        if user_id and user_id in self.user_limits:
+            limit = min(limit, self.user_limits[user_id])
+        return limit
+
+    def validate(
+        self,
+        asset: str,
+        action: str,
+        size: float,
+        *,
+        strategy_id: str | None = None,
+        user_id: str | None = None,
+        pending_exposure: float = 0.0,
+    ) -> tuple[bool, str]:
+        asset = asset.strip().upper()
+        if size <= 0:
+            return False, "size-must-be-positive"
+        if size > self.max_position_size:
+            return False, "position-size-exceeds-limit"
+        if size > self._limit_for(strategy_id, user_id):
+            return False, "position-size-exceeds-scoped-limit"
+        if asset not in self.allowed_assets:
+            return False, "asset-not-allowed"
+        if action.strip().lower() not in self.allowed_actions:
+            return False, "action-not-allowed"
+        if self.max_asset_exposure and self.exposure.total(asset) + pending_exposure + size > self.max_asset_exposure:
+            return False, "asset-exposure-exceeds-window"
+        return True, "ok"
+
+    def validate_batch(self, intents: Sequence[TradeIntent], *, user_id: str | None = None) -> list[tuple[bool, str]]:
+        assets = self.allowed_assets
+        actions = self.allowed_actions
+        max_size = self.max_position_size
+        exposure_cap = self.max_asset_exposure
+        window_totals: dict[str, float] = {}
+        basket: dict[str, float] = defaultdict(float)
+        user_limit = self.user_limits.get(user_id, max_size) if user_id else max_size
+        results: list[tuple[bool, str]] = []
+        append = results.append
+        for intent in intents:
+            size = intent.size
+            asset = intent.asset.strip().upper()
+            if size <= 0:
+                append((False, "size-must-be-positive"))
+            elif size > max_size:
+                append((False, "position-size-exceeds-limit"))
+            elif size > min(user_limit, self.strategy_limits.get(intent.strategy_id, max_size)):
+                append((False, "position-size-exceeds-scoped-limit"))
+            elif asset not in assets:
+                append((False, "asset-not-allowed"))
+            elif intent.action.strip().lower() not in actions:
+                append((False, "action-not-allowed"))
+            elif exposure_cap:
+                if asset not in window_totals:
+                    window_totals[asset] = self.exposure.total(asset)
+                if window_totals[asset] + basket[asset] + size > exposure_cap:
+                    append((False, "asset-exposure-exceeds-window"))
+                else:
+                    basket[asset] += size
+                    append((True, "ok"))
+            else:
+                append((True, "ok"))
+        return results
+
+    def try_reserve(self, asset: str, size: float) -> float | None:
+        """Count size against the exposure window if it still fits. validate() only reads the
+        window, so concurrent executions must reserve here; release() the token if they fail.
+        Returns a release token (0.0 when no cap is configured) or None when over the cap."""
+        if not self.max_asset_exposure:
+            return 0.0
+        return self.exposure.try_add(asset.strip().upper(), size, self.max_asset_exposure)
+
+    def release(self, asset: str, size: float, token: float) -> None:
+        if self.max_asset_exposure:
+            self.exposure.release(asset.strip().upper(), size, token)
+
+
+_policy: CompiledPolicy | None = None
+_policy_lock = threading.Lock()
+
+
+def get_policy() -> CompiledPolicy:
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                _policy = CompiledPolicy.from_config()
+    return _policy
+
+
+def validate_trade(
+    asset: str,
+    action: str,
+    size: float,
+    *,
+    strategy_id: str | None = None,
+    user_id: str | None = None,
+) -> tuple[bool, str]:
+    return get_policy().validate(asset, action, size, strategy_id=strategy_id, user_id=user_id)
 
 
 def validate_profile(profile: RiskProfile) -> tuple[bool, str]:
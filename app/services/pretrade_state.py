@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+
+from app.config import RPC_URL
+from app.services.calldata import SELECTORS, encode_address
+from app.services.provider_client import get_provider_client, json_rpc_batch
+
+
+@dataclass
+class PreTradeState:
+    owner: str
+    block_number: int
+    nonce: int
+    native_balance: int
+    token_balance: int | None = None
+    allowance: int | None = None
+
+    def safety_checks(
+        self, value_wei: int = 0, token_amount: int | None = None, gas_cost_wei: int | None = None
+    ) -> list[str]:
+        """gas_cost_wei is gas limit x max fee per gas; None when no fee quote was available."""
+        checks = [f"nonce-synced:{self.nonce}"]
+        required = value_wei + (gas_cost_wei or 0)
+        checks.append("balance-verified" if self.native_balance >= required else "insufficient-native-balance")
+        if gas_cost_wei is None:
+            checks.append("gas-cost-unverified")
+        if self.token_balance is not None and token_amount is not None:
+            checks.append(
+                "token-balance-verified" if self.token_balance >= token_amount else "insufficient-token-balance"
+            )
+        if self.allowance is not None and token_amount is not None:
+            checks.append("allowance-verified" if self.allowance >= token_amount else "insufficient-allowance")
+        return checks
+
+
+class PreTradeReader:
+    def __init__(self, rpc_url: str = RPC_URL) -> None:
+        self.client = get_provider_client("rpc", rpc_url, timeout=10)
+
+    def _batch(self, calls: list[tuple[str, list]]) -> list:
+        results = []
+        for (method, _), reply in zip(calls, json_rpc_batch(self.client, calls)):
+            # A missing reply must not be read as a zero balance or allowance.
+            if reply is None:
+                raise RuntimeError(f"{method} missing from batch reply")
+            if "error" in reply:
+                raise RuntimeError(f"{method} failed: {(reply['error'] or {}).get('message')}")
+            if reply.get("result") is None:
+                raise RuntimeError(f"{method} returned no result")
+            results.append(reply["result"])
+        return results
+
+    def read(self, owner: str, token: str | None = None, spender: str | None = None) -> PreTradeState:
+        calls: list[tuple[str, list]] = [
+            ("eth_blockNumber", []),
+            ("eth_getTransactionCount", [owner, "pending"]),
+            ("eth_getBalance", [owner, "latest"]),
+        ]
+        if token:
+            data = SELECTORS["balanceOf"] + encode_address(owner)
+            calls.append(("eth_call", [{"to": token, "data": "0x" + data.hex()}, "latest"]))
+            if spender:
+                data = SELECTORS["allowance"] + encode_address(owner) + encode_address(spender)
+                calls.append(("eth_call", [{"to": token, "data": "0x" + data.hex()}, "latest"]))
+        # "0x" is what eth_call returns for an address without code.
+        results = [int(value, 16) if value != "0x" else 0 for value in self._batch(calls)]
+        return PreTradeState(
+            owner=owner,
+            block_number=results[0],
+            nonce=results[1],
+            native_balance=results[2],
+            token_balance=results[3] if token else None,
+            allowance=results[4] if token and spender else None,
+        )
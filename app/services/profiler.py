@@ -0,0 +1,129 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MAX_PROFILE_SEC = 120
+_busy = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def _stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(duration_sec: float, interval_sec: float = 0.005, *, include_idle: bool = False) -> Counter:
+    """Statistical profile of every thread except the caller; returns collapsed stacks -> sample count."""
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusyError("a profiling session is already running")
+    try:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        counts: Counter = Counter()
+        deadline = time.monotonic() + min(duration_sec, MAX_PROFILE_SEC)
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if not include_idle and _idle(frame):
+                    continue
+                counts[f"{names.get(ident, ident)};{_stack(frame)}"] += 1
+            time.sleep(interval_sec)
+        return counts
+    finally:
+        _busy.release()
+
+
+def _idle(frame) -> bool:
+    # Threads parked in a wait/select/sleep dominate samples without showing real work.
+    return frame.f_code.co_name in {"wait", "select", "poll", "_wait_for_tstate_lock", "accept", "_worker"}
+
+
+def collapsed(counts: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class AllocationTracker:
+    """Per-request tracemalloc deltas for one path prefix while armed.
+
+    tracemalloc counters are process-wide, so overlapping requests inflate each other's numbers;
+    arm it under representative but modest concurrency.
+    """
+
+    def __init__(self) -> None:
+        self.route: str | None = None
+        self._lock = threading.Lock()
+        self._samples: list[tuple[int, int]] = []
+        self._started_tracing = False
+
+    def matches(self, path: str) -> bool:
+        route = self.route
+        return route is not None and path.startswith(route)
+
+    def before(self) -> int:
+        if not tracemalloc.is_tracing():
+            return 0
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def after(self, start_bytes: int) -> None:
+        if not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            self._samples.append((current - start_bytes, peak - start_bytes))
+
+    def run(self, route: str, duration_sec: float, top: int = 25) -> dict:
+        if not _busy.acquire(blocking=False):
+            raise ProfilerBusyError("a profiling session is already running")
+        try:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start(10)
+            baseline = tracemalloc.take_snapshot()
+            with self._lock:
+                self._samples = []
+            self.route = route
+            time.sleep(min(duration_sec, MAX_PROFILE_SEC))
+            self.route = None
+            snapshot = tracemalloc.take_snapshot()
+            with self._lock:
+                samples = list(self._samples)
+        finally:
+            self.route = None
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+            _busy.release()
+
+        sites = snapshot.compare_to(baseline, "lineno")[:top]
+        retained = [delta for delta, _ in samples]
+        peaks = [peak for _, peak in samples]
+        return {
+            "route": route,
+            "requests": len(samples),
+            "avg_retained_bytes": round(sum(retained) / len(retained)) if retained else 0,
+            "avg_peak_bytes": round(sum(peaks) / len(peaks)) if peaks else 0,
+            "max_peak_bytes": max(peaks) if peaks else 0,
+            "top_sites": [
+                {"site": str(stat.traceback[0]), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in sites
+            ],
+        }
+
+
+allocation_tracker = AllocationTracker()
@@ -0,0 +1,273 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Iterator
+
+import httpx
+
+from app.config import (
+    PROVIDER_BACKOFF_SEC,
+    PROVIDER_BREAKER_RESET_SEC,
+    PROVIDER_BREAKER_THRESHOLD,
+    PROVIDER_HEDGE_ENABLED,
+    PROVIDER_HEDGE_MIN_SAMPLES,
+    PROVIDER_MAX_CONNECTIONS,
+    PROVIDER_MAX_RETRIES,
+)
+from app.services.metrics import PROVIDER_LATENCY, PROVIDER_REQUESTS
+from app.services.tracing import propagate, span
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class CircuitOpenError(httpx.HTTPError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = PROVIDER_BREAKER_THRESHOLD, reset_sec: float = PROVIDER_BREAKER_RESET_SEC) -> None:
+        self.threshold = max(1, threshold)
+        self.reset_sec = reset_sec
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_started: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_sec:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Closed lets everything through; half-open admits a single probe until it reports back."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.reset_sec:
+                return False
+            # A probe that never reported (e.g. its caller crashed) is given up on after reset_sec.
+            if self._probe_started is not None and now - self._probe_started < self.reset_sec:
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probe_started is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._probe_started = None
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float | None:
+        with self._lock:
+            if len(self._samples) < PROVIDER_HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct))
+        return ordered[index]
+
+
+class ProviderClient:
+    def __init__(self, name: str, base_url: str, timeout: float = 20) -> None:
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=PROVIDER_MAX_CONNECTIONS,
+                max_keepalive_connections=PROVIDER_MAX_CONNECTIONS,
+            ),
+        )
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyWindow()
+        self.max_retries = PROVIDER_MAX_RETRIES
+        self.backoff_sec = PROVIDER_BACKOFF_SEC
+        self.hedge = PROVIDER_HEDGE_ENABLED
+        # Every in-flight request holds a worker for its primary and may need one more for its hedge; the
+        # connection limit bounds real concurrency, so the pool must never be what requests queue on.
+        self._hedge_pool = (
+            ThreadPoolExecutor(max_workers=2 * PROVIDER_MAX_CONNECTIONS, thread_name_prefix=f"hedge-{name}")
+            if self.hedge
+            else None
+        )
+        self._latency_metric = PROVIDER_LATENCY.labels(provider=name)
+
+    def _check_circuit(self) -> None:
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit open")
+
+    def _observe(self, response: httpx.Response, elapsed: float) -> None:
+        self._latency_metric.observe(elapsed)
+        PROVIDER_REQUESTS.labels(provider=self.name, outcome=f"{response.status_code // 100}xx").inc()
+        if response.status_code < 500:
+            self.latency.add(elapsed)
+
+    def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        with span(f"http.{self.name}", method=method, path=path) as current:
+            try:
+                response = self.client.request(method, path, **kwargs)
+            except httpx.TransportError:
+                PROVIDER_REQUESTS.labels(provider=self.name, outcome="transport-error").inc()
+                raise
+            if current is not None:
+                current.set("status_code", response.status_code)
+        self._observe(response, time.perf_counter() - start)
+        return response
+
+    def _hedged_send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        delay = self.latency.percentile(0.95)
+        if not self._hedge_pool or delay is None:
+            return self._send(method, path, **kwargs)
+        primary = self._hedge_pool.submit(propagate(self._send), method, path, **kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        backup = self._hedge_pool.submit(propagate(self._send), method, path, **kwargs)
+        pending: set[Future] = {primary, backup}
+        error: Exception | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except httpx.HTTPError as exc:
+                    error = exc
+        raise error or httpx.TransportError(f"{self.name} hedged request failed")
+
+    def request(self, method: str, path: str, *, retry: bool | None = None, **kwargs) -> httpx.Response:
+        """Send with breaker accounting. Retries and hedging default to idempotent methods only;
+        POST callers opt in with retry=True when a duplicate request is harmless (reads, embeddings)."""
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        max_retries = self.max_retries if retry else 0
+        send = self._hedged_send if retry else self._send
+        self._check_circuit()
+        attempt = 0
+        while True:
+            try:
+                response = send(method, path, **kwargs)
+            except httpx.HTTPError:
+                self.breaker.record_failure()
+                if attempt >= max_retries or not self.breaker.allow():
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if attempt >= max_retries or not self.breaker.allow():
+                    return response
+            delay = self.backoff_sec * (2**attempt)
+            logger.debug("%s retry %s in %.2fs", self.name, attempt + 1, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def post(self, path: str, *, retry: bool = False, **kwargs) -> httpx.Response:
+        return self.request("POST", path, retry=retry, **kwargs)
+
+    def get(self, path: str, **kwargs) -> httpx.Response:
+        return self.request("GET", path, **kwargs)
+
+    @contextmanager
+    def stream(self, method: str, path: str, **kwargs) -> Iterator[httpx.Response]:
+        self._check_circuit()
+        start = time.perf_counter()
+        opened = False
+        try:
+            with span(f"http.{self.name}.stream", method=method, path=path) as current, self.client.stream(
+                method, path, **kwargs
+            ) as response:
+                opened = True
+                # Latency is time to response headers, comparable with request().
+                self._observe(response, time.perf_counter() - start)
+                if current is not None:
+                    current.set("status_code", response.status_code)
+                if response.status_code in RETRY_STATUS:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                yield response
+        except httpx.HTTPError:
+            if not opened:
+                PROVIDER_REQUESTS.labels(provider=self.name, outcome="transport-error").inc()
+            self.breaker.record_failure()
+            raise
+
+    def close(self) -> None:
+        self.client.close()
+        if self._hedge_pool:
+            self._hedge_pool.shutdown(wait=False)
+
+
+def json_rpc_batch(client: ProviderClient, calls: list[tuple[str, list]]) -> list[dict | None]:
+    """One reply object per call, in call order; None where the node sent none. A node that answers the
+    batch with a single object (batching disabled, batch too large) is asked one call at a time."""
+    body = [
+        {"jsonrpc": "2.0", "id": index, "method": method, "params": params}
+        for index, (method, params) in enumerate(calls)
+    ]
+    response = client.post("", json=body, retry=True)
+    response.raise_for_status()
+    payload = response.json()
+    if not isinstance(payload, list):
+        logger.info("JSON-RPC batch answered with %s; falling back to single calls", type(payload).__name__)
+        return [_json_rpc_call(client, item) for item in body]
+    replies = {item.get("id"): item for item in payload if isinstance(item, dict)}
+    return [replies.get(index) for index in range(len(calls))]
+
+
+def _json_rpc_call(client: ProviderClient, item: dict) -> dict | None:
+    response = client.post("", json=item, retry=True)
+    response.raise_for_status()
+    reply = response.json()
+    return reply if isinstance(reply, dict) else None
+
+
+_clients: dict[tuple[str, str], ProviderClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_provider_client(name: str, base_url: str, timeout: float = 20) -> ProviderClient:
+    key = (name, base_url.rstrip("/"))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ProviderClient(name, base_url, timeout=timeout)
+            _clients[key] = client
+        return client
+
+
+def close_provider_clients() -> None:
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -1,3 +1,5 @@
+import threading
+import time
 from dataclasses import dataclass
 
 from sqlalchemy import func, select
@@ -15,8 +17,11 @@ from app.config import (
     MAX_SLIPPAGE_BPS,
     POLICY_MODE,
     RPC_URL,
+    SCORECARD_CACHE_TTL_SEC,
 )
 from app.models import OnChainEvent, UserHolding, UserTrade
+from app.services.metrics import CACHE_REQUESTS, DB_LATENCY, timed
+from app.services.tracing import traced
 
 
 @dataclass
@@ -26,26 +31,57 @@ class ScoreCategory:
     notes: list[str]
 
 
+_stats_cache: tuple[float, dict] | None = None
+_stats_lock = threading.Lock()
+
+
 class Scorecard:
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session, cache_ttl_sec: float = SCORECARD_CACHE_TTL_SEC) -> None:
         self.db = db
+        self.cache_ttl_sec = cache_ttl_sec
+        self._stats: dict | None = None
 
-    def _event_stats(self) -> dict:
-        total = self.db.execute(select(func.count(OnChainEvent.id))).scalar_one()
-        has_structured = (
-            self.db.execute(
-                select(func.count(OnChainEvent.id)).where(
-                    OnChainEvent.from_address.isnot(None),
-                    OnChainEvent.to_address.isnot(None),
-                    OnChainEvent.block_number.isnot(None),
-                )
-            ).scalar_one()
-            > 0
-        )
-        tagged = (
-            self.db.execute(select(func.count(OnChainEvent.id)).where(OnChainEvent.tags.isnot(None))).scalar_one()
+    @timed(DB_LATENCY, method="scorecard.stats")
+    def _query_stats(self) -> dict:
+        structured = (
+            OnChainEvent.from_address.isnot(None)
+            & OnChainEvent.to_address.isnot(None)
+            & OnChainEvent.block_number.isnot(None)
         )
-        return {"total": total, "has_structured": has_structured, "tagged": tagged}
+        row = self.db.execute(
+            select(
+                func.count(OnChainEvent.id),
+                func.count(OnChainEvent.id).filter(structured),
+                func.count(OnChainEvent.id).filter(OnChainEvent.tags.isnot(None)),
+                select(func.count(UserTrade.id)).scalar_subquery(),
+                select(func.count(UserHolding.id)).scalar_subquery(),
+            )
+        ).one()
+        total, structured_count, tagged, user_trades, user_holdings = row
+        return {
+            "total": total,
+            "has_structured": structured_count > 0,
+            "tagged": tagged,
+            "user_trades": user_trades,
+            "user_holdings": user_holdings,
+        }
+
+    def _event_stats(self) -> dict:
+        global _stats_cache
+        if self._stats is not None:
+            return self._stats
+        if self.cache_ttl_sec > 0:
+            with _stats_lock:
+                if _stats_cache and time.monotonic() - _stats_cache[0] < self.cache_ttl_sec:
+                    CACHE_REQUESTS.labels(cache="scorecard", result="hit").inc()
+                    self._stats = _stats_cache[1]
+                    return self._stats
+        self._stats = self._query_stats()
+        if self.cache_ttl_sec > 0:
+            CACHE_REQUESTS.labels(cache="scorecard", result="miss").inc()
+            with _stats_lock:
+                _stats_cache = (time.monotonic(), self._stats)
+        return self._stats
 
     def data_agent(self) -> ScoreCategory:
         stats = self._event_stats()
@@ -77,9 +113,7 @@ class Scorecard:
             score += 2
         else:
             notes.append("Advisor confidence improves with more historical events.")
-        user_trades = self.db.execute(select(func.count(UserTrade.id))).scalar_one()
-        user_holdings = self.db.execute(select(func.count(UserHolding.id))).scalar_one()
-        if user_trades or user_holdings:
+        if stats["user_trades"] or stats["user_holdings"]:
             score += 1
         else:
             notes.append("Add user trade history/holdings to enable personalization.")
@@ -118,9 +152,19 @@ class Scorecard:
         return ScoreCategory(score=round(score, 2), confidence=round(confidence, 2), notes=notes)
 
     def overall(self) -> tuple[float, float]:
-        data_score = self.data_agent()
-        advisor_score = self.advisor_agent()
-        exec_score = self.execution_agent()
+        return self._combine(self.data_agent(), self.advisor_agent(), self.execution_agent())
+
+    def _combine(
+        self, data_score: ScoreCategory, advisor_score: ScoreCategory, exec_score: ScoreCategory
+    ) -> tuple[float, float]:
         overall_score = round((data_score.score + advisor_score.score + exec_score.score) / 3, 2)
         overall_confidence = round((data_score.confidence + advisor_score.confidence + exec_score.confidence) / 3, 2)
         return overall_score, overall_confidence
+
+    @traced("scorecard.report")
+    def report(self) -> tuple[ScoreCategory, ScoreCategory, ScoreCategory, float, float]:
+        data_score = self.data_agent()
+        advisor_score = self.advisor_agent()
+        exec_score = self.execution_agent()
+        overall_score, overall_confidence = self._combine(data_score, advisor_score, exec_score)
+        return data_score, advisor_score, exec_score, overall_score, overall_confidence
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from app.config import RPC_URL, SIMULATION_CACHE_SIZE
+from app.services.metrics import CACHE_REQUESTS
+from app.services.provider_client import get_provider_client
+
+ERROR_SELECTOR = "08c379a0"
+PANIC_SELECTOR = "4e487b71"
+REVERT_MESSAGES = ("execution reverted", "vm exception while processing transaction")
+
+
+class SimulationError(RuntimeError):
+    """The node could not run the call (rate limit, unknown block, unsupported method...); not a revert."""
+
+
+@dataclass
+class SimulationResult:
+    success: bool
+    block: str
+    return_data: str = ""
+    revert_reason: str | None = None
+    cached: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def decode_revert(data: str | None) -> str:
+    if not data or data == "0x":
+        return "reverted without reason"
+    raw = data.removeprefix("0x")
+    selector, body = raw[:8], bytes.fromhex(raw[8:])
+    from eth_abi import decode
+
+    try:
+        if selector == ERROR_SELECTOR:
+            return decode(["string"], body)[0]
+        if selector == PANIC_SELECTOR:
+            return f"panic 0x{decode(['uint256'], body)[0]:02x}"
+    except Exception:
+        pass
+    return f"custom error 0x{selector}"
+
+
+def _error_data(error: dict) -> str | None:
+    data = error.get("data")
+    if isinstance(data, dict):
+        data = data.get("data") or data.get("result")
+    return data if isinstance(data, str) else None
+
+
+def is_revert(error: dict) -> bool:
+    """Only execution reverts reject a trade; every other JSON-RPC error is a node problem."""
+    code = error.get("code")
+    message = str(error.get("message") or "").lower()
+    if code == 3 or any(text in message for text in REVERT_MESSAGES):
+        return True
+    data = _error_data(error)
+    return code in (-32000, -32603) and bool(data) and data.startswith("0x") and len(data) > 2
+
+
+class TxSimulator:
+    def __init__(self, rpc_url: str = RPC_URL, cache_size: int = SIMULATION_CACHE_SIZE) -> None:
+        self.client = get_provider_client("rpc", rpc_url, timeout=10)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, SimulationResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _params(self, txn: dict) -> dict:
+        params = {}
+        for key, name in (("from", "from"), ("to", "to"), ("gas", "gas"), ("value", "value")):
+            if txn.get(key) is not None:
+                value = txn[key]
+                params[name] = hex(value) if isinstance(value, int) else value
+        data = txn.get("data") or b""
+        params["data"] = "0x" + data.hex() if isinstance(data, bytes) else data
+        for key in ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas"):
+            if txn.get(key) is not None:
+                params[key] = hex(txn[key])
+        return params
+
+    def simulate(self, txn: dict, block: int | None = None) -> SimulationResult:
+        params = self._params(txn)
+        # Only a concrete block gives a repeatable result, so only those are cached.
+        block_tag = hex(block) if block is not None else "pending"
+        key = (params.get("to"), params["data"], params.get("value"), block_tag) if block is not None else None
+        if key is not None:
+            with self._lock:
+                hit = self._cache.get(key)
+                if hit:
+                    self._cache.move_to_end(key)
+                    CACHE_REQUESTS.labels(cache="simulation", result="hit").inc()
+                    return SimulationResult(**{**hit.to_dict(), "cached": True})
+            CACHE_REQUESTS.labels(cache="simulation", result="miss").inc()
+
+        body = {"jsonrpc": "2.0", "id": 1, "method": "eth_call", "params": [params, block_tag]}
+        response = self.client.post("", json=body, retry=True)
+        response.raise_for_status()
+        reply = response.json()
+        if "error" in reply:
+            error = reply["error"]
+            if not is_revert(error):
+                raise SimulationError(f"eth_call failed ({error.get('code')}): {error.get('message')}")
+            reason = decode_revert(_error_data(error))
+            if reason == "reverted without reason" and error.get("message"):
+                reason = error["message"]
+            result = SimulationResult(success=False, block=block_tag, revert_reason=reason)
+        else:
+            result = SimulationResult(success=True, block=block_tag, return_data=reply.get("result") or "0x")
+
+        if key is not None:
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
@@ -0,0 +1,231 @@
+import contextvars
+import functools
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from sqlalchemy import event
+
+from app.config import TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE, TRACE_SERVICE_NAME
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    spans: list["Span"] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, span: "Span") -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+@dataclass
+class Span:
+    name: str
+    trace: Trace
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1_000_000
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def open_span(name: str, **attributes: Any) -> Span | None:
+    parent = _current.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace, _new_id(64), parent.span_id, time.time_ns(), attributes=attributes)
+
+
+def close_span(span: Span, error: str | None = None) -> None:
+    span.end_ns = time.time_ns()
+    span.error = error
+    span.trace.add(span)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    child = open_span(name, **attributes)
+    if child is None:
+        yield None
+        return
+    token = _current.set(child)
+    error = None
+    try:
+        yield child
+    except Exception as exc:
+        error = repr(exc)
+        raise
+    finally:
+        _current.reset(token)
+        close_span(child, error)
+
+
+def traced(name: str | None = None):
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def propagate(fn: Callable) -> Callable:
+    """Bind fn to a copy of the caller's context so spans opened in a worker thread nest correctly."""
+    ctx = contextvars.copy_context()
+    return functools.partial(ctx.run, fn)
+
+
+def should_sample(force: bool = False) -> bool:
+    if force:
+        return True
+    return bool(TRACE_EXPORT_PATH) and random.random() < TRACE_SAMPLE_RATE
+
+
+@contextmanager
+def start_trace(name: str, *, sampled: bool, **attributes: Any) -> Iterator[Span | None]:
+    if not sampled:
+        yield None
+        return
+    root = Span(name, Trace(_new_id(128)), _new_id(64), None, time.time_ns(), attributes=attributes)
+    token = _current.set(root)
+    error = None
+    try:
+        yield root
+    except Exception as exc:
+        error = repr(exc)
+        raise
+    finally:
+        _current.reset(token)
+        close_span(root, error)
+        if TRACE_EXPORT_PATH:
+            export(root.trace)
+
+
+def breakdown(trace: Trace) -> list[dict[str, Any]]:
+    with trace._lock:
+        spans = sorted(trace.spans, key=lambda item: item.start_ns)
+    if not spans:
+        return []
+    origin = spans[0].start_ns
+    return [
+        {
+            "name": item.name,
+            "start_ms": round((item.start_ns - origin) / 1_000_000, 3),
+            "duration_ms": round(item.duration_ms, 3),
+            "span_id": item.span_id,
+            "parent_id": item.parent_id,
+            **({"error": item.error} if item.error else {}),
+        }
+        for item in spans
+    ]
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> dict:
+    with trace._lock:
+        spans = list(trace.spans)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [
+                            {
+                                "traceId": trace.trace_id,
+                                "spanId": item.span_id,
+                                **({"parentSpanId": item.parent_id} if item.parent_id else {}),
+                                "name": item.name,
+                                "kind": 2 if item.parent_id is None else 1,
+                                "startTimeUnixNano": str(item.start_ns),
+                                "endTimeUnixNano": str(item.end_ns),
+                                "attributes": [
+                                    {"key": key, "value": _otlp_value(value)} for key, value in item.attributes.items()
+                                ],
+                                "status": {"code": 2, "message": item.error} if item.error else {"code": 1},
+                            }
+                            for item in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def export(trace: Trace, path: str = TRACE_EXPORT_PATH) -> None:
+    line = json.dumps(to_otlp(trace))
+    try:
+        with _export_lock, open(path, "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+    except OSError as exc:
+        logger.warning("Trace export to %s failed: %s", path, exc)
+
+
+def instrument_engine(engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            context._trace_span = open_span("db.query", statement=statement[:200], executemany=executemany)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        child = getattr(context, "_trace_span", None)
+        if child is not None:
+            close_span(child)
+            context._trace_span = None
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        context = exception_context.execution_context
+        child = getattr(context, "_trace_span", None) if context is not None else None
+        if child is not None:
+            close_span(child, repr(exception_context.original_exception))
+            context._trace_span = None
@@ -3,6 +3,14 @@ pragma solidity ^0.8.20;
 
 contract DecisionLog {
     event DecisionLogged(address indexed caller, string tag, string message, uint256 timestamp);
+    event DecisionBatchAnchored(
+        address indexed caller,
+        bytes32 indexed root,
+        uint256 fromId,
+        uint256 toId,
+        uint256 count,
+        uint256 timestamp
+    );
 
     uint256 public decisionCount;
     string public lastTag;
@@ -16,4 +24,19 @@ contract DecisionLog {
         lastTimestamp = block.timestamp;
         emit DecisionLogged(msg.sender, tag, message, block.timestamp);
     }
+
+    function logDecisions(string[] calldata tags, string[] calldata messages) external {
+        require(tags.length == messages.length, "length mismatch");
+        uint256 count = tags.length;
+        for (uint256 i = 0; i < count; i++) {
+            emit DecisionLogged(msg.sender, tags[i], messages[i], block.timestamp);
+        }
+        decisionCount += count;
+    }
+
+    function anchorBatch(bytes32 root, uint256 fromId, uint256 toId, uint256 count) external {
+        require(count > 0, "empty batch");
+        decisionCount += count;
+        emit DecisionBatchAnchored(msg.sender, root, fromId, toId, count, block.timestamp);
+    }
 }
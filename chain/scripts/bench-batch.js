@@ -0,0 +1,43 @@
+const hre = require("hardhat");
+
+function getArg(name, fallback) {
+  const idx = process.argv.indexOf(`--${name}`);
+  if (idx === -1 || idx + 1 >= process.argv.length) {
+    return fallback;
+  }
+  return process.argv[idx + 1];
+}
+
+async function gasOf(txPromise) {
+  const tx = await txPromise;
+  const receipt = await tx.wait();
+  return receipt.gasUsed.toNumber();
+}
+
+async function main() {
+  const size = parseInt(process.env.BATCH_SIZE || getArg("size", "50"), 10);
+  const DecisionLog = await hre.ethers.getContractFactory("DecisionLog");
+  const decisionLog = await DecisionLog.deploy();
+  await decisionLog.deployed();
+
+  const tags = Array.from({ length: size }, () => "advise:accepted");
+  const messages = Array.from({ length: size }, (_, i) => `decision ${i + 1}`);
+
+  let single = 0;
+  for (let i = 0; i < size; i += 1) {
+    single += await gasOf(decisionLog.logDecision(tags[i], messages[i]));
+  }
+  const events = await gasOf(decisionLog.logDecisions(tags, messages));
+  const root = hre.ethers.utils.keccak256(hre.ethers.utils.toUtf8Bytes(messages.join("|")));
+  const merkle = await gasOf(decisionLog.anchorBatch(root, 1, size, size));
+
+  console.log(`Batch size: ${size}`);
+  console.log(`logDecision x${size}: ${single} gas total, ${Math.round(single / size)} per decision`);
+  console.log(`logDecisions(batch): ${events} gas total, ${Math.round(events / size)} per decision`);
+  console.log(`anchorBatch(merkle): ${merkle} gas total, ${Math.round(merkle / size)} per decision`);
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exitCode = 1;
+});
@@ -1,5 +1,6 @@
 import argparse
 import json
+import os
 import sys
 
 import httpx
@@ -12,6 +13,46 @@ def _request(method: str, base_url: str, path: str, payload: dict | None = None)
     print(json.dumps(response.json(), indent=2))
 
 
+def _admin(base_url: str, path: str, token: str | None, params: dict, out: str | None = None) -> None:
+    url = f"{base_url.rstrip('/')}{path}"
+    headers = {"X-Admin-Token": token or os.getenv("ADMIN_TOKEN", "")}
+    timeout = float(params.get("seconds", 10)) + 30
+    response = httpx.post(url, params=params, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    if out:
+        with open(out, "w", encoding="utf-8") as handle:
+            handle.write(response.text)
+        print(f"Wrote {out}")
+        return
+    if response.headers.get("content-type", "").startswith("application/json"):
+        print(json.dumps(response.json(), indent=2))
+    else:
+        print(response.text, end="")
+
+
+def _stream(base_url: str, path: str, payload: dict) -> None:
+    url = f"{base_url.rstrip('/')}{path}"
+    event = "message"
+    with httpx.stream("POST", url, json=payload, timeout=httpx.Timeout(20, read=None)) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:") :].strip()
+                continue
+            if not line.startswith("data:"):
+                continue
+            data = json.loads(line[len("data:") :].strip())
+            if event == "advice":
+                print(json.dumps(data, indent=2))
+                print("LLM: ", end="", flush=True)
+            elif event == "token":
+                print(data.get("text", ""), end="", flush=True)
+            elif event == "error":
+                print(f"\n[stream error] {data.get('detail', '')}", file=sys.stderr)
+            elif event == "done":
+                print()
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="BNB Chain AI Trading MVP CLI")
     parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API base URL")
@@ -40,6 +81,7 @@ def main() -> None:
     advise.add_argument("--max-drawdown", type=float, required=True)
     advise.add_argument("--objective", default="balanced growth")
     advise.add_argument("--user-id")
+    advise.add_argument("--stream", action="store_true", help="Stream LLM rationale as it is generated")
 
     user_trades = subparsers.add_parser("user-trades", help="Record user trade history")
     user_trades.add_argument("--user-id", required=True)
@@ -66,6 +108,24 @@ def main() -> None:
     mcp.add_argument("--trade-json", help="JSON string for trade intent")
     mcp.add_argument("--payload-json", default="{}", help="JSON string for extra payload")
 
+    profile = subparsers.add_parser("profile", help="Sample live worker stacks (admin)")
+    profile.add_argument("--seconds", type=float, default=10)
+    profile.add_argument("--interval-ms", type=float, default=5)
+    profile.add_argument("--include-idle", action="store_true")
+    profile.add_argument("--out", help="Write collapsed stacks here (flamegraph.pl / speedscope input)")
+    profile.add_argument("--admin-token", help="Defaults to ADMIN_TOKEN from the environment")
+
+    allocations = subparsers.add_parser("allocations", help="Per-request allocation stats for a route (admin)")
+    allocations.add_argument("--route", required=True, help="Path prefix, e.g. /data/search")
+    allocations.add_argument("--seconds", type=float, default=30)
+    allocations.add_argument("--top", type=int, default=25)
+    allocations.add_argument("--admin-token", help="Defaults to ADMIN_TOKEN from the environment")
+
+    maintenance = subparsers.add_parser("maintenance", help="Build the vector index and ANALYZE in the background (admin)")
+    maintenance.add_argument("--rebuild-index", action="store_true", help="Drop and rebuild with the current IVFFLAT_LISTS")
+    maintenance.add_argument("--skip-analyze", action="store_true")
+    maintenance.add_argument("--admin-token", help="Defaults to ADMIN_TOKEN from the environment")
+
     args = parser.parse_args()
     base_url = args.base_url
 
@@ -110,6 +170,18 @@ def main() -> None:
             print("Step 6: scorecard")
             _request("GET", base_url, "/scorecard")
             return
+        if args.command == "profile":
+            params = {"seconds": args.seconds, "interval_ms": args.interval_ms, "include_idle": args.include_idle}
+            _admin(base_url, "/admin/profile", args.admin_token, params, args.out)
+            return
+        if args.command == "allocations":
+            params = {"route": args.route, "seconds": args.seconds, "top": args.top}
+            _admin(base_url, "/admin/allocations", args.admin_token, params)
+            return
+        if args.command == "maintenance":
+            params = {"rebuild_index": args.rebuild_index, "analyze": not args.skip_analyze}
+            _admin(base_url, "/admin/maintenance", args.admin_token, params)
+            return
         if args.command == "insights":
             _request("GET", base_url, "/data/insights")
             return
@@ -143,6 +215,9 @@ def main() -> None:
             }
             if args.user_id:
                 payload["user_id"] = args.user_id
+            if args.stream:
+                _stream(base_url, "/advisor/recommend/stream", payload)
+                return
             _request(
                 "POST",
                 base_url,
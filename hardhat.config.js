@@ -9,6 +9,10 @@ const { BSC_TESTNET_RPC_URL, BSC_MAINNET_RPC_URL, DEPLOYER_PRIVATE_KEY, BSCSCAN_
 module.exports = {
   solidity: "0.8.20",
   networks: {
+    localhost: {
+      url: "http://127.0.0.1:8545",
+      chainId: 31337,
+    },
     bscTestnet: {
       url: BSC_TESTNET_RPC_URL || "",
       chainId: 97,
@@ -0,0 +1,39 @@
+import threading
+import time
+
+from provider_stubs.config import FaultProfile, StubConfig
+from provider_stubs.server import create_app, stub_env
+
+__all__ = ["FaultProfile", "StubConfig", "StubServer", "create_app", "stub_env"]
+
+
+class StubServer:
+    """Runs the stub app on a background thread; use as a context manager from tests or scripts."""
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", port: int = 9100) -> None:
+        import uvicorn
+
+        self.base_url = f"http://{host}:{port}"
+        self._server = uvicorn.Server(
+            uvicorn.Config(create_app(config), host=host, port=port, log_level="warning", lifespan="off")
+        )
+        self._thread = threading.Thread(target=self._server.run, name="provider-stubs", daemon=True)
+
+    def start(self, timeout: float = 10) -> "StubServer":
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"stub server failed to start on {self.base_url}")
+            time.sleep(0.05)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
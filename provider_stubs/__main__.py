@@ -0,0 +1,57 @@
+import argparse
+
+import uvicorn
+
+from provider_stubs.config import FaultProfile, StubConfig
+from provider_stubs.server import create_app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve BscScan, Bitquery, OpenAI, Ollama and JSON-RPC stubs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Median/base latency for every provider")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--distribution", default="fixed", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-limit-rps", type=float, default=0.0, help="Per-provider token bucket; 0 disables")
+    parser.add_argument("--payload-size", type=int, default=20, help="Rows per page / tokens per completion")
+    parser.add_argument("--total-txs", type=int, default=250, help="Transactions per address across all pages")
+    parser.add_argument("--embed-dim", type=int, default=384)
+    parser.add_argument("--block-time", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="PROVIDER.KEY=VALUE",
+        help="Per-provider override, e.g. --set openai.latency_ms=400 --set rpc.error_rate=0.05",
+    )
+    args = parser.parse_args()
+
+    config = StubConfig(
+        default=FaultProfile(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            distribution=args.distribution,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            rate_limit_rps=args.rate_limit_rps,
+            payload_size=args.payload_size,
+        ),
+        seed=args.seed,
+        embed_dim=args.embed_dim,
+        total_txs=args.total_txs,
+        block_time_sec=args.block_time,
+    )
+    for spec in args.set:
+        try:
+            config.set(spec)
+        except ValueError as exc:
+            parser.error(str(exc))
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field, fields, replace
+
+PROVIDERS = ("bscscan", "bitquery", "openai", "ollama", "rpc")
+
+
+@dataclass
+class FaultProfile:
+    """Latency, error and payload knobs applied to one stubbed provider."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    distribution: str = "fixed"  # fixed | uniform | normal | lognormal
+    error_rate: float = 0.0
+    error_status: int = 503
+    rate_limit_rps: float = 0.0
+    payload_size: int = 20
+
+    def sample_latency(self, rng: random.Random) -> float:
+        base = self.latency_ms
+        if self.distribution == "uniform":
+            value = rng.uniform(max(0.0, base - self.jitter_ms), base + self.jitter_ms)
+        elif self.distribution == "normal":
+            value = rng.gauss(base, self.jitter_ms)
+        elif self.distribution == "lognormal":
+            # latency_ms is the median; jitter_ms widens the tail.
+            sigma = self.jitter_ms / base if base else 0.0
+            value = base * rng.lognormvariate(0.0, sigma)
+        else:
+            value = base
+        return max(0.0, value) / 1000
+
+
+class TokenBucket:
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+@dataclass
+class StubConfig:
+    default: FaultProfile = field(default_factory=FaultProfile)
+    overrides: dict[str, FaultProfile] = field(default_factory=dict)
+    seed: int = 7
+    embed_dim: int = 384
+    total_txs: int = 250
+    block_time_sec: float = 3.0
+
+    def profile(self, provider: str) -> FaultProfile:
+        return self.overrides.get(provider, self.default)
+
+    def set(self, spec: str) -> None:
+        """Apply an override such as 'openai.latency_ms=400' or 'rpc.error_rate=0.05'."""
+        key, _, value = spec.partition("=")
+        provider, _, name = key.partition(".")
+        if provider not in PROVIDERS:
+            raise ValueError(f"unknown provider '{provider}'; choose from {PROVIDERS}")
+        kinds = {item.name: item.type for item in fields(FaultProfile)}
+        if name not in kinds:
+            raise ValueError(f"unknown setting '{name}'; choose from {sorted(kinds)}")
+        caster = kinds[name]
+        profile = self.overrides.get(provider) or replace(self.default)
+        setattr(profile, name, caster(value))
+        self.overrides[provider] = profile
@@ -0,0 +1,332 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import AsyncIterator
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from provider_stubs.config import PROVIDERS, StubConfig, TokenBucket
+
+BSCSCAN_RATE_LIMIT = {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}
+LOREM = (
+    "Keep position sizes small, favour liquid BNB pairs, rebalance weekly and cut losers quickly "
+    "while trimming winners into strength."
+).split()
+
+
+def _digest(*parts: object) -> bytes:
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).digest()
+
+
+def _address(*parts: object) -> str:
+    return "0x" + _digest(*parts)[:20].hex()
+
+
+def _vector(text: str, dim: int) -> list[float]:
+    rng = random.Random(int.from_bytes(_digest(text)[:8], "big"))
+    values = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = sum(value * value for value in values) ** 0.5 or 1.0
+    return [value / norm for value in values]
+
+
+def _words(count: int, seed: str) -> list[str]:
+    rng = random.Random(seed)
+    return [rng.choice(LOREM) for _ in range(max(1, count))]
+
+
+class ChainState:
+    """Just enough chain to satisfy the execution client: blocks advance with wall time, txs mine after one block."""
+
+    def __init__(self, block_time_sec: float) -> None:
+        self.block_time_sec = block_time_sec
+        self.genesis = time.time()
+        self.start_block = 40_000_000
+        self.sent: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def block_number(self) -> int:
+        return self.start_block + int((time.time() - self.genesis) / max(self.block_time_sec, 0.001))
+
+    def send(self, raw: str) -> str:
+        tx_hash = "0x" + _digest(raw).hex()
+        with self._lock:
+            self.sent.setdefault(tx_hash, self.block_number())
+        return tx_hash
+
+    def nonce(self) -> int:
+        with self._lock:
+            return len(self.sent)
+
+    def receipt(self, tx_hash: str) -> dict | None:
+        with self._lock:
+            sent_at = self.sent.get(tx_hash)
+        if sent_at is None or self.block_number() <= sent_at:
+            return None
+        return {
+            "transactionHash": tx_hash,
+            "blockNumber": hex(sent_at + 1),
+            "blockHash": "0x" + _digest("block", sent_at + 1).hex(),
+            "status": "0x1",
+            "gasUsed": hex(64_000),
+            "cumulativeGasUsed": hex(64_000),
+            "effectiveGasPrice": hex(3_000_000_000),
+            "logs": [],
+        }
+
+
+def create_app(config: StubConfig | None = None) -> FastAPI:
+    config = config or StubConfig()
+    app = FastAPI(title="Provider stubs")
+    rng = random.Random(config.seed)
+    buckets = {name: TokenBucket(config.profile(name).rate_limit_rps) for name in PROVIDERS}
+    counters = {name: {"requests": 0, "errors": 0, "rate_limited": 0} for name in PROVIDERS}
+    chain = ChainState(config.block_time_sec)
+
+    async def inject(provider: str) -> str | None:
+        """Sleep for the sampled latency, then return 'rate-limited', 'error' or None."""
+        profile = config.profile(provider)
+        counters[provider]["requests"] += 1
+        delay = profile.sample_latency(rng)
+        if delay:
+            await asyncio.sleep(delay)
+        if not buckets[provider].take():
+            counters[provider]["rate_limited"] += 1
+            return "rate-limited"
+        if profile.error_rate and rng.random() < profile.error_rate:
+            counters[provider]["errors"] += 1
+            return "error"
+        return None
+
+    def failure(provider: str, outcome: str) -> JSONResponse:
+        if outcome == "rate-limited":
+            return JSONResponse({"error": "rate limit exceeded"}, status_code=429, headers={"Retry-After": "1"})
+        status = config.profile(provider).error_status
+        return JSONResponse({"error": f"injected {provider} failure"}, status_code=status)
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok", "counters": counters}
+
+    @app.get("/bscscan/api")
+    async def bscscan(request: Request):
+        outcome = await inject("bscscan")
+        if outcome == "rate-limited":
+            # BscScan reports throttling in-band with HTTP 200.
+            return BSCSCAN_RATE_LIMIT
+        if outcome:
+            return failure("bscscan", outcome)
+        params = request.query_params
+        address = params.get("address", "").lower()
+        page = max(1, int(params.get("page", 1)))
+        offset = int(params.get("offset", 0)) or config.profile("bscscan").payload_size
+        start = (page - 1) * offset
+        stop = min(config.total_txs, start + offset)
+        if start >= config.total_txs:
+            return {"status": "0", "message": "No transactions found", "result": []}
+        head = 39_000_000
+        result = [
+            {
+                "blockNumber": str(head - index * 7),
+                "hash": "0x" + _digest("bscscan", address, index).hex(),
+                "from": address,
+                "to": _address("to", address, index % 9),
+                "value": str(int.from_bytes(_digest("value", address, index)[:6], "big") * 10**6),
+                "gas": "21000",
+                "isError": "0",
+            }
+            for index in range(start, stop)
+        ]
+        return {"status": "1", "message": "OK", "result": result}
+
+    @app.post("/bitquery/graphql")
+    async def bitquery(request: Request):
+        outcome = await inject("bitquery")
+        if outcome == "rate-limited":
+            return JSONResponse({"errors": [{"message": "Too many requests"}]}, status_code=429)
+        if outcome:
+            return failure("bitquery", outcome)
+        body = await request.json()
+        variables = body.get("variables") or {}
+        address = str(variables.get("address", "")).lower()
+        match = re.search(r"limit:\s*(\d+)", body.get("query", ""))
+        limit = int(variables.get("limit") or (match.group(1) if match else config.profile("bitquery").payload_size))
+        offset = int(variables.get("offset") or 0)
+        transactions = [
+            {
+                "hash": "0x" + _digest("bitquery", address, index).hex(),
+                "block": {"height": 39_000_000 - index * 5},
+                "to": {"address": _address("to", address, index % 9)},
+                "value": int.from_bytes(_digest("value", address, index)[:3], "big") / 1000,
+            }
+            for index in range(offset, min(config.total_txs, offset + limit))
+        ]
+        return {"data": {"ethereum": {"transactions": transactions}}}
+
+    @app.post("/openai/v1/chat/completions")
+    async def openai_chat(request: Request):
+        outcome = await inject("openai")
+        if outcome:
+            return failure("openai", outcome)
+        body = await request.json()
+        prompt = json.dumps(body.get("messages", []))
+        words = _words(config.profile("openai").payload_size, prompt)
+        if body.get("stream"):
+
+            async def chunks() -> AsyncIterator[str]:
+                for word in words:
+                    delta = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+                    yield f"data: {json.dumps(delta)}\n\n"
+                    await asyncio.sleep(0)
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}}],
+        }
+
+    @app.post("/openai/v1/embeddings")
+    async def openai_embeddings(request: Request):
+        outcome = await inject("openai")
+        if outcome:
+            return failure("openai", outcome)
+        body = await request.json()
+        inputs = body.get("input")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        dim = int(body.get("dimensions") or config.embed_dim)
+        return {
+            "object": "list",
+            "model": body.get("model", "stub"),
+            "data": [
+                {"object": "embedding", "index": index, "embedding": _vector(str(text), dim)}
+                for index, text in enumerate(inputs)
+            ],
+        }
+
+    @app.post("/ollama/api/chat")
+    @app.post("/ollama/api/generate")
+    async def ollama_generate(request: Request):
+        outcome = await inject("ollama")
+        if outcome:
+            return failure("ollama", outcome)
+        body = await request.json()
+        chat = request.url.path.endswith("/chat")
+        seed = json.dumps(body.get("messages") if chat else body.get("prompt"))
+        words = _words(config.profile("ollama").payload_size, seed)
+
+        def frame(text: str, done: bool) -> dict:
+            if chat:
+                return {"message": {"role": "assistant", "content": text}, "done": done}
+            return {"response": text, "done": done}
+
+        if body.get("stream", True):
+
+            async def lines() -> AsyncIterator[str]:
+                for word in words:
+                    yield json.dumps(frame(word + " ", False)) + "\n"
+                    await asyncio.sleep(0)
+                yield json.dumps(frame("", True)) + "\n"
+
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+        return frame(" ".join(words), True)
+
+    @app.post("/ollama/api/embeddings")
+    async def ollama_embeddings(request: Request):
+        outcome = await inject("ollama")
+        if outcome:
+            return failure("ollama", outcome)
+        body = await request.json()
+        return {"embedding": _vector(str(body.get("prompt")), config.embed_dim)}
+
+    def rpc_result(method: str, params: list):
+        if method == "eth_chainId":
+            return hex(97)
+        if method == "net_version":
+            return "97"
+        if method == "eth_blockNumber":
+            return hex(chain.block_number())
+        if method == "eth_getTransactionCount":
+            return hex(chain.nonce())
+        if method == "eth_getBalance":
+            return hex(50 * 10**18)
+        if method == "eth_gasPrice":
+            return hex(3_000_000_000)
+        if method == "eth_maxPriorityFeePerGas":
+            return hex(1_000_000_000)
+        if method == "eth_estimateGas":
+            data = (params[0] or {}).get("data") or (params[0] or {}).get("input") or "0x"
+            return hex(21_000 + 16 * (len(data) - 2) // 2 + 30_000 * (len(data) > 2))
+        if method == "eth_call":
+            return "0x" + (10**24).to_bytes(32, "big").hex()
+        if method == "eth_feeHistory":
+            count = int(params[0], 16) if isinstance(params[0], str) else int(params[0])
+            head = chain.block_number()
+            percentiles = params[2] if len(params) > 2 else []
+            return {
+                "oldestBlock": hex(head - count + 1),
+                "baseFeePerGas": [hex(1_000_000_000)] * (count + 1),
+                "gasUsedRatio": [0.5] * count,
+                "reward": [[hex(1_000_000_000 + 500_000_000 * i) for i, _ in enumerate(percentiles)]] * count,
+            }
+        if method == "eth_getBlockByNumber":
+            number = chain.block_number()
+            return {
+                "number": hex(number),
+                "hash": "0x" + _digest("block", number).hex(),
+                "baseFeePerGas": hex(1_000_000_000),
+                "gasLimit": hex(140_000_000),
+                "timestamp": hex(int(time.time())),
+                "transactions": [],
+            }
+        if method == "eth_sendRawTransaction":
+            return chain.send(params[0])
+        if method == "eth_getTransactionReceipt":
+            return chain.receipt(params[0])
+        raise KeyError(method)
+
+    def rpc_reply(item: dict) -> dict:
+        try:
+            result = rpc_result(item.get("method", ""), item.get("params") or [])
+        except KeyError:
+            return {"jsonrpc": "2.0", "id": item.get("id"), "error": {"code": -32601, "message": "method not found"}}
+        return {"jsonrpc": "2.0", "id": item.get("id"), "result": result}
+
+    @app.post("/rpc")
+    async def rpc(request: Request):
+        outcome = await inject("rpc")
+        if outcome:
+            return failure("rpc", outcome)
+        body = await request.json()
+        if isinstance(body, list):
+            return [rpc_reply(item) for item in body]
+        return rpc_reply(body)
+
+    return app
+
+
+def stub_env(base_url: str, vector_dim: int = 384) -> dict[str, str]:
+    """Environment that points every external client of the API at a running stub server."""
+    base_url = base_url.rstrip("/")
+    return {
+        "DATA_PROVIDER": "bscscan",
+        "BSCSCAN_ENDPOINT": f"{base_url}/bscscan/api",
+        "BSCSCAN_API_KEY": "stub",
+        "BITQUERY_ENDPOINT": f"{base_url}/bitquery/graphql",
+        "BITQUERY_API_KEY": "stub",
+        "LLM_PROVIDER": "openai",
+        "LLM_API_BASE": f"{base_url}/openai/v1",
+        "LLM_API_KEY": "stub",
+        "EMBED_PROVIDER": "openai",
+        "EMBED_API_BASE": f"{base_url}/openai/v1",
+        "EMBED_API_KEY": "stub",
+        "OLLAMA_BASE": f"{base_url}/ollama",
+        "RPC_URL": f"{base_url}/rpc",
+        "VECTOR_DIM": str(vector_dim),
+    }
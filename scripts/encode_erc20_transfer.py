@@ -1,18 +1,16 @@
 #!/usr/bin/env python
 import argparse
+import sys
+from pathlib import Path
 
-from eth_abi import encode
-from web3 import Web3
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.services.calldata import encode_transfer  # noqa: E402
 
 
 def build_transfer_call_data(to_address: str, amount: int) -> str:
-    if amount < 0:
-        raise ValueError("amount must be >= 0")
-    if not Web3.is_address(to_address):
-        raise ValueError("invalid recipient address")
-    selector = Web3.keccak(text="transfer(address,uint256)")[:4]
-    encoded_args = encode(["address", "uint256"], [Web3.to_checksum_address(to_address), amount])
-    return "0x" + (selector + encoded_args).hex()
+    return "0x" + encode_transfer(to_address, amount).hex()
 
 
 def main() -> None:
@@ -21,8 +19,10 @@ def main() -> None:
     parser.add_argument("--amount", required=True, help="Token amount in base units")
     args = parser.parse_args()
 
-    amount = int(args.amount)
-    call_data = build_transfer_call_data(args.to, amount)
+    try:
+        call_data = build_transfer_call_data(args.to, int(args.amount))
+    except ValueError as exc:
+        parser.error(str(exc))
     print(call_data)
 
 
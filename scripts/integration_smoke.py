@@ -3,9 +3,12 @@ import argparse
 import json
 import sys
 import uuid
+from pathlib import Path
 
 import httpx
 
+ROOT = Path(__file__).resolve().parent.parent
+
 
 def request(method: str, base_url: str, path: str, payload: dict | None = None) -> dict:
     url = f"{base_url.rstrip('/')}{path}"
@@ -24,9 +27,87 @@ def request(method: str, base_url: str, path: str, payload: dict | None = None)
     return {}
 
 
+def expect_status(method: str, base_url: str, path: str, status: int, payload: dict | None = None) -> dict:
+    url = f"{base_url.rstrip('/')}{path}"
+    response = httpx.request(method, url, json=payload, timeout=20)
+    if response.status_code != status:
+        raise RuntimeError(f"{method} {path} returned {response.status_code}, expected {status}: {response.text}")
+    return response.json() if response.content else {}
+
+
+MAINNET_CHAIN_IDS = {56}
+
+
+def check_anchor(send: bool) -> None:
+    """Run one anchoring pass in-process against DATABASE_URL and verify the batch it recorded.
+    Without send, the pass runs against a client that never signs, so only the release path is checked."""
+    sys.path.insert(0, str(ROOT))
+    from sqlalchemy import select
+
+    from app.db import SessionLocal
+    from app.models import MCPDecision
+    from app.services.decision_anchor import (
+        DecisionAnchorService,
+        decision_leaf,
+        merkle_proof,
+        merkle_root,
+        verify_merkle_proof,
+    )
+    from app.services.execution_client import ExecutionClient, ExecutionResult
+
+    class DryRunClient:
+        def transact(self, *args, **kwargs) -> ExecutionResult:
+            return ExecutionResult(tx_hash="", status="dry-run")
+
+    if send:
+        exec_client = ExecutionClient()
+        if exec_client.web3 and exec_client.chain_id in MAINNET_CHAIN_IDS:
+            raise RuntimeError(f"Refusing to send an anchor transaction on mainnet (chain id {exec_client.chain_id})")
+    else:
+        exec_client = DryRunClient()
+    anchor = DecisionAnchorService(SessionLocal, exec_client, mode="merkle").anchor_pending()
+    if anchor is None:
+        print("Anchor check skipped: no unanchored decisions.")
+        return
+    with SessionLocal() as db:
+        rows = (
+            db.execute(select(MCPDecision).where(MCPDecision.anchor_id == anchor.id).order_by(MCPDecision.id))
+            .scalars()
+            .all()
+        )
+    if anchor.status == "sending":
+        print(f"Anchor {anchor.id} send failed after signing; {anchor.tx_hash} is left to the confirmation tracker.")
+        return
+    if anchor.status != "submitted":
+        if rows:
+            raise RuntimeError(f"Anchor {anchor.id} was not sent ({anchor.status}) but claimed {len(rows)} decisions")
+        print(f"Anchor not sent ({anchor.status}); {anchor.count} decisions stay queued for the next batch.")
+        return
+    if len(rows) != anchor.count:
+        raise RuntimeError(f"Anchor {anchor.id} covers {anchor.count} decisions but {len(rows)} carry its id")
+    leaves = [decision_leaf(row) for row in rows]
+    root = merkle_root(leaves)
+    if "0x" + root.hex() != anchor.root:
+        raise RuntimeError(f"Anchor {anchor.id} root {anchor.root} does not match its decisions")
+    for index, leaf in enumerate(leaves):
+        if not verify_merkle_proof(leaf, merkle_proof(leaves, index), root):
+            raise RuntimeError(f"Merkle proof failed for decision {rows[index].id}")
+    print(f"Anchored {anchor.count} decisions in {anchor.tx_hash}; every proof verifies.")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run API integration smoke checks.")
     parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument(
+        "--anchor",
+        action="store_true",
+        help="Also run one decision-anchoring pass in-process (needs DATABASE_URL); nothing is sent without --yes-send",
+    )
+    parser.add_argument(
+        "--yes-send",
+        action="store_true",
+        help="With --anchor, really send the anchor transaction (RPC settings required; mainnet is refused)",
+    )
     args = parser.parse_args()
 
     base_url = args.base_url
@@ -74,6 +155,22 @@ def main() -> None:
     if "plan" not in plan:
         raise RuntimeError(f"Plan response missing plan: {plan}")
 
+    recipient = "0x" + "11" * 20
+    calldata = request(
+        "POST",
+        base_url,
+        "/execute/calldata",
+        {"calls": [{"method": "transfer", "args": {"to": recipient, "amount": 1_000_000}}]},
+    )
+    expected = "0xa9059cbb" + "00" * 12 + "11" * 20 + (1_000_000).to_bytes(32, "big").hex()
+    if calldata.get("call_data") != [expected]:
+        raise RuntimeError(f"Calldata response mismatch: {calldata}")
+    for bad_args in (
+        {"to": recipient, "amount": 2**256},
+        {"to": "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAeD", "amount": 1},
+    ):
+        expect_status("POST", base_url, "/execute/calldata", 400, {"calls": [{"method": "transfer", "args": bad_args}]})
+
     mcp_advise = request(
         "POST",
         base_url,
@@ -104,10 +201,20 @@ def main() -> None:
     if "data" not in mcp_execute:
         raise RuntimeError(f"MCP execute failed: {mcp_execute}")
 
+    expect_status("GET", base_url, f"/execute/0x{uuid.uuid4().hex * 2}", 404)
+    submitted_hash = mcp_execute["data"].get("tx_hash")
+    if submitted_hash:
+        execution = request("GET", base_url, f"/execute/{submitted_hash}")
+        if execution.get("status") not in {"submitted", "mined", "confirmed", "failed", "replaced", "dropped"}:
+            raise RuntimeError(f"Execution status response unexpected: {execution}")
+
     scorecard = request("GET", base_url, "/scorecard")
     if "overall_score" not in scorecard:
         raise RuntimeError(f"Scorecard response missing overall_score: {scorecard}")
 
+    if args.anchor:
+        check_anchor(send=args.yes_send)
+
     print("Integration smoke checks passed.")
 
 
@@ -0,0 +1,106 @@
+import pytest
+from eth_abi import decode
+from eth_utils import keccak
+
+from app.services.calldata import (
+    SELECTORS,
+    UINT256_MAX,
+    encode_batch,
+    encode_call,
+    normalize_address,
+)
+
+SIGNATURES = {
+    "transfer": "transfer(address,uint256)",
+    "approve": "approve(address,uint256)",
+    "transferFrom": "transferFrom(address,address,uint256)",
+    "balanceOf": "balanceOf(address)",
+    "allowance": "allowance(address,address)",
+    "swapExactTokensForTokens": "swapExactTokensForTokens(uint256,uint256,address[],address,uint256)",
+    "swapExactETHForTokens": "swapExactETHForTokens(uint256,address[],address,uint256)",
+}
+CHECKSUMMED = "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed"
+RECIPIENT = "0x" + "11" * 20
+TOKEN_A = "0x" + "22" * 20
+TOKEN_B = "0x" + "33" * 20
+
+
+@pytest.mark.parametrize("method", sorted(SIGNATURES))
+def test_selectors_match_signatures(method):
+    assert SELECTORS[method] == keccak(text=SIGNATURES[method])[:4]
+
+
+def test_transfer_layout():
+    data = encode_call("transfer", {"to": RECIPIENT, "amount": 1_000_000})
+    assert data.hex() == "a9059cbb" + "00" * 12 + "11" * 20 + (1_000_000).to_bytes(32, "big").hex()
+
+
+def test_amount_accepts_decimal_and_hex_strings():
+    as_int = encode_call("approve", {"spender": RECIPIENT, "amount": 255})
+    assert encode_call("approve", {"spender": RECIPIENT, "amount": "255"}) == as_int
+    assert encode_call("approve", {"spender": RECIPIENT, "amount": "0xff"}) == as_int
+
+
+@pytest.mark.parametrize("amount", [-1, UINT256_MAX + 1, 1.5, True, None, "lots"])
+def test_invalid_amounts_raise_value_error(amount):
+    with pytest.raises(ValueError):
+        encode_call("transfer", {"to": RECIPIENT, "amount": amount})
+
+
+def test_checksum_is_enforced_for_mixed_case():
+    assert normalize_address(CHECKSUMMED) == CHECKSUMMED.lower()
+    assert normalize_address(CHECKSUMMED.upper().replace("0X", "0x")) == CHECKSUMMED.lower()
+    with pytest.raises(ValueError, match="checksum"):
+        normalize_address(CHECKSUMMED[:-1] + CHECKSUMMED[-1].swapcase())
+
+
+@pytest.mark.parametrize("address", ["0x1234", "11" * 20, "0x" + "zz" * 20, None])
+def test_malformed_addresses_raise_value_error(address):
+    with pytest.raises(ValueError):
+        normalize_address(address)
+
+
+def test_swap_round_trips_through_abi():
+    args = {
+        "amount_in": 10**18,
+        "amount_out_min": 5,
+        "path": [TOKEN_A, CHECKSUMMED],
+        "to": RECIPIENT,
+        "deadline": 1_700_000_000,
+    }
+    data = encode_call("swapExactTokensForTokens", args)
+    assert data[:4] == SELECTORS["swapExactTokensForTokens"]
+    amount_in, amount_out_min, path, to, deadline = decode(
+        ["uint256", "uint256", "address[]", "address", "uint256"], data[4:]
+    )
+    assert (amount_in, amount_out_min, deadline) == (10**18, 5, 1_700_000_000)
+    assert [hop.lower() for hop in path] == [TOKEN_A, CHECKSUMMED.lower()]
+    assert to.lower() == RECIPIENT
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        {"amount_out_min": UINT256_MAX + 1, "path": [TOKEN_A, TOKEN_B], "to": RECIPIENT, "deadline": 1},
+        {"amount_out_min": 1, "path": [TOKEN_A, CHECKSUMMED.lower()[:-1] + "D"], "to": RECIPIENT, "deadline": 1},
+        {"amount_out_min": 1, "path": [TOKEN_A], "to": RECIPIENT, "deadline": 1},
+        {"amount_out_min": 1, "path": TOKEN_A, "to": RECIPIENT, "deadline": 1},
+    ],
+)
+def test_swap_rejects_bad_input_as_value_error(args):
+    # Anything eth_abi would reject must surface as ValueError so the API answers 400, not 500.
+    with pytest.raises(ValueError):
+        encode_call("swapExactETHForTokens", args)
+
+
+def test_missing_argument_and_unknown_method():
+    with pytest.raises(ValueError, match="missing argument"):
+        encode_call("transfer", {"to": RECIPIENT})
+    with pytest.raises(ValueError, match="unsupported method"):
+        encode_call("mint", {})
+
+
+def test_encode_batch_preserves_order():
+    calls = [("transfer", {"to": RECIPIENT, "amount": 1}), ("approve", {"spender": TOKEN_A, "amount": 2})]
+    encoded = encode_batch(calls)
+    assert [data[:4] for data in encoded] == [SELECTORS["transfer"], SELECTORS["approve"]]
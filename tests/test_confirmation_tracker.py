@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, Execution
+from app.services import confirmation_tracker as tracker_module
+from app.services.confirmation_tracker import ConfirmationTracker
+
+SENDER = "0x" + "aa" * 20
+OLD = datetime.utcnow() - timedelta(days=1)
+
+
+@pytest.fixture
+def tracker():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[Execution.__table__])
+    tracker = ConfirmationTracker(rpc_url="http://rpc.invalid")
+    tracker.session_factory = sessionmaker(bind=engine)
+    return tracker
+
+
+@pytest.fixture
+def rpc(monkeypatch, fake_rpc):
+    def build(*bodies):
+        client = fake_rpc(*bodies)
+        monkeypatch.setattr(tracker_module, "get_provider_client", lambda *args, **kwargs: client)
+        return client
+
+    return build
+
+
+def _track(tracker: ConfirmationTracker, tx_hash: str) -> None:
+    with tracker.session_factory() as db:
+        tracker.track(tx_hash, SENDER, None, db)
+    tracker._pending[tx_hash].submitted_at = OLD
+
+
+def _statuses(tracker: ConfirmationTracker) -> dict[str, str]:
+    with tracker.session_factory() as db:
+        return dict(db.execute(select(Execution.tx_hash, Execution.status)).all())
+
+
+def test_errored_receipt_lookup_never_marks_a_tx_dropped(tracker, rpc):
+    _track(tracker, "0x01")
+    _track(tracker, "0x02")
+    rpc(
+        [{"id": 0, "result": "0x10"}, {"id": 1, "result": "0x0"}],
+        [{"id": 0, "error": {"code": -32005, "message": "limit exceeded"}}, {"id": 1, "result": None}],
+    )
+    tracker.poll()
+    # Only the genuinely null receipt ages out; the errored one is retried on the next poll.
+    assert _statuses(tracker) == {"0x01": "submitted", "0x02": "dropped"}
+    assert "0x01" in tracker._pending
+
+
+def test_single_object_batch_reply_falls_back_to_single_calls(tracker, rpc):
+    _track(tracker, "0x01")
+    receipt = {"blockNumber": "0x10", "status": "0x1", "gasUsed": "0x5208"}
+    client = rpc(
+        {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch requests are disabled"}},
+        {"id": 0, "result": "0x20"},
+        {"id": 1, "result": "0x1"},
+        {"id": 0, "result": receipt},
+    )
+    tracker.poll()
+    assert _statuses(tracker) == {"0x01": "confirmed"}
+    assert [call["method"] for call in client.calls[1:3]] == ["eth_blockNumber", "eth_getTransactionCount"]
@@ -0,0 +1,12 @@
+import pytest
+
+from app.services.container import ServiceContainer
+from app.services.metrics import SERVICE_CONSTRUCTION
+
+
+def test_construction_times_are_exported():
+    services = ServiceContainer()
+    services.orchestrator(None)
+    for name in ("llm_advisor", "exec_agent", "exec_client", "orchestrator"):
+        exported_ms = SERVICE_CONSTRUCTION.labels(service=name).value() * 1000
+        assert exported_ms == pytest.approx(services.construction_ms[name], abs=0.001)
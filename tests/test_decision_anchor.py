@@ -0,0 +1,164 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from eth_utils import keccak
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, DecisionAnchor, Execution, MCPDecision
+from app.services.confirmation_tracker import ConfirmationTracker
+from app.services.decision_anchor import (
+    DecisionAnchorService,
+    decision_leaf,
+    merkle_proof,
+    merkle_root,
+    verify_merkle_proof,
+)
+from app.services.execution_client import ExecutionResult
+
+SENDER = "0x" + "aa" * 20
+TX_HASH = "0x" + "cd" * 32
+
+
+def _leaves(count: int) -> list[bytes]:
+    return [keccak(text=f"decision-{index}") for index in range(count)]
+
+
+def test_single_leaf_is_its_own_root():
+    leaf = _leaves(1)[0]
+    assert merkle_root([leaf]) == leaf
+    assert merkle_proof([leaf], 0) == []
+    assert verify_merkle_proof(leaf, [], leaf)
+
+
+def test_two_leaves_use_sorted_pair_hashing():
+    left, right = _leaves(2)
+    low, high = sorted((left, right))
+    assert merkle_root([left, right]) == keccak(low + high)
+    assert merkle_root([right, left]) == merkle_root([left, right])
+
+
+@pytest.mark.parametrize("count", [2, 3, 4, 5, 7, 8, 9, 16, 17])
+def test_every_leaf_proves_against_the_root(count):
+    leaves = _leaves(count)
+    root = merkle_root(leaves)
+    for index, leaf in enumerate(leaves):
+        assert verify_merkle_proof(leaf, merkle_proof(leaves, index), root)
+
+
+def test_tampered_leaf_or_proof_fails():
+    leaves = _leaves(5)
+    root = merkle_root(leaves)
+    proof = merkle_proof(leaves, 2)
+    assert not verify_merkle_proof(keccak(text="forged"), proof, root)
+    assert not verify_merkle_proof(leaves[2], proof[:-1], root)
+    assert not verify_merkle_proof(leaves[2], merkle_proof(leaves, 3), root)
+
+
+def test_empty_and_out_of_range():
+    with pytest.raises(ValueError):
+        merkle_root([])
+    with pytest.raises(IndexError):
+        merkle_proof(_leaves(3), 3)
+
+
+def test_decision_leaf_is_canonical():
+    row = MCPDecision(
+        id=7, route="execute", status="submitted", reason="ok", payload="{}", created_at=datetime(2026, 1, 1)
+    )
+    same = MCPDecision(
+        id=7, route="execute", status="submitted", reason="ok", payload="{}", created_at=datetime(2026, 1, 1)
+    )
+    assert decision_leaf(row) == decision_leaf(same)
+    same.reason = "changed"
+    assert decision_leaf(row) != decision_leaf(same)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[MCPDecision.__table__, DecisionAnchor.__table__, Execution.__table__])
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        for index in range(3):
+            db.add(
+                MCPDecision(route="execute", status="submitted", reason=f"r{index}", payload="{}", entry_id=f"{index:032x}")
+            )
+        db.commit()
+    return factory
+
+
+class AnchorExecClient:
+    """Checks, from a separate session, what is committed when signing and sending happen."""
+
+    account = SimpleNamespace(address=SENDER)
+
+    def __init__(self, session_factory, outcome: str = "submitted", sign: bool = True) -> None:
+        self.session_factory = session_factory
+        self.outcome = outcome
+        self.sign = sign
+        self.seen: dict[str, object] = {}
+
+    def transact(self, to_address, data, value_wei=0, *, before_send=None) -> ExecutionResult:
+        with self.session_factory() as db:
+            anchor = db.execute(select(DecisionAnchor)).scalar_one()
+            self.seen["status_at_claim"] = anchor.status
+            self.seen["claimed"] = db.execute(select(MCPDecision.anchor_id)).scalars().all()
+        if not self.sign:
+            return ExecutionResult(tx_hash="", status=self.outcome)
+        before_send(TX_HASH, 4)
+        with self.session_factory() as db:
+            self.seen["hash_before_send"] = db.execute(select(DecisionAnchor.tx_hash)).scalar_one()
+        if self.outcome != "submitted":
+            return ExecutionResult(tx_hash="", status=self.outcome, sender=SENDER)
+        return ExecutionResult(tx_hash=TX_HASH, status="submitted", sender=SENDER, nonce=4)
+
+
+def _service(session_factory, exec_client) -> DecisionAnchorService:
+    return DecisionAnchorService(
+        session_factory, exec_client, mode="merkle", contract_address=SENDER, tracker=ConfirmationTracker(rpc_url="")
+    )
+
+
+def test_rows_are_claimed_and_hash_committed_before_the_send(session_factory):
+    client = AnchorExecClient(session_factory)
+    anchor = _service(session_factory, client).anchor_pending()
+    assert client.seen["status_at_claim"] == "sending"
+    assert client.seen["claimed"] == [anchor.id] * 3
+    assert client.seen["hash_before_send"] == TX_HASH
+    assert (anchor.status, anchor.tx_hash) == ("submitted", TX_HASH)
+    with session_factory() as db:
+        assert db.execute(select(Execution.tx_hash)).scalars().all() == [TX_HASH]
+
+
+def test_unsigned_failure_releases_the_rows(session_factory):
+    client = AnchorExecClient(session_factory, "gas-estimate-failed", sign=False)
+    anchor = _service(session_factory, client).anchor_pending()
+    assert anchor.status == "gas-estimate-failed" and anchor.tx_hash is None
+    with session_factory() as db:
+        assert db.execute(select(MCPDecision.anchor_id)).scalars().all() == [None] * 3
+
+
+def test_failure_after_signing_is_left_to_the_tracker(session_factory):
+    anchor = _service(session_factory, AnchorExecClient(session_factory, "send-failed")).anchor_pending()
+    assert (anchor.status, anchor.tx_hash) == ("sending", TX_HASH)
+    with session_factory() as db:
+        assert db.execute(select(Execution.nonce)).scalars().all() == [4]
+        db.execute(update(Execution).values(status="dropped"))
+        db.commit()
+        assert _service(session_factory, AnchorExecClient(session_factory)).reconcile(db) == 1
+        assert db.execute(select(MCPDecision.anchor_id)).scalars().all() == [None] * 3
+
+
+def test_stale_unsigned_claim_is_released(session_factory):
+    with session_factory() as db:
+        stale = datetime(2020, 1, 1)
+        db.add(DecisionAnchor(mode="merkle", from_id=1, to_id=3, count=3, status="sending", created_at=stale))
+        db.flush()
+        db.execute(update(MCPDecision).values(anchor_id=1))
+        db.commit()
+        _service(session_factory, AnchorExecClient(session_factory)).reconcile(db)
+        assert db.execute(select(DecisionAnchor.status)).scalar_one() == "abandoned"
+        assert db.execute(select(MCPDecision.anchor_id)).scalars().all() == [None] * 3
@@ -0,0 +1,106 @@
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+from app.services import decision_log as decision_log_module
+from app.services.decision_log import DecisionLogWriter
+
+
+class FakeDB:
+    """Session factory whose inserts fail while `down` is set."""
+
+    def __init__(self, down: bool = False) -> None:
+        self.down = down
+        self.rows: dict[str, dict] = {}
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def execute(self, statement, rows):
+        if self.down:
+            raise ConnectionError("database unreachable")
+        for row in rows:
+            self.rows.setdefault(row["entry_id"], row)
+
+    def commit(self) -> None:
+        return None
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(decision_log_module.time, "sleep", lambda seconds: None)
+
+
+def _writer(tmp_path, mode: str) -> DecisionLogWriter:
+    return DecisionLogWriter(
+        mode=mode, batch_size=10, flush_interval_sec=0.01, wal_path=str(tmp_path / "log.wal"), retry_interval_sec=0.02
+    )
+
+
+def _wait_for(condition, timeout: float = 2) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _orphan(tmp_path, entry_id: str) -> None:
+    path = tmp_path / "log.wal.999.dead"
+    row = {"entry_id": entry_id, "route": "r", "status": "s", "reason": "", "payload": "{}"}
+    path.write_text(json.dumps({**row, "created_at": datetime(2024, 1, 1).isoformat()}) + "\n")
+
+
+@pytest.mark.parametrize("mode", ["async", "wal"])
+def test_failed_batches_are_retried_not_dropped(tmp_path, mode):
+    db = FakeDB(down=True)
+    writer = _writer(tmp_path, mode)
+    writer.start(db)
+    writer.submit("r", "s", "", {})
+    _wait_for(lambda: writer._failed)
+    assert not db.rows
+    db.down = False
+    _wait_for(lambda: db.rows)
+    writer.stop()
+    assert len(db.rows) == 1
+
+
+def test_orphan_segments_are_replayed_at_startup(tmp_path):
+    _orphan(tmp_path, "a" * 32)
+    db = FakeDB()
+    writer = _writer(tmp_path, "wal")
+    writer.start(db)
+    writer.stop()
+    assert list(db.rows) == ["a" * 32]
+    assert not (tmp_path / "log.wal.999.dead").exists()
+
+
+def test_replay_failure_does_not_crash_startup_and_retries(tmp_path):
+    _orphan(tmp_path, "b" * 32)
+    db = FakeDB(down=True)
+    writer = _writer(tmp_path, "wal")
+    writer.start(db)
+    assert writer.running
+    assert (tmp_path / "log.wal.999.dead").exists()
+    db.down = False
+    _wait_for(lambda: db.rows)
+    writer.stop()
+    assert not (tmp_path / "log.wal.999.dead").exists()
+
+
+def test_wal_keeps_unflushed_rows_on_shutdown(tmp_path):
+    db = FakeDB(down=True)
+    writer = _writer(tmp_path, "wal")
+    writer.start(db)
+    writer.submit("r", "s", "", {})
+    writer.stop()
+    # The segment survives for the next startup to replay.
+    lines = open(writer.wal_path, encoding="utf-8").read().splitlines()
+    assert len(lines) == 1 and json.loads(lines[0])["route"] == "r"
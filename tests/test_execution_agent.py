@@ -0,0 +1,117 @@
+import pytest
+
+from app.services.execution_agent import POLICY_CHECKS, UNVERIFIED_CHECKS, ExecutionAgent, gas_cost_wei
+from app.services.pretrade_state import PreTradeReader, PreTradeState
+
+FEES = {"economy": {"maxFeePerGas": 3, "maxPriorityFeePerGas": 1}, "fast": {"maxFeePerGas": 5}}
+
+
+def _state(**kwargs) -> PreTradeState:
+    values = {"owner": "0x" + "aa" * 20, "block_number": 1, "nonce": 4, "native_balance": 10**18}
+    return PreTradeState(**{**values, **kwargs})
+
+
+def test_plan_without_state_never_claims_verification():
+    plan = ExecutionAgent().build_plan("s1", "BNB", "swap", 1)
+    assert plan.safety_checks == UNVERIFIED_CHECKS + POLICY_CHECKS
+    assert not any(check.endswith("-verified") or check.startswith("nonce-synced") for check in plan.safety_checks)
+    assert plan.status == "ready"
+
+
+def test_live_execution_blocks_without_state():
+    plan = ExecutionAgent().build_plan("s1", "BNB", "swap", 1, require_state=True)
+    assert plan.status == "blocked"
+
+
+def test_batch_plans_use_unverified_checks():
+    plans = ExecutionAgent().build_plans([("s1", "BNB", "swap", 1), ("s1", "USDT", "transfer", 30)])
+    assert all(plan.safety_checks == UNVERIFIED_CHECKS + POLICY_CHECKS for plan in plans)
+
+
+EDGE_SIZES = [1e-9, 4.999, 5, 9.999, 10, 19.999, 20, 49.999, 50, 50.001, 1e9]
+
+
+@pytest.mark.parametrize(
+    "legs",
+    [
+        [("s1", "BNB", "swap", size) for size in EDGE_SIZES],
+        [("s1", "BNB", action, 12.5) for action in ("swap", "SWAP", "approve", "transfer", "")],
+        [("s2", "USDT", "transfer", 50), ("s1", "BNB", "swap", 0.1), ("s1", "BNB", "swap", 0.1)],
+        [],
+    ],
+    ids=["size-boundaries-and-gas-cap", "actions", "mixed-with-duplicates", "empty"],
+)
+def test_batch_plans_match_single_plans(legs):
+    agent = ExecutionAgent()
+    assert agent.build_plans(legs) == [agent.build_plan(*leg) for leg in legs]
+
+
+@pytest.mark.parametrize("size", [0, -1])
+def test_batch_and_single_plans_reject_the_same_sizes(size):
+    agent = ExecutionAgent()
+    with pytest.raises(ValueError, match="size must be positive"):
+        agent.build_plan("s1", "BNB", "swap", size)
+    with pytest.raises(ValueError, match="size must be positive"):
+        agent.build_plans([("s1", "BNB", "swap", 1), ("s1", "BNB", "swap", size)])
+
+
+def test_gas_cost_counts_against_native_balance():
+    agent = ExecutionAgent()
+    gas = 100_000
+    # Enough for the value alone, not for value plus gas at the economy max fee.
+    state = _state(native_balance=10**6 + gas * 3 - 1)
+    plan = agent.build_plan("s1", "BNB", "swap", 1, state=state, value_wei=10**6, gas_estimate=gas, fee_strategies=FEES)
+    assert "insufficient-native-balance" in plan.safety_checks
+    assert plan.status == "blocked"
+
+    state = _state(native_balance=10**6 + gas * 3)
+    plan = agent.build_plan("s1", "BNB", "swap", 1, state=state, value_wei=10**6, gas_estimate=gas, fee_strategies=FEES)
+    assert "balance-verified" in plan.safety_checks
+    assert plan.status == "ready"
+
+
+def test_safety_checks_flag_unknown_gas_cost_and_token_shortfalls():
+    state = _state(token_balance=50, allowance=10)
+    checks = state.safety_checks(value_wei=0, token_amount=20)
+    assert checks[:2] == ["nonce-synced:4", "balance-verified"]
+    assert "gas-cost-unverified" in checks
+    assert "token-balance-verified" in checks
+    assert "insufficient-allowance" in checks
+
+
+def test_gas_cost_wei():
+    assert gas_cost_wei(21_000, {"maxFeePerGas": 2}) == 42_000
+    assert gas_cost_wei(21_000, {"gasPrice": 3}) == 63_000
+    assert gas_cost_wei(21_000, None) is None
+
+
+@pytest.mark.parametrize(
+    "replies, message",
+    [
+        ([{"id": 0, "result": "0x1"}, {"id": 1, "result": "0x2"}], "missing from batch reply"),
+        ([{"id": 0, "result": "0x1"}, {"id": 1, "result": "0x2"}, {"id": 2, "result": None}], "no result"),
+        (
+            [{"id": 0, "result": "0x1"}, {"id": 1, "result": "0x2"}, {"id": 2, "error": {"message": "boom"}}],
+            "boom",
+        ),
+    ],
+)
+def test_incomplete_batch_replies_raise(fake_rpc, replies, message):
+    reader = PreTradeReader(rpc_url="http://rpc.invalid")
+    reader.client = fake_rpc(replies)
+    with pytest.raises(RuntimeError, match=message):
+        reader.read("0x" + "aa" * 20)
+
+
+def test_non_list_batch_reply_falls_back_to_single_calls(fake_rpc):
+    reader = PreTradeReader(rpc_url="http://rpc.invalid")
+    reader.client = fake_rpc(
+        {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch requests are disabled"}},
+        {"id": 0, "result": "0x10"},
+        {"id": 1, "result": "0x4"},
+        {"id": 2, "result": "0x64"},
+    )
+    state = reader.read("0x" + "aa" * 20)
+    assert (state.block_number, state.nonce, state.native_balance) == (16, 4, 100)
+    methods = [call["method"] for call in reader.client.calls[1:]]
+    assert methods == ["eth_blockNumber", "eth_getTransactionCount", "eth_getBalance"]
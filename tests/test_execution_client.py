@@ -0,0 +1,151 @@
+import pytest
+import requests
+from web3 import Web3
+from web3.providers import BaseProvider
+
+from app.services import execution_client
+from app.services.chain_state import NonceManager
+from app.services.execution_client import ExecutionClient, rpc_metrics_middleware
+from app.services.metrics import PROVIDER_LATENCY, PROVIDER_REQUESTS
+
+SENDER = "0x" + "aa" * 20
+TARGET = "0x" + "bb" * 20
+
+
+class FakeEth:
+    def __init__(self, pending: int, outcomes: list) -> None:
+        self.pending = pending
+        self.outcomes = outcomes
+        self.sent: list[int] = []
+        self.count_calls = 0
+
+    def get_transaction_count(self, address, block):
+        self.count_calls += 1
+        return self.pending
+
+    def send_raw_transaction(self, raw: bytes):
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        if isinstance(outcome, Exception):
+            raise outcome
+        nonce = int.from_bytes(raw, "big")
+        self.sent.append(nonce)
+        self.pending = max(self.pending, nonce + 1)
+        return raw.rjust(32, b"\x00")
+
+
+class FakeWeb3:
+    def __init__(self, pending: int = 0, outcomes: list | None = None) -> None:
+        self.eth = FakeEth(pending, outcomes or [])
+
+
+class FakeSigned:
+    def __init__(self, nonce: int) -> None:
+        self.rawTransaction = nonce.to_bytes(4, "big")
+
+
+class FakeAccount:
+    address = SENDER
+
+    def sign_transaction(self, txn):
+        return FakeSigned(txn["nonce"])
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    monkeypatch.setattr(execution_client, "PRIVATE_KEY", "0x" + "01" * 32)
+
+    def build(pending: int = 0, outcomes: list | None = None) -> ExecutionClient:
+        client = ExecutionClient()
+        client.web3 = FakeWeb3(pending, outcomes)
+        client.account = FakeAccount()
+        client.nonces = NonceManager(client.web3, SENDER)
+        client._chain_id = 97
+        return client
+
+    return build
+
+
+def _send(client: ExecutionClient):
+    return client.transact(TARGET, b"\x01", gas=21_000, fees={"gasPrice": 1})
+
+
+def _refused() -> requests.ConnectionError:
+    return requests.ConnectionError("Max retries exceeded (NewConnectionError: Failed to establish a new connection)")
+
+
+@pytest.mark.parametrize(
+    "failure",
+    [
+        _refused(),
+        requests.ConnectTimeout("connect timed out"),
+        ValueError({"code": -32000, "message": "insufficient funds for gas * price + value"}),
+    ],
+)
+def test_undelivered_send_gives_the_nonce_back(make_client, failure):
+    client = make_client(pending=5, outcomes=[failure])
+    assert _send(client).status == "send-failed"
+    result = _send(client)
+    assert (result.status, result.nonce) == ("submitted", 5)
+    # A node rejection is not a reason to re-read the pending count.
+    assert client.web3.eth.count_calls == 1
+
+
+def test_released_nonce_fills_the_gap_before_new_ones(make_client):
+    client = make_client(pending=5)
+    first, second = client.nonces.next(), client.nonces.next()
+    client.nonces.release(first)
+    assert client.nonces.next() == first
+    assert client.nonces.next() == second + 1
+
+
+def test_ambiguous_send_reuses_the_nonce_only_if_the_node_never_saw_it(make_client):
+    client = make_client(pending=5, outcomes=[requests.ReadTimeout("read timed out")])
+    assert _send(client).status == "send-failed"
+    # The node's pending count still stops at 5, so nonce 5 never arrived.
+    assert _send(client).nonce == 5
+
+    client = make_client(pending=5, outcomes=[requests.ReadTimeout("read timed out")])
+    assert _send(client).status == "send-failed"
+    client.web3.eth.pending = 6  # the timed-out send did land
+    assert _send(client).nonce == 6
+
+
+def test_unknown_errors_never_hand_the_nonce_out_again_blindly(make_client):
+    client = make_client(pending=5, outcomes=[RuntimeError("provider exploded")])
+    assert _send(client).status == "send-failed"
+    client.web3.eth.pending = 6  # nonce 5 reached the node before the provider failed
+    assert client.nonces.next() == 6
+    assert client.nonces.next() == 7
+
+
+def test_nonce_too_low_resyncs_forward_and_retries(make_client):
+    client = make_client(pending=5, outcomes=[ValueError({"code": -32000, "message": "nonce too low"})])
+    client.nonces.next()  # prime at 5
+    client.web3.eth.pending = 9  # sends from another process
+    client.nonces.release(5)
+    result = _send(client)
+    assert (result.status, result.nonce) == ("submitted", 9)
+    assert client.web3.eth.sent == [9]
+
+
+class CannedProvider(BaseProvider):
+    def make_request(self, method, params):
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x61"}
+        return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "unsupported"}}
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+def test_web3_calls_are_recorded_in_the_rpc_histogram():
+    web3 = Web3(CannedProvider())
+    web3.middleware_onion.add(rpc_metrics_middleware, "rpc_metrics")
+    latency = PROVIDER_LATENCY.labels(provider="rpc")
+    ok = PROVIDER_REQUESTS.labels(provider="rpc", outcome="2xx")
+    errors = PROVIDER_REQUESTS.labels(provider="rpc", outcome="rpc-error")
+    before = (latency.snapshot()[1], ok.value(), errors.value())
+    assert web3.eth.chain_id == 97
+    with pytest.raises(ValueError):
+        web3.eth.get_transaction_count(Web3.to_checksum_address(SENDER), "pending")
+    assert (latency.snapshot()[1], ok.value(), errors.value()) == (before[0] + 2, before[1] + 1, before[2] + 1)
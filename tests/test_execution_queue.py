@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from app.schemas import TradeIntent
+from app.services.execution_queue import ExecutionQueue, QueueFullError
+
+TRADE = TradeIntent(asset="BNB", action="swap", size=1, strategy_id="s1")
+
+
+def _submit(queue: ExecutionQueue, lane: str = "signer", priority: int = 0, deadline_sec: int = 60, tag: str = ""):
+    return queue.submit(TRADE, "user-1", lane=lane, payload={"tag": tag}, priority=priority, deadline_sec=deadline_sec)
+
+
+def _recorder():
+    order: list[str] = []
+
+    def handler(ticket):
+        order.append(ticket.payload["tag"])
+        return {"status": "done"}
+
+    return order, handler
+
+
+def test_priority_then_deadline_order():
+    queue = ExecutionQueue(workers=1)
+    tickets = [
+        _submit(queue, priority=0, tag="low"),
+        _submit(queue, priority=5, deadline_sec=120, tag="high-late"),
+        _submit(queue, priority=5, deadline_sec=30, tag="high-early"),
+        _submit(queue, priority=1, tag="mid"),
+    ]
+    order, handler = _recorder()
+    queue.start(handler)
+    assert all(ticket.wait(2) for ticket in tickets)
+    queue.stop()
+    assert order == ["high-early", "high-late", "mid", "low"]
+
+
+def test_one_lane_runs_serially_in_order_while_other_lanes_proceed():
+    queue = ExecutionQueue(workers=4)
+    active: dict[str, int] = {}
+    overlap: list[str] = []
+    order: dict[str, list[str]] = {"a": [], "b": []}
+    lock = threading.Lock()
+
+    def handler(ticket):
+        with lock:
+            active[ticket.lane] = active.get(ticket.lane, 0) + 1
+            if active[ticket.lane] > 1:
+                overlap.append(ticket.lane)
+            order[ticket.lane].append(ticket.payload["tag"])
+        time.sleep(0.01)
+        with lock:
+            active[ticket.lane] -= 1
+        return {"status": "done"}
+
+    tickets = [_submit(queue, lane=lane, tag=f"{lane}{index}") for index in range(5) for lane in ("a", "b")]
+    queue.start(handler)
+    assert all(ticket.wait(2) for ticket in tickets)
+    queue.stop()
+    # Equal priority runs in submission order, which is nonce order for a signer lane.
+    assert order == {"a": [f"a{index}" for index in range(5)], "b": [f"b{index}" for index in range(5)]}
+    assert overlap == []
+
+
+def test_stop_cancels_queued_tickets_and_resolves_waiters():
+    queue = ExecutionQueue(workers=1)
+    gate = threading.Event()
+
+    def handler(ticket):
+        gate.wait(2)
+        return {"status": "done"}
+
+    queue.start(handler)
+    running = _submit(queue, tag="running")
+    while running.status != "running":
+        time.sleep(0.005)
+    queued = [_submit(queue, tag=f"queued{index}") for index in range(2)]
+    threading.Timer(0.05, gate.set).start()
+    queue.stop()
+    assert running.status == "done"
+    assert all(ticket.wait(0) and ticket.status == "cancelled" for ticket in queued)
+    assert queued[0].detail == "queue-stopped"
+    assert queue.depth() == 0
+    with pytest.raises(QueueFullError, match="stopped"):
+        _submit(queue)
+
+
+def test_expired_tickets_are_resolved():
+    queue = ExecutionQueue(workers=1)
+    ticket = _submit(queue, deadline_sec=60)
+    ticket.deadline = time.monotonic() - 1
+    order, handler = _recorder()
+    queue.start(handler)
+    assert ticket.wait(2) and ticket.status == "expired"
+    queue.stop()
+    assert order == []
@@ -0,0 +1,26 @@
+import time
+
+from app.services.ingest_scheduler import IngestScheduler
+from app.services.metrics import SCHEDULER_LAG
+
+
+def test_slow_tick_shows_up_as_lag_on_the_next_one():
+    lag = SCHEDULER_LAG.labels(scheduler="ingest")
+    _, count_before, sum_before = lag.snapshot()
+    scheduler = IngestScheduler(db_factory=None, interval_sec=0.05)
+    ticks: list[float] = []
+
+    def tick() -> None:
+        ticks.append(time.monotonic())
+        if len(ticks) == 1:
+            time.sleep(0.08)  # overruns its interval by 30ms
+        elif len(ticks) == 3:
+            scheduler._stop_event.set()
+
+    scheduler._tick = tick
+    scheduler._run()
+    _, count, total = lag.snapshot()
+    assert count - count_before == 3
+    assert total - sum_before >= 0.025
+    # The grid is kept: the third tick is due at start + 2 intervals, not 80ms + 2 intervals.
+    assert ticks[2] - ticks[0] < 0.13
@@ -0,0 +1,167 @@
+import pytest
+import requests
+from web3.exceptions import ContractLogicError, TimeExhausted
+
+from app.schemas import ContractCall, TradeIntent
+from app.services import mcp_orchestrator
+from app.services.execution_client import ExecutionResult
+from app.services.mcp_orchestrator import MCPOrchestrator
+from app.services.pretrade_state import PreTradeState
+from app.services.simulator import SimulationResult
+
+OWNER = "0x" + "aa" * 20
+ROUTER = "0x" + "10" * 20
+TOKEN_IN = "0x" + "22" * 20
+TOKEN_OUT = "0x" + "33" * 20
+FEES = {"economy": {"maxFeePerGas": 3, "maxPriorityFeePerGas": 1}, "fast": {"maxFeePerGas": 5}}
+
+
+class FakeExecClient:
+    """Answers like a node where only real ERC-20s respond to balanceOf/allowance."""
+
+    def __init__(self, tokens: set[str]) -> None:
+        self.tokens = tokens
+        self.reads: list[tuple[str | None, str | None]] = []
+        self.submitted: list[dict] = []
+        self.simulated_at: list[int | None] = []
+
+    def read_state(self, token=None, spender=None) -> PreTradeState:
+        self.reads.append((token, spender))
+        if token is not None and token not in self.tokens:
+            raise RuntimeError("eth_call failed: execution reverted")
+        return PreTradeState(
+            owner=OWNER,
+            block_number=100,
+            nonce=7,
+            native_balance=10**18,
+            token_balance=10**21 if token else None,
+            allowance=10**21 if token and spender else None,
+        )
+
+    def estimate(self, to_address, data, value_wei=0):
+        return 150_000, FEES
+
+    def simulate(self, to_address, data, value_wei=0, *, gas=None, fees=None, block=None):
+        self.simulated_at.append(block)
+        return SimulationResult(success=True, block="pending", return_data="0x")
+
+    def submit(self, to_address, data, value_wei=0, *, gas=None, fees=None) -> ExecutionResult:
+        self.submitted.append({"to": to_address, "gas": gas})
+        return ExecutionResult(tx_hash="0x" + "ab" * 32, status="submitted", sender=OWNER, nonce=7)
+
+
+@pytest.fixture
+def live(monkeypatch):
+    monkeypatch.setattr(mcp_orchestrator, "EXECUTE_LIVE", True)
+    monkeypatch.setattr(mcp_orchestrator, "POLICY_MODE", "execute_enabled")
+    monkeypatch.setattr(mcp_orchestrator, "SIMULATE_BEFORE_SUBMIT", True)
+    monkeypatch.setattr(mcp_orchestrator.confirmation_tracker, "track", lambda *args, **kwargs: None)
+
+
+class DownExecClient(FakeExecClient):
+    """A node that refuses connections for reads and times out simulations."""
+
+    def read_state(self, token=None, spender=None):
+        self.reads.append((token, spender))
+        raise requests.ConnectionError("connection refused")
+
+    def estimate(self, to_address, data, value_wei=0):
+        raise requests.ConnectionError("connection refused")
+
+    def simulate(self, to_address, data, value_wei=0, *, gas=None, fees=None, block=None):
+        raise TimeExhausted("eth_call timed out")
+
+
+def _orchestrator(exec_client) -> MCPOrchestrator:
+    return MCPOrchestrator(None, llm_advisor=object(), exec_client=exec_client)
+
+
+def _swap(amount_in: int = 10**18) -> TradeIntent:
+    call = ContractCall(
+        method="swapExactTokensForTokens",
+        args={
+            "amount_in": amount_in,
+            "amount_out_min": 1,
+            "path": [TOKEN_IN, TOKEN_OUT],
+            "to": OWNER,
+            "deadline": 2_000_000_000,
+        },
+    )
+    return TradeIntent(asset="BNB", action="swap", size=1, strategy_id="s1", to_address=ROUTER, call=call)
+
+
+def test_router_swap_reads_the_input_token_and_submits(live):
+    client = FakeExecClient({TOKEN_IN})
+    result = _orchestrator(client).execute(_swap())
+    assert result["status"] == "submitted", result
+    # balanceOf/allowance go to path[0] with the router as spender, never to the router itself.
+    assert client.reads == [(TOKEN_IN, ROUTER)]
+    checks = result["plan"]["safety_checks"]
+    assert "token-balance-verified" in checks and "allowance-verified" in checks
+    # Simulated at pending even though the state was read at block 100.
+    assert client.simulated_at == [None]
+
+
+def test_router_swap_checks_the_decoded_amount_in(live):
+    client = FakeExecClient({TOKEN_IN})
+    result = _orchestrator(client).execute(_swap(amount_in=10**22))
+    assert result["reason"] == "pre-trade-checks-failed"
+    assert "insufficient-token-balance" in result["safety_checks"]
+
+
+def test_explicit_token_overrides_decoding(live):
+    client = FakeExecClient({TOKEN_OUT})
+    trade = _swap().model_copy(update={"token": TOKEN_OUT})
+    assert _orchestrator(client).execute(trade)["status"] == "submitted"
+    assert client.reads == [(TOKEN_OUT, ROUTER)]
+
+
+def test_transfer_reads_the_target_token(live):
+    client = FakeExecClient({TOKEN_IN})
+    trade = TradeIntent(
+        asset="USDT",
+        action="transfer",
+        size=1,
+        strategy_id="s1",
+        to_address=TOKEN_IN,
+        call=ContractCall(method="transfer", args={"to": OWNER, "amount": 5}),
+    )
+    assert _orchestrator(client).execute(trade)["status"] == "submitted"
+    assert client.reads == [(TOKEN_IN, None)]
+
+
+def test_unknown_calldata_does_not_treat_the_target_as_a_token(live):
+    client = FakeExecClient(set())
+    trade = TradeIntent(
+        asset="BNB", action="swap", size=1, strategy_id="s1", to_address=ROUTER, call_data="0xdeadbeef"
+    )
+    assert _orchestrator(client).execute(trade)["status"] == "submitted"
+    assert client.reads == [(None, None)]
+
+
+def test_rpc_down_blocks_live_execution_instead_of_raising(live):
+    client = DownExecClient({TOKEN_IN})
+    result = _orchestrator(client).execute(_swap())
+    assert result["reason"] == "pre-trade-checks-failed"
+    assert client.submitted == []
+
+
+def test_rpc_down_still_paper_trades(live, monkeypatch):
+    monkeypatch.setattr(mcp_orchestrator, "POLICY_MODE", "paper_trade")
+    monkeypatch.setattr(mcp_orchestrator, "EXECUTE_LIVE", False)
+    result = _orchestrator(DownExecClient({TOKEN_IN})).execute(_swap())
+    assert result["status"] == "paper-trade", result
+
+
+def test_gas_estimate_failure_falls_back_to_the_table(live, monkeypatch):
+    client = FakeExecClient({TOKEN_IN})
+
+    def estimate(to_address, data, value_wei=0):
+        raise ContractLogicError("execution reverted")
+
+    monkeypatch.setattr(client, "estimate", estimate)
+    result = _orchestrator(client).execute(_swap())
+    assert result["status"] == "submitted", result
+    assert result["plan"]["gas_source"] == "table"
+    # The table figure is only a plan estimate; submit re-estimates rather than sending it as the limit.
+    assert client.submitted[0]["gas"] is None
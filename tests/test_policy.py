@@ -0,0 +1,91 @@
+import threading
+
+from app.schemas import TradeIntent
+from app.services.policy import CompiledPolicy, ExposureWindow
+
+
+def _policy(**kwargs) -> CompiledPolicy:
+    return CompiledPolicy(["BNB", "USDT"], ["swap", "transfer"], 25, **kwargs)
+
+
+def _intent(asset: str, size: float, strategy_id: str = "s1", action: str = "swap") -> TradeIntent:
+    return TradeIntent(asset=asset, action=action, size=size, strategy_id=strategy_id)
+
+
+def test_global_and_allow_list_limits():
+    policy = _policy()
+    assert policy.validate("bnb", "SWAP", 5) == (True, "ok")
+    assert policy.validate("BNB", "swap", 26) == (False, "position-size-exceeds-limit")
+    assert policy.validate("ETH", "swap", 1) == (False, "asset-not-allowed")
+    assert policy.validate("BNB", "stake", 1) == (False, "action-not-allowed")
+    assert policy.validate("BNB", "swap", 0) == (False, "size-must-be-positive")
+
+
+def test_scoped_limits_take_the_tightest():
+    policy = _policy(strategy_limits={"s1": 10}, user_limits={"u1": 4})
+    assert policy.validate("BNB", "swap", 8, strategy_id="s1")[0]
+    assert policy.validate("BNB", "swap", 11, strategy_id="s1") == (False, "position-size-exceeds-scoped-limit")
+    assert policy.validate("BNB", "swap", 5, strategy_id="s1", user_id="u1") == (
+        False,
+        "position-size-exceeds-scoped-limit",
+    )
+    assert policy.validate("BNB", "swap", 20, strategy_id="other", user_id="other")[0]
+
+
+def test_batch_matches_single_validation_and_counts_the_basket():
+    policy = _policy(strategy_limits={"s1": 10}, max_asset_exposure=12)
+    intents = [_intent("BNB", 5), _intent("BNB", 11), _intent("BNB", 6), _intent("BNB", 2), _intent("ETH", 1)]
+    assert policy.validate_batch(intents) == [
+        (True, "ok"),
+        (False, "position-size-exceeds-scoped-limit"),
+        (True, "ok"),
+        (False, "asset-exposure-exceeds-window"),
+        (False, "asset-not-allowed"),
+    ]
+
+
+def test_try_reserve_counts_and_release_returns_capacity():
+    policy = _policy(max_asset_exposure=10)
+    token = policy.try_reserve("bnb", 6)
+    assert token is not None
+    assert policy.try_reserve("BNB", 5) is None
+    assert policy.validate("BNB", "swap", 5) == (False, "asset-exposure-exceeds-window")
+    policy.release("BNB", 6, token)
+    assert policy.exposure.total("BNB") == 0
+    assert policy.try_reserve("BNB", 10) is not None
+
+
+def test_try_reserve_without_cap_never_blocks():
+    policy = _policy()
+    assert policy.try_reserve("BNB", 1_000) == 0.0
+    policy.release("BNB", 1_000, 0.0)
+    assert policy.exposure.total("BNB") == 0
+
+
+def test_concurrent_reservations_never_exceed_the_cap():
+    policy = _policy(max_asset_exposure=10)
+    barrier = threading.Barrier(20)
+    accepted = []
+
+    def worker() -> None:
+        barrier.wait()
+        if policy.try_reserve("BNB", 1) is not None:
+            accepted.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(accepted) == 10
+    assert policy.exposure.total("BNB") == 10
+
+
+def test_exposure_window_expires_old_buckets():
+    window = ExposureWindow(window_sec=60, bucket_sec=10)
+    window.add("BNB", 4, now=1_000)
+    window.add("BNB", 3, now=1_030)
+    assert window.total("BNB", now=1_035) == 7
+    assert window.total("BNB", now=1_065) == 3
+    assert window.try_add("BNB", 8, cap=10, now=1_065) is None
+    assert window.try_add("BNB", 7, cap=10, now=1_065) is not None
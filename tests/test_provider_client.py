@@ -0,0 +1,88 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from app.services.provider_client import CircuitBreaker, ProviderClient
+
+
+def _client(handler, *, hedge: bool = False) -> ProviderClient:
+    client = ProviderClient("test", "http://provider.invalid")
+    client.client = httpx.Client(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    client.backoff_sec = 0
+    if hedge:
+        client.hedge = True
+        client._hedge_pool = ThreadPoolExecutor(max_workers=4)
+    return client
+
+
+def test_half_open_admits_one_probe_and_closes_on_success():
+    breaker = CircuitBreaker(threshold=2, reset_sec=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    # Only one probe at a time while it is outstanding.
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens_immediately():
+    breaker = CircuitBreaker(threshold=5, reset_sec=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_hedge_fires_after_p95_and_the_faster_reply_wins():
+    calls = []
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            calls.append(time.monotonic())
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.5)
+            return httpx.Response(200, json={"from": "primary"})
+        return httpx.Response(200, json={"from": "hedge"})
+
+    client = _client(handler, hedge=True)
+    for _ in range(20):
+        client.latency.add(0.01)
+    start = time.monotonic()
+    response = client.get("/quote")
+    assert response.json() == {"from": "hedge"}
+    assert time.monotonic() - start < 0.4
+    assert len(calls) == 2
+    client.close()
+
+
+def test_post_is_neither_retried_nor_hedged_by_default():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        return httpx.Response(503)
+
+    client = _client(handler, hedge=True)
+    for _ in range(20):
+        client.latency.add(0.0)
+    assert client.post("/orders", json={}).status_code == 503
+    assert calls == ["POST"]
+    client.close()
+
+    calls.clear()
+    client = _client(handler)
+    client.breaker = CircuitBreaker(threshold=10)
+    assert client.get("/quote").status_code == 503
+    assert len(calls) == client.max_retries + 1
+    client.close()
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+from starlette.requests import Request
+
+from app import main
+from app.services.mcp_orchestrator import MCPOrchestrator
+
+
+def _request(headers: dict[str, str] | None = None) -> Request:
+    raw = [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "POST", "path": "/mcp/route", "headers": raw, "query_string": b""})
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    monkeypatch.setattr(main.read_router, "replicas", [object()])
+    monkeypatch.setattr(main.read_router, "_healthy", [True])
+
+
+def test_orchestrator_reuses_the_request_session_without_replicas():
+    assert main._orchestrator_reads(_request()) is None
+    db = object()
+    orchestrator = MCPOrchestrator(db, llm_advisor=object(), exec_client=object())
+    with orchestrator.read_session() as read_db:
+        assert read_db is db
+
+
+def test_orchestrator_reads_go_to_a_replica_when_one_is_configured(replicas):
+    assert callable(main._orchestrator_reads(_request()))
+
+
+def test_read_your_writes_keeps_orchestrator_reads_on_the_request_session(replicas):
+    assert main._orchestrator_reads(_request({"X-Read-Your-Writes": "true"})) is None
+
+
+def test_shared_session_is_used_by_one_stage_at_a_time():
+    orchestrator = MCPOrchestrator(object(), llm_advisor=object(), exec_client=object())
+    inside = threading.Event()
+    release = threading.Event()
+    entered: list[str] = []
+
+    def first() -> None:
+        with orchestrator.read_session():
+            entered.append("first")
+            inside.set()
+            release.wait(1)
+
+    def second() -> None:
+        with orchestrator.read_session():
+            entered.append("second")
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    inside.wait(1)
+    other = threading.Thread(target=second)
+    other.start()
+    other.join(0.05)
+    assert entered == ["first"]
+    release.set()
+    thread.join(1)
+    other.join(1)
+    assert entered == ["first", "second"]
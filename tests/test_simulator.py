@@ -0,0 +1,81 @@
+import pytest
+from eth_abi import encode
+
+from app.services.simulator import (
+    ERROR_SELECTOR,
+    PANIC_SELECTOR,
+    SimulationError,
+    TxSimulator,
+    decode_revert,
+    is_revert,
+)
+
+ERROR_DATA = "0x" + ERROR_SELECTOR + encode(["string"], ["insufficient output"]).hex()
+PANIC_DATA = "0x" + PANIC_SELECTOR + encode(["uint256"], [0x11]).hex()
+
+
+@pytest.fixture
+def make_simulator(fake_rpc):
+    def build(*bodies: dict) -> TxSimulator:
+        simulator = TxSimulator(rpc_url="http://rpc.invalid")
+        simulator.client = fake_rpc(*bodies)
+        return simulator
+
+    return build
+
+
+TXN = {"from": "0x" + "aa" * 20, "to": "0x" + "bb" * 20, "data": b"\x01\x02", "value": 0}
+
+
+def test_decode_revert():
+    assert decode_revert(ERROR_DATA) == "insufficient output"
+    assert decode_revert(PANIC_DATA) == "panic 0x11"
+    assert decode_revert("0xdeadbeef") == "custom error 0xdeadbeef"
+    assert decode_revert("0x") == "reverted without reason"
+    assert decode_revert(None) == "reverted without reason"
+    # A truncated Error(string) still reports something useful rather than raising.
+    assert decode_revert("0x" + ERROR_SELECTOR + "00") == f"custom error 0x{ERROR_SELECTOR}"
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        ({"code": 3, "message": "execution reverted", "data": ERROR_DATA}, True),
+        ({"code": -32000, "message": "execution reverted"}, True),
+        ({"code": -32000, "message": "err", "data": ERROR_DATA}, True),
+        ({"code": -32603, "message": "Error: VM Exception while processing transaction: reverted"}, True),
+        ({"code": -32000, "message": "header not found"}, False),
+        ({"code": -32005, "message": "limit exceeded"}, False),
+        ({"code": -32601, "message": "the method eth_call does not exist"}, False),
+        ({"code": -32000, "message": "missing trie node", "data": "0x"}, False),
+    ],
+)
+def test_is_revert(error, expected):
+    assert is_revert(error) is expected
+
+
+def test_revert_is_decoded_and_cached_per_block(make_simulator):
+    simulator = make_simulator({"error": {"code": 3, "message": "execution reverted", "data": ERROR_DATA}})
+    first = simulator.simulate(TXN, block=100)
+    second = simulator.simulate(TXN, block=100)
+    assert not first.success and first.revert_reason == "insufficient output"
+    assert second.cached and second.revert_reason == "insufficient output"
+    assert simulator.client.calls[0]["params"][1] == hex(100)
+    assert len(simulator.client.calls) == 1
+
+
+def test_node_errors_raise_and_are_not_cached(make_simulator):
+    simulator = make_simulator(
+        {"error": {"code": -32005, "message": "rate limited"}},
+        {"result": "0x"},
+    )
+    with pytest.raises(SimulationError):
+        simulator.simulate(TXN, block=100)
+    assert simulator.simulate(TXN, block=100).success
+
+
+def test_pending_is_never_cached(make_simulator):
+    simulator = make_simulator({"result": "0x01"}, {"result": "0x02"})
+    assert simulator.simulate(TXN).return_data == "0x01"
+    assert simulator.simulate(TXN).return_data == "0x02"
+    assert [call["params"][1] for call in simulator.client.calls] == ["pending", "pending"]
@@ -0,0 +1,54 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.responses import StreamingResponse
+
+from app.main import _with_timing
+from app.services.tracing import propagate, span, start_trace
+
+
+def _response(body: bytes, media_type: str) -> StreamingResponse:
+    response = StreamingResponse(iter([body]), media_type=media_type)
+    response.raw_headers.append((b"set-cookie", b"a=1"))
+    response.raw_headers.append((b"set-cookie", b"b=2"))
+    return response
+
+
+def _rewrite(response):
+    with start_trace("GET /x", sampled=True) as root:
+        with span("db.query"):
+            pass
+    return asyncio.run(_with_timing(response, root)), root
+
+
+def _values(response, name: bytes) -> list[bytes]:
+    return [value for key, value in response.raw_headers if key == name]
+
+
+def test_json_rewrite_keeps_repeated_headers_and_adds_timing():
+    response, root = _rewrite(_response(b'{"ok": true}', "application/json"))
+    assert _values(response, b"set-cookie") == [b"a=1", b"b=2"]
+    assert _values(response, b"x-trace-id") == [root.trace.trace_id.encode()]
+    assert b"db.query;dur=" in _values(response, b"server-timing")[0]
+    assert len(_values(response, b"content-type")) == 1
+    assert int(_values(response, b"content-length")[0]) == len(response.body)
+    assert json.loads(response.body)["debug_timing"]["trace_id"] == root.trace.trace_id
+
+
+def test_non_json_response_only_gains_timing_headers():
+    response, root = _rewrite(_response(b"data: 1\n\n", "text/event-stream"))
+    assert _values(response, b"set-cookie") == [b"a=1", b"b=2"]
+    assert response.headers["x-trace-id"] == root.trace.trace_id
+
+
+def test_spans_from_worker_threads_nest_under_the_request():
+    with ThreadPoolExecutor(max_workers=1) as pool, start_trace("GET /x", sampled=True) as root:
+
+        def work() -> None:
+            with span("worker"):
+                pass
+
+        pool.submit(propagate(work)).result()
+    (worker,) = [item for item in root.trace.spans if item.name == "worker"]
+    assert worker.parent_id == root.span_id and worker.trace is root.trace